@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
-from .database import get_db
+from .cache import ResponseCache
+from .catalog_version import ADMINS_SLOT, GenerationCounter
+from .database import get_read_db
 from .models import Admin
 from .schemas import TokenData
 
@@ -15,9 +18,20 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24
 
+# Verified tokens are remembered for at most this many seconds (0 disables)
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", 60))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 256))
+
 # Security scheme
 security = HTTPBearer()
 
+# token -> (expires at (unix time), admins generation, Admin); an entry never
+# outlives the token's exp
+auth_cache = ResponseCache(AUTH_CACHE_SIZE)
+# Bumped by forget_admin_tokens() in any worker: older entries are ignored and
+# a lookup that started earlier is not cached
+_admins_generation = GenerationCounter(ADMINS_SLOT)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
@@ -28,6 +42,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(hours=ACCESS_TOKEN_EXPIRE_HOURS)
 
     to_encode.update({"exp": expire})
+    # python-jose (and its crypto backend) is imported on first use, not at worker boot
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -40,27 +56,46 @@ def verify_token(token: str) -> TokenData:
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, expires_at=payload.get("exp"))
     except JWTError:
         raise credentials_exception
 
     return token_data
 
 
-def get_current_admin(
+async def get_current_admin(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> Admin:
-    """Get the current authenticated admin user."""
+    """
+    Get the current authenticated admin user.
+
+    A verified token is cached with the admin it belongs to, so repeated
+    admin requests skip the JWT check and the database lookup. Entries
+    expire after AUTH_CACHE_TTL seconds or at the token's exp, whichever
+    comes first, and are dropped when an admin account is deleted (by any
+    worker).
+    """
     token = credentials.credentials
+    now = time.time()
+    generation = _admins_generation.get()
+
+    entry = auth_cache.get(token) if AUTH_CACHE_TTL > 0 else None
+    if entry is not None:
+        expires_at, entry_generation, admin = entry
+        if now < expires_at and entry_generation == generation:
+            return admin
+        auth_cache.discard(token)
+
     token_data = verify_token(token)
 
-    admin = db.query(Admin).filter(Admin.username == token_data.username).first()
+    admin = await db.scalar(select(Admin).filter(Admin.username == token_data.username))
     if admin is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -68,4 +103,17 @@ def get_current_admin(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    if AUTH_CACHE_TTL > 0 and generation == _admins_generation.get():
+        expires_at = now + AUTH_CACHE_TTL
+        if token_data.expires_at is not None:
+            expires_at = min(expires_at, token_data.expires_at)
+        if expires_at > now:
+            auth_cache.set(token, (expires_at, generation, admin))
+
     return admin
+
+
+def forget_admin_tokens() -> None:
+    """Drop all cached tokens (after an admin account was deleted; that is rare)."""
+    _admins_generation.bump()
+    auth_cache.clear()
@@ -0,0 +1,332 @@
+"""
+Bulk import of keyboards from a manifest plus a zip of images.
+
+The manifest is CSV (with a header row) or JSONL, one keyboard per row, with
+the KeyboardCreate fields and an `image` column naming a file in the zip
+archive. Every row is validated first; images that valid rows use are then
+extracted and stored (content-addressed, variants rendered in the worker
+pool) concurrently, and the rows are inserted in batches of
+IMPORT_BATCH_SIZE, one transaction per batch. Rows that fail are reported
+with their manifest line number and do not stop the rest of the import.
+A dry run validates the rows and checks that every image is present, small
+enough and a JPEG/PNG/WebP by its magic bytes, without writing anything
+(images are only fully decoded by a real import).
+"""
+import asyncio
+import csv
+import hashlib
+import io
+import json
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .catalog_version import bump_catalog_version
+from .models import Keyboard
+from .schemas import ImportRowError, KeyboardCreate, KeyboardImportResponse
+from .utils.file_upload import (
+    ALLOWED_EXTENSIONS, MAX_FILE_SIZE, UPLOAD_CHUNK_SIZE, UPLOAD_DIR,
+    delete_upload_file, hold_uploads, image_extension_of, name_temp_file, place_upload
+)
+
+# Rows inserted per transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 200))
+
+# Images extracted / stored at the same time
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", 4))
+
+# Request body limit of the import endpoint (manifest + image archive)
+IMPORT_MAX_REQUEST_SIZE = int(os.getenv("IMPORT_MAX_REQUEST_SIZE", 200 * 1024 * 1024))
+
+MANIFEST_EXTENSIONS = {".csv", ".jsonl", ".ndjson"}
+
+
+@dataclass
+class ManifestRow:
+    line: int
+    fields: dict
+    keyboard: Optional[KeyboardCreate] = None
+    image: Optional[str] = None  # member name in the archive
+    filename: Optional[str] = None  # stored (content-addressed) name
+    error: Optional[str] = None
+
+
+def parse_manifest(content: bytes, manifest_name: str) -> List[ManifestRow]:
+    """
+    Split a CSV or JSONL manifest into rows (format chosen by file extension).
+
+    Empty CSV cells are left out, so the field's default applies.
+
+    Raises:
+        HTTPException: If the manifest type is not supported or it is not UTF-8
+    """
+    manifest_ext = os.path.splitext(manifest_name or "")[1].lower()
+    if manifest_ext not in MANIFEST_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Manifest type not allowed. Allowed types: {', '.join(sorted(MANIFEST_EXTENSIONS))}"
+        )
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Manifest must be UTF-8 encoded")
+
+    rows = []
+    if manifest_ext == ".csv":
+        reader = csv.DictReader(io.StringIO(text))
+        for record in reader:
+            fields = {
+                key.strip(): value.strip()
+                for key, value in record.items()
+                if key is not None and value is not None and value.strip()
+            }
+            if fields:
+                rows.append(ManifestRow(line=reader.line_num, fields=fields))
+        return rows
+
+    for line, raw in enumerate(text.splitlines(), start=1):
+        if not raw.strip():
+            continue
+        try:
+            fields = json.loads(raw)
+        except ValueError as e:
+            rows.append(ManifestRow(line=line, fields={}, error=f"Invalid JSON: {e}"))
+            continue
+        if not isinstance(fields, dict):
+            rows.append(ManifestRow(line=line, fields={}, error="Invalid JSON: expected an object"))
+            continue
+        rows.append(ManifestRow(line=line, fields=fields))
+    return rows
+
+
+def validate_row(row: ManifestRow) -> None:
+    """Check a row against KeyboardCreate and record the image it needs."""
+    if row.error is not None:
+        return
+    fields = dict(row.fields)
+    image = fields.pop("image", None)
+    try:
+        row.keyboard = KeyboardCreate.model_validate(fields)
+    except ValidationError as e:
+        row.error = "; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+        )
+        return
+    if not isinstance(image, str) or not image:
+        row.error = "image: Field required"
+        return
+    if os.path.splitext(image)[1].lower() not in ALLOWED_EXTENSIONS:
+        row.error = f"image: File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+        return
+    row.image = image
+
+
+def _archive_member(archive: zipfile.ZipFile, member: str) -> zipfile.ZipInfo:
+    try:
+        info = archive.getinfo(member)
+    except KeyError:
+        raise ValueError(f"Image not found in archive: {member}")
+    if info.file_size > MAX_FILE_SIZE:
+        raise ValueError(f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024)}MB")
+    return info
+
+
+def check_image(archive: zipfile.ZipFile, member: str) -> None:
+    """Dry-run check of an archive member: present, small enough, an image."""
+    info = _archive_member(archive, member)
+    with archive.open(info) as src:
+        if image_extension_of(src.read(12)) is None:
+            raise ValueError("Invalid image file")
+
+
+def extract_image(archive: zipfile.ZipFile, member: str) -> Tuple[str, str]:
+    """
+    Copy an archive member into a temporary file in UPLOAD_DIR, chunk by chunk.
+
+    The size limit is enforced on the decompressed bytes (the header can lie).
+
+    Returns:
+        (temporary file path, sha256 hex digest)
+    """
+    info = _archive_member(archive, member)
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with archive.open(info) as src, os.fdopen(fd, "wb") as out:
+            while chunk := src.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise ValueError(f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024)}MB")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def _error_message(error: BaseException) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    if isinstance(error, zipfile.BadZipFile):
+        return f"Corrupt archive member: {error}"
+    return str(error)
+
+
+async def _gather_limited(func, items: List[str]) -> Dict[str, object]:
+    """Run `func(item)` for every item, IMPORT_CONCURRENCY at a time; results or exceptions by item."""
+    semaphore = asyncio.Semaphore(max(IMPORT_CONCURRENCY, 1))
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    results = await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException) and not isinstance(result, Exception):
+            raise result
+    return dict(zip(items, results))
+
+
+def _open_archive(archive_file: BinaryIO) -> zipfile.ZipFile:
+    try:
+        return zipfile.ZipFile(archive_file)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Images must be a zip archive")
+
+
+async def import_keyboards(
+    db: AsyncSession,
+    manifest: bytes,
+    manifest_name: str,
+    archive_file: BinaryIO,
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> KeyboardImportResponse:
+    """
+    Import keyboards from a manifest and an image archive.
+
+    Args:
+        db: Writer session (rows are committed batch by batch, each commit
+            followed by a catalog generation bump)
+        manifest: Manifest file content
+        manifest_name: Manifest file name (its extension selects CSV or JSONL)
+        archive_file: Seekable zip archive with the images
+        dry_run: Only validate rows and images
+        batch_size: Rows per transaction
+
+    Raises:
+        HTTPException: If the manifest or the archive cannot be read at all
+    """
+    rows = parse_manifest(manifest, manifest_name)
+    for row in rows:
+        validate_row(row)
+
+    archive = _open_archive(archive_file)
+    with archive:
+        members = sorted({row.image for row in rows if row.error is None})
+        if dry_run:
+            results = await _gather_limited(
+                lambda member: run_in_threadpool(check_image, archive, member), members
+            )
+        else:
+            async def stage(member: str) -> Tuple[str, str]:
+                tmp_path, digest = await run_in_threadpool(extract_image, archive, member)
+                return tmp_path, await run_in_threadpool(name_temp_file, tmp_path, digest)
+
+            results = await _gather_limited(stage, members)
+
+    staged = {member: result for member, result in results.items() if not isinstance(result, Exception)}
+    for row in rows:
+        if row.error is None and isinstance(results[row.image], Exception):
+            row.error = f"image: {_error_message(results[row.image])}"
+
+    if dry_run:
+        return _report(rows, dry_run, imported=sum(row.error is None for row in rows), images=len(staged))
+
+    filenames = sorted({filename for _, filename in staged.values()})
+    used = set()  # images of committed rows
+    try:
+        async with hold_uploads(filenames):
+            # Identical images in the archive share one stored file
+            placements: Dict[str, str] = {}
+            for tmp_path, filename in staged.values():
+                if filename in placements:
+                    os.remove(tmp_path)
+                else:
+                    placements[filename] = tmp_path
+
+            stored = await _gather_limited(
+                lambda filename: place_upload(placements[filename], filename), filenames
+            )
+            for row in rows:
+                if row.error is not None:
+                    continue
+                row.filename = staged[row.image][1]
+                if isinstance(stored[row.filename], Exception):
+                    row.error = f"image: {_error_message(stored[row.filename])}"
+
+            valid_rows = [row for row in rows if row.error is None]
+            for start in range(0, len(valid_rows), batch_size):
+                batch = valid_rows[start:start + batch_size]
+                db.add_all([
+                    Keyboard(
+                        name=row.keyboard.name,
+                        price=row.keyboard.price,
+                        link=row.keyboard.link,
+                        image_path=row.filename,
+                        key_count_range=row.keyboard.key_count_range.value,
+                        keyboard_type=row.keyboard.keyboard_type.value,
+                        is_wireless=row.keyboard.is_wireless,
+                        has_cursor_control=row.keyboard.has_cursor_control
+                    )
+                    for row in batch
+                ])
+                try:
+                    await db.commit()
+                except SQLAlchemyError as e:
+                    await db.rollback()
+                    for row in batch:
+                        row.error = f"Database error: {e.__class__.__name__}"
+                else:
+                    # Per batch: a later failure must not hide rows that are already committed
+                    bump_catalog_version()
+                    used.update(row.filename for row in batch)
+    finally:
+        # Release images that no imported row ended up using
+        for filename in filenames:
+            if filename not in used:
+                await delete_upload_file(db, filename)
+
+    imported = sum(row.error is None for row in rows)
+    return _report(rows, dry_run, imported=imported, images=len(used))
+
+
+def _row_name(row: ManifestRow) -> Optional[str]:
+    name = row.fields.get("name")
+    return name if isinstance(name, str) else None
+
+
+def _report(rows: List[ManifestRow], dry_run: bool, imported: int, images: int) -> KeyboardImportResponse:
+    errors = [
+        ImportRowError(row=row.line, name=_row_name(row), error=row.error)
+        for row in rows if row.error is not None
+    ]
+    return KeyboardImportResponse(
+        dry_run=dry_run,
+        total_rows=len(rows),
+        imported=imported,
+        failed=len(errors),
+        images=images,
+        errors=errors
+    )
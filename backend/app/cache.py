@@ -0,0 +1,163 @@
+"""
+Bounded LRU cache of serialized API responses.
+
+Entries are keyed by the catalog generation plus the normalized request
+parameters, so admin writes invalidate every cached body at once. Each entry
+carries a strong ETag derived from the body for If-None-Match handling, and
+the body's compressed encodings once a client has asked for them
+(app/compression.py).
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+
+from .catalog_version import get_catalog_version
+from .compression import COMPRESSION_MIN_SIZE, compress, negotiate
+
+# Maximum number of cached responses
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    # Content-Encoding -> compressed body, filled on first request for each
+    encoded: Dict[str, bytes] = field(default_factory=dict, compare=False)
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """ETag of an encoded variant (a strong ETag differs per Content-Encoding)."""
+    return etag[:-1] + "-" + encoding + '"'
+
+
+def _opaque_tag(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header value against an ETag.
+
+    Weak comparison (RFC 9110 13.1.2): W/"x" matches "x", so a client whose
+    proxy weakened the tag (e.g. after compressing the body) still gets a 304.
+    """
+    if not if_none_match:
+        return False
+    candidates = {_opaque_tag(tag.strip()) for tag in if_none_match.split(",")}
+    return "*" in candidates or _opaque_tag(etag) in candidates
+
+
+class ResponseCache:
+    """Thread-safe LRU cache with hit/miss/eviction counters (also used for serialized rows)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: Hashable, entry: Any) -> Any:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def discard(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+
+
+async def cached_json_response(
+    request: Request,
+    key: Hashable,
+    render: Callable[[], Awaitable[bytes]],
+    conditional: bool = True
+) -> Response:
+    """
+    Serve a JSON body from the response cache, rendering it on a miss.
+
+    Bodies of COMPRESSION_MIN_SIZE bytes or more are negotiated against
+    Accept-Encoding; the compressed bytes are stored in the cache entry, so
+    each encoding is produced once per entry.
+
+    Args:
+        request: The incoming request (for If-None-Match and Accept-Encoding)
+        key: Normalized request parameters
+        render: Produces the JSON body; only called on a cache miss
+        conditional: Answer matching If-None-Match with 304 (GET endpoints only)
+
+    Returns:
+        A 200 response with the cached body, or an empty 304
+    """
+    # Capture the generation before rendering so a concurrent admin write can
+    # never get its old data stored under the new generation.
+    cache_key = (get_catalog_version(), key)
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        body = await render()
+        entry = response_cache.set(cache_key, CachedResponse(body=body, etag=make_etag(body)))
+
+    encoding = None
+    headers = {"Cache-Control": "no-cache"}
+    if len(entry.body) >= COMPRESSION_MIN_SIZE:
+        headers["Vary"] = "Accept-Encoding"
+        encoding = negotiate(request.headers.get("accept-encoding"))
+
+    etag = entry.etag if encoding is None else encoded_etag(entry.etag, encoding)
+    headers["ETag"] = etag
+    if conditional and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    body = entry.body
+    if encoding is not None:
+        body = entry.encoded.get(encoding)
+        if body is None:
+            # Concurrent first requests may both compress; the results are identical
+            body = await run_in_threadpool(compress, entry.body, encoding)
+            entry.encoded[encoding] = body
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,290 @@
+"""
+In-memory columnar index of the keyboard catalog.
+
+The catalog changes only when an admin edits it, so the public listing can be
+answered from an in-process snapshot instead of running COUNT + SELECT against
+SQLite on every page view. The snapshot keeps one array-backed column per
+filterable attribute, encodes every filter as a bitset (a Python int with one
+bit per row) and keeps a presorted row permutation for each SortOption, so a
+page is a bitset AND followed by a slice of the matching permutation.
+
+Enable with CATALOG_INDEX=1. Each snapshot remembers the catalog generation
+it was built from. An admin write only bumps the generation; the next
+listing request starts a rebuild in the background (one at a time, loaded
+and built on a worker thread) and is answered with SQL, as is every listing until
+the new snapshot is swapped in. Readers therefore never wait for a rebuild
+and never see a catalog older than the last write, and admin writes never
+wait for a full catalog read.
+
+The snapshot encodes its rows itself (serializers.encode_keyboard) instead
+of going through the per-row JSON cache, which is sized for the rows of
+recent SQL pages and would be flushed by a full catalog.
+"""
+import asyncio
+import logging
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from .catalog_version import get_catalog_version
+from .database import engine
+from .filters import KeyboardFilters, sort_key_of
+from .models import Keyboard
+from .schemas import SortOption
+from .serializers import SerializedKeyboard, encode_keyboard
+from .utils.text import ascii_lower
+
+CATALOG_INDEX_ENABLED = os.getenv("CATALOG_INDEX", "0").lower() in ("1", "true", "yes")
+
+logger = logging.getLogger(__name__)
+
+def _bits_from_positions(positions, size: int) -> int:
+    """Build a bitset from an iterable of row positions."""
+    buf = bytearray((size + 7) // 8)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+class CatalogIndex:
+    """Immutable columnar snapshot of the keyboards table."""
+
+    def __init__(self, keyboards: List[Any], version: int = 0):
+        size = len(keyboards)
+        self.version = version
+        self.size = size
+        self.all_bits = (1 << size) - 1
+
+        self.ids = array("q", (kb.id for kb in keyboards))
+        self.pos_of_id = {kb.id: pos for pos, kb in enumerate(keyboards)}
+        self.names = [ascii_lower(kb.name) for kb in keyboards]
+        self.rows: List[SerializedKeyboard] = [encode_keyboard(kb) for kb in keyboards]
+
+        # Categorical columns: value code -> bitset of rows
+        self.key_range_bits: Dict[str, int] = {}
+        self.type_bits: Dict[str, int] = {}
+        for attr, target in (("key_count_range", self.key_range_bits), ("keyboard_type", self.type_bits)):
+            groups: Dict[str, List[int]] = {}
+            for pos, kb in enumerate(keyboards):
+                value = getattr(kb, attr)
+                value = getattr(value, "value", value)
+                groups.setdefault(value, []).append(pos)
+            for value, positions in groups.items():
+                target[value] = _bits_from_positions(positions, size)
+
+        # Boolean tags (NULL matches neither True nor False, like SQL)
+        self.wireless_bits = {
+            flag: _bits_from_positions((p for p, kb in enumerate(keyboards) if kb.is_wireless is flag), size)
+            for flag in (True, False)
+        }
+        self.cursor_bits = {
+            flag: _bits_from_positions((p for p, kb in enumerate(keyboards) if kb.has_cursor_control is flag), size)
+            for flag in (True, False)
+        }
+
+        # Price column: NULL bitset plus non-NULL rows sorted by price for range lookups
+        self.null_price_bits = _bits_from_positions((p for p, kb in enumerate(keyboards) if kb.price is None), size)
+        priced = sorted((kb.price, pos) for pos, kb in enumerate(keyboards) if kb.price is not None)
+        self.sorted_prices = array("q", (price for price, _ in priced))
+        self.price_positions = array("l", (pos for _, pos in priced))
+
+        # Presorted permutations, one per sort option (ties broken by id)
+        positions = range(size)
+        name_asc = sorted(positions, key=lambda p: (self.names[p], self.ids[p]))
+        self.orders: Dict[SortOption, array] = {
+            SortOption.name_asc: array("l", name_asc),
+            SortOption.name_desc: array("l", reversed(name_asc)),
+            SortOption.price_asc: array("l", sorted(
+                positions,
+                key=lambda p: (keyboards[p].price is None, keyboards[p].price or 0, self.ids[p])
+            )),
+            SortOption.price_desc: array("l", sorted(
+                positions,
+                key=lambda p: (keyboards[p].price is None, -(keyboards[p].price or 0), -self.ids[p])
+            )),
+        }
+
+        # Inverse permutations: row position -> rank in each order (for cursors)
+        self.ranks: Dict[SortOption, array] = {}
+        for sort_by, order in self.orders.items():
+            ranks = array("l", bytes(order.itemsize * size))
+            for rank, pos in enumerate(order):
+                ranks[pos] = rank
+            self.ranks[sort_by] = ranks
+
+    def _price_range_bits(self, min_price: Optional[int], max_price: Optional[int]) -> int:
+        lo = 0 if min_price is None else bisect_left(self.sorted_prices, min_price)
+        hi = len(self.sorted_prices) if max_price is None else bisect_right(self.sorted_prices, max_price)
+        if lo >= hi:
+            return 0
+        return _bits_from_positions(self.price_positions[lo:hi], self.size)
+
+    def supports(self, filters: KeyboardFilters, sort_by: SortOption) -> bool:
+        """Whether the filters and sort can be answered without SQL."""
+        # Relevance ranking, fuzzy matching and LIKE wildcards need SQL
+        if sort_by not in self.orders:
+            return False
+        if filters.search and (filters.fuzzy or "%" in filters.search or "_" in filters.search):
+            return False
+        return True
+
+    def match(self, filters: KeyboardFilters) -> int:
+        """Return the bitset of rows matching the filters (same semantics as apply_filters)."""
+        bits = self.all_bits
+
+        # Price filter
+        if filters.only_null_price:
+            bits &= self.null_price_bits
+        elif filters.min_price is not None or filters.max_price is not None:
+            price_bits = self._price_range_bits(filters.min_price, filters.max_price)
+            if filters.include_null_price:
+                price_bits |= self.null_price_bits
+            bits &= price_bits
+        elif not filters.include_null_price:
+            bits &= ~self.null_price_bits
+
+        # Key ranges filter
+        if filters.key_ranges:
+            range_bits = 0
+            for value in filters.key_ranges:
+                range_bits |= self.key_range_bits.get(value, 0)
+            bits &= range_bits
+
+        # Keyboard type filter
+        if filters.keyboard_type is not None:
+            bits &= self.type_bits.get(filters.keyboard_type.value, 0)
+
+        # Tag filters
+        if filters.is_wireless is not None:
+            bits &= self.wireless_bits[filters.is_wireless]
+        if filters.has_cursor_control is not None:
+            bits &= self.cursor_bits[filters.has_cursor_control]
+
+        # Search filter (case-insensitive substring, like SQLite LIKE)
+        if filters.search and bits:
+            needle = ascii_lower(filters.search)
+            bits &= _bits_from_positions(
+                (p for p, name in enumerate(self.names) if needle in name), self.size
+            )
+
+        return bits
+
+    def _collect(self, bits: int, sort_by: SortOption, start: int, offset: int, limit: int) -> List[SerializedKeyboard]:
+        """Walk an order from rank `start`, skip `offset` matches and take up to `limit`."""
+        mask = bits.to_bytes((self.size + 7) // 8, "little")
+        order = self.orders[sort_by]
+        results = []
+        skipped = 0
+        for rank in range(start, self.size):
+            pos = order[rank]
+            if not mask[pos >> 3] >> (pos & 7) & 1:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            results.append(self.rows[pos])
+            if len(results) >= limit:
+                break
+        return results
+
+    def page(
+        self,
+        filters: KeyboardFilters,
+        sort_by: SortOption,
+        offset: int,
+        limit: int
+    ) -> Tuple[int, List[SerializedKeyboard]]:
+        """Return (total, rows) for one page of the filtered, sorted catalog."""
+        bits = self.match(filters)
+        total = bits.bit_count()
+        if total == 0 or offset >= total:
+            return total, []
+        return total, self._collect(bits, sort_by, 0, offset, limit)
+
+    def page_after(
+        self,
+        filters: KeyboardFilters,
+        sort_by: SortOption,
+        after: Optional[Tuple[Any, int]],
+        limit: int
+    ) -> Optional[Tuple[int, List[SerializedKeyboard]]]:
+        """
+        Return (total, rows) for the rows following a cursor position.
+
+        Returns None when the cursor row is no longer in the snapshot with the
+        same sort key, so the caller can fall back to a SQL keyset query.
+        """
+        start = 0
+        if after is not None:
+            key, last_id = after
+            pos = self.pos_of_id.get(last_id)
+            if pos is None:
+                return None
+            row = self.rows[pos]
+            if sort_key_of(sort_by, row.name, row.price) != key:
+                return None
+            start = self.ranks[sort_by][pos] + 1
+
+        bits = self.match(filters)
+        return bits.bit_count(), self._collect(bits, sort_by, start, 0, limit)
+
+
+_index: Optional[CatalogIndex] = None
+_rebuild: Optional[asyncio.Task] = None
+
+
+def _load_catalog_index(version: int) -> CatalogIndex:
+    with engine.connect() as conn:
+        # Plain rows, not ORM objects: far cheaper to load, and the columns are all the index reads
+        keyboards = conn.execute(select(*Keyboard.__table__.columns)).all()
+    return CatalogIndex(keyboards, version)
+
+
+async def build_catalog_index() -> CatalogIndex:
+    """Build a fresh snapshot from the database."""
+    # Read the generation first: a write racing with the build then leaves the
+    # snapshot marked stale instead of hiding the change.
+    version = get_catalog_version()
+    # Loading the rows and building the columns are CPU-bound; keep both off the event loop
+    return await run_in_threadpool(_load_catalog_index, version)
+
+
+async def _rebuild_catalog_index() -> None:
+    global _index
+    try:
+        _index = await build_catalog_index()
+    except Exception:
+        # The listings stay on SQL; the next one tries again
+        logger.exception("Catalog index rebuild failed")
+
+
+def get_catalog_index() -> Optional[CatalogIndex]:
+    """
+    Return the current snapshot, or None when disabled or stale.
+
+    A missing or stale snapshot starts a background rebuild (unless one is
+    running); the caller answers from SQL meanwhile.
+    """
+    global _rebuild
+    if not CATALOG_INDEX_ENABLED:
+        return None
+    index = _index
+    if index is not None and index.version == get_catalog_version():
+        return index
+    if _rebuild is None or _rebuild.done():
+        _rebuild = asyncio.get_running_loop().create_task(_rebuild_catalog_index())
+    return None
+
+
+async def stop_catalog_index_rebuild() -> None:
+    """Cancel a rebuild in progress (called on application shutdown)."""
+    if _rebuild is not None and not _rebuild.done():
+        _rebuild.cancel()
+        try:
+            await _rebuild
+        except asyncio.CancelledError:
+            pass
@@ -0,0 +1,100 @@
+"""
+Catalog generation number.
+
+Every admin write to the keyboards table bumps the generation. In-process
+caches key their entries by generation, so a bump invalidates them without
+having to enumerate what changed.
+
+With several worker processes (serve.py) each worker has its own caches,
+so the generation has to be shared: CATALOG_VERSION_FILE names a small file
+that every worker maps into memory. Reading the generation is then a plain
+memory read on every request (no query, no broker), and a bump made by any
+worker, or by a maintenance script with the same .env, is seen by all of
+them on their next request. Bumps take an flock() on the file (POSIX only).
+Without CATALOG_VERSION_FILE the counters are per process (run.py, scripts).
+
+The file holds a few counters (slots); the catalog uses slot 0, admin
+accounts (auth.forget_admin_tokens) slot 1.
+"""
+import mmap
+import os
+import threading
+from typing import Optional
+
+# Shared generation counters for multi-worker servers (empty = per process)
+CATALOG_VERSION_FILE = os.getenv("CATALOG_VERSION_FILE", "")
+
+CATALOG_SLOT = 0
+ADMINS_SLOT = 1
+_SLOTS = 8
+
+
+class _SharedFile:
+    """CATALOG_VERSION_FILE mapped as an array of unsigned 64-bit counters."""
+
+    def __init__(self, path: str):
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = _SLOTS * 8
+        # Growing to the same size twice is harmless if two processes race here
+        if os.fstat(self.fd).st_size < size:
+            os.ftruncate(self.fd, size)
+        self.counters = memoryview(mmap.mmap(self.fd, size)).cast("Q")
+
+
+_shared: Optional[_SharedFile] = None
+_shared_lock = threading.Lock()
+
+
+def _shared_file() -> Optional[_SharedFile]:
+    """The mapped file, opened on first use (importing the app creates no files)."""
+    global _shared
+    if _shared is None and CATALOG_VERSION_FILE:
+        with _shared_lock:
+            if _shared is None:
+                _shared = _SharedFile(CATALOG_VERSION_FILE)
+    return _shared
+
+
+class GenerationCounter:
+    """A generation number, shared through CATALOG_VERSION_FILE when configured."""
+
+    def __init__(self, slot: int):
+        self.slot = slot
+        self._local = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> int:
+        shared = _shared_file()
+        if shared is None:
+            return self._local
+        # Aligned 8-byte read: never torn
+        return shared.counters[self.slot]
+
+    def bump(self) -> int:
+        shared = _shared_file()
+        with self._lock:
+            if shared is None:
+                self._local += 1
+                return self._local
+            import fcntl
+
+            fcntl.flock(shared.fd, fcntl.LOCK_EX)
+            try:
+                value = shared.counters[self.slot] + 1
+                shared.counters[self.slot] = value
+            finally:
+                fcntl.flock(shared.fd, fcntl.LOCK_UN)
+            return value
+
+
+_catalog = GenerationCounter(CATALOG_SLOT)
+
+
+def get_catalog_version() -> int:
+    """Return the current catalog generation."""
+    return _catalog.get()
+
+
+def bump_catalog_version() -> int:
+    """Advance the catalog generation after a committed catalog write."""
+    return _catalog.bump()
@@ -0,0 +1,57 @@
+"""
+Server-side differences for the keyboard comparison endpoint.
+
+For N keyboards the response carries, besides the records themselves,
+which attributes differ overall, which tags all of them share, and one
+entry per pair (in id order) with the attributes that differ between the
+two, their price delta and their shared tags.
+"""
+import os
+from itertools import combinations
+from typing import List, Optional, Sequence
+
+from .models import Keyboard
+from .schemas import KeyboardCompareDiff, KeyboardPairDiff
+
+# Most keyboards one compare request may ask for
+MAX_COMPARE_KEYBOARDS = int(os.getenv("MAX_COMPARE_KEYBOARDS", 4))
+
+# Attributes checked for differences, in response order
+COMPARED_ATTRIBUTES = ("price", "key_count_range", "keyboard_type", "is_wireless", "has_cursor_control")
+
+# Boolean attributes reported as tags (KeyboardTags)
+TAG_ATTRIBUTES = ("is_wireless", "has_cursor_control")
+
+
+def _differing(keyboards: Sequence[Keyboard]) -> List[str]:
+    return [
+        attribute for attribute in COMPARED_ATTRIBUTES
+        if len({getattr(kb, attribute) for kb in keyboards}) > 1
+    ]
+
+
+def _shared_tags(keyboards: Sequence[Keyboard]) -> List[str]:
+    return [tag for tag in TAG_ATTRIBUTES if all(getattr(kb, tag) for kb in keyboards)]
+
+
+def _price_delta(a: Keyboard, b: Keyboard) -> Optional[int]:
+    if a.price is None or b.price is None:
+        return None
+    return b.price - a.price
+
+
+def diff_keyboards(keyboards: Sequence[Keyboard]) -> KeyboardCompareDiff:
+    """Differences between keyboards (given in id order)."""
+    return KeyboardCompareDiff(
+        differing_attributes=_differing(keyboards),
+        shared_tags=_shared_tags(keyboards),
+        pairs=[
+            KeyboardPairDiff(
+                keyboard_ids=[a.id, b.id],
+                differing_attributes=_differing((a, b)),
+                price_delta=_price_delta(a, b),
+                shared_tags=_shared_tags((a, b))
+            )
+            for a, b in combinations(keyboards, 2)
+        ]
+    )
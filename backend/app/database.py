@@ -1,28 +1,105 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 
 # Database URL
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./database.db")
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
 
-# Create engine
+# SQLite engine profile (applied to every new connection)
+# WAL lets readers keep reading while an admin write is in progress.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # safe with WAL
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 64 * 1024))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+
+# Read-only connections for GET traffic; writes go through one connection
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", 8))
+
+
+def to_async_url(url: str) -> str:
+    """Map a sync database URL to its async driver (sqlite -> aiosqlite)."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    if url.startswith("postgresql:"):
+        return "postgresql+asyncpg:" + url[len("postgresql:"):]
+    return url
+
+
+def _apply_sqlite_profile(engine, read_only: bool = False) -> None:
+    """Register the connection pragmas of the SQLite profile on an engine."""
+    if not IS_SQLITE:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        if not read_only:
+            # journal_mode is persistent; only writers need to set it
+            cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA temp_store = {SQLITE_TEMP_STORE}")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# Create engine (sync: schema setup and CLI scripts)
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in SQLALCHEMY_DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
+_apply_sqlite_profile(engine)
+
+# Async engines for the request path. SQLite allows one writer at a time, so
+# admin mutations share a single connection and queue in the pool instead of
+# contending for the database lock; readers get their own read-only pool.
+# (aiosqlite defaults to NullPool, i.e. a new connection and thread per session.)
+if IS_SQLITE:
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0
+    )
+    async_read_engine = create_async_engine(
+        ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool, pool_size=DB_READ_POOL_SIZE, max_overflow=0
+    )
+    _apply_sqlite_profile(async_engine.sync_engine)
+    _apply_sqlite_profile(async_read_engine.sync_engine, read_only=True)
+else:
+    async_engine = async_read_engine = create_async_engine(ASYNC_DATABASE_URL)
 
 # SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async sessions keep loaded attributes after commit so responses can be
+# built without implicit (blocking) refreshes
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+# Dependency to get DB session (writer; use for endpoints that mutate)
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency to get a read-only DB session
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,117 @@
+"""
+Streaming export of the keyboard catalog as NDJSON or CSV.
+
+Rows are read in batches of EXPORT_BATCH_SIZE, each in its own short read
+session, and written out batch by batch, so memory use does not depend on
+the size of the catalog. The next batch continues after the last row sent
+(keyset on the sort key and id, as in cursor pagination), so no pooled
+connection or WAL snapshot is held while the response waits on a slow
+client. A row changed during the export may appear with its old or new
+values; exports sorted by relevance come in name order.
+
+NDJSON lines have the KeyboardResponse shape. CSV columns match the bulk
+import manifest (with `image` set to the stored file name), so an export
+can be imported again together with a zip of the uploads.
+"""
+import csv
+import io
+import os
+from typing import AsyncIterator, Optional
+
+import orjson
+from sqlalchemy import select
+
+from .database import AsyncReadSessionLocal
+from .filters import KeyboardFilters, apply_filters, apply_keyset, apply_sort, sort_key_of
+from .models import Keyboard
+from .schemas import ExportFormat, SortOption
+from .serializers import keyboard_to_dict
+
+# Rows fetched per read session (and written to the response) at a time
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 500))
+
+CSV_COLUMNS = (
+    "id", "name", "price", "link", "key_count_range", "keyboard_type",
+    "is_wireless", "has_cursor_control", "image", "created_at", "updated_at",
+)
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_batch(keyboards) -> bytes:
+    # Not through serialize_keyboard: a full export would flush the row cache
+    return b"".join(orjson.dumps(keyboard_to_dict(kb)) + b"\n" for kb in keyboards)
+
+
+def _csv_row(keyboard: Keyboard) -> tuple:
+    return (
+        keyboard.id,
+        keyboard.name,
+        "" if keyboard.price is None else keyboard.price,
+        keyboard.link,
+        keyboard.key_count_range,
+        getattr(keyboard.keyboard_type, "value", keyboard.keyboard_type),
+        "true" if keyboard.is_wireless else "false",
+        "true" if keyboard.has_cursor_control else "false",
+        keyboard.image_path,
+        keyboard.created_at.isoformat() if keyboard.created_at else "",
+        keyboard.updated_at.isoformat() if keyboard.updated_at else "",
+    )
+
+
+def _csv_batch(keyboards, header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    writer.writerows(_csv_row(kb) for kb in keyboards)
+    return buffer.getvalue().encode()
+
+
+async def export_keyboards(
+    filters: KeyboardFilters,
+    sort_by: Optional[SortOption],
+    export_format: ExportFormat
+) -> AsyncIterator[bytes]:
+    """
+    Yield the export body in chunks of EXPORT_BATCH_SIZE rows.
+
+    Opens its own read sessions: the body is produced after the endpoint
+    (and its dependencies) returned.
+    """
+    if sort_by == SortOption.relevance:
+        # Rank order cannot be resumed with a keyset
+        sort_by = SortOption.name_asc
+    base = apply_filters(select(Keyboard), filters)
+
+    if export_format == ExportFormat.csv:
+        # BOM so spreadsheet apps read Korean names as UTF-8
+        yield b"\xef\xbb\xbf" + _csv_batch([], header=True)
+
+    last = None
+    while True:
+        if sort_by is None:
+            query = base.order_by(Keyboard.id)
+            if last is not None:
+                query = query.filter(Keyboard.id > last.id)
+        else:
+            query = apply_sort(base, sort_by, filters)
+            if last is not None:
+                query = apply_keyset(query, sort_by, sort_key_of(sort_by, last.name, last.price), last.id)
+
+        # The connection goes back to the pool before the batch is sent
+        async with AsyncReadSessionLocal() as db:
+            batch = (await db.execute(query.limit(EXPORT_BATCH_SIZE))).scalars().all()
+        if not batch:
+            return
+
+        if export_format == ExportFormat.csv:
+            yield _csv_batch(batch)
+        else:
+            yield _ndjson_batch(batch)
+        if len(batch) < EXPORT_BATCH_SIZE:
+            return
+        last = batch[-1]
@@ -0,0 +1,128 @@
+"""
+Facet counts for the keyboard filter sidebar.
+
+One GROUP BY query returns how many keyboards share each combination of the
+faceted columns (restricted only by the name search). The counts per option
+are then summed up in Python. Each facet is counted with every filter except
+its own, so selecting "Wireless" still shows how many wired keyboards there
+would be, and the price histogram ignores the price range.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .filters import KeyboardFilters, apply_filters
+from .models import Keyboard
+from .schemas import KeyboardFacetsResponse, KeyboardType, KeyRange, PriceBucket
+
+
+class FacetRow(NamedTuple):
+    keyboard_type: Optional[str]
+    key_count_range: Optional[str]
+    is_wireless: Optional[bool]
+    has_cursor_control: Optional[bool]
+    price: Optional[int]
+    count: int
+
+
+def _predicates(filters: KeyboardFilters) -> Dict[str, Callable[[FacetRow], bool]]:
+    """One predicate per faceted filter, with the same semantics as apply_filters."""
+    predicates = {}
+
+    # Price filter
+    if filters.only_null_price:
+        predicates["price"] = lambda row: row.price is None
+    elif filters.min_price is not None or filters.max_price is not None:
+        min_price, max_price = filters.min_price, filters.max_price
+
+        def price_matches(row: FacetRow) -> bool:
+            if row.price is None:
+                return filters.include_null_price
+            return (min_price is None or row.price >= min_price) and (max_price is None or row.price <= max_price)
+
+        predicates["price"] = price_matches
+    elif not filters.include_null_price:
+        predicates["price"] = lambda row: row.price is not None
+
+    if filters.key_ranges:
+        key_ranges = set(filters.key_ranges)
+        predicates["key_count_range"] = lambda row: row.key_count_range in key_ranges
+    if filters.keyboard_type is not None:
+        keyboard_type = filters.keyboard_type.value
+        predicates["keyboard_type"] = lambda row: row.keyboard_type == keyboard_type
+    if filters.is_wireless is not None:
+        predicates["is_wireless"] = lambda row: row.is_wireless is filters.is_wireless
+    if filters.has_cursor_control is not None:
+        predicates["has_cursor_control"] = lambda row: row.has_cursor_control is filters.has_cursor_control
+
+    return predicates
+
+
+def compute_facets(rows: List[FacetRow], filters: KeyboardFilters, bucket_width: int) -> KeyboardFacetsResponse:
+    """Sum grouped rows into facet counts (each facet excluding its own filter)."""
+    predicates = _predicates(filters)
+
+    total = 0
+    keyboard_types = {t.value: 0 for t in KeyboardType}
+    key_ranges = {r.value: 0 for r in KeyRange}
+    wireless = {"true": 0, "false": 0}
+    cursor = {"true": 0, "false": 0}
+    buckets: Dict[int, int] = {}
+    null_price = 0
+
+    for row in rows:
+        failed = [name for name, matches in predicates.items() if not matches(row)]
+        if len(failed) > 1:
+            # Fails two filters: excluding one of them still leaves it out everywhere
+            continue
+        failed_filter = failed[0] if failed else None
+
+        if failed_filter is None:
+            total += row.count
+        if failed_filter in (None, "keyboard_type") and row.keyboard_type is not None:
+            keyboard_types[row.keyboard_type] = keyboard_types.get(row.keyboard_type, 0) + row.count
+        if failed_filter in (None, "key_count_range") and row.key_count_range is not None:
+            key_ranges[row.key_count_range] = key_ranges.get(row.key_count_range, 0) + row.count
+        if failed_filter in (None, "is_wireless") and row.is_wireless is not None:
+            wireless["true" if row.is_wireless else "false"] += row.count
+        if failed_filter in (None, "has_cursor_control") and row.has_cursor_control is not None:
+            cursor["true" if row.has_cursor_control else "false"] += row.count
+        if failed_filter in (None, "price"):
+            if row.price is None:
+                null_price += row.count
+            else:
+                start = row.price // bucket_width * bucket_width
+                buckets[start] = buckets.get(start, 0) + row.count
+
+    return KeyboardFacetsResponse(
+        total=total,
+        keyboard_type=keyboard_types,
+        key_count_range=key_ranges,
+        is_wireless=wireless,
+        has_cursor_control=cursor,
+        price_histogram=[
+            PriceBucket(min_price=start, max_price=start + bucket_width, count=count)
+            for start, count in sorted(buckets.items())
+        ],
+        null_price=null_price
+    )
+
+
+async def get_facets(db: AsyncSession, filters: KeyboardFilters, bucket_width: int) -> KeyboardFacetsResponse:
+    """Count keyboards per filter option in a single query."""
+    columns = (
+        Keyboard.keyboard_type, Keyboard.key_count_range, Keyboard.is_wireless,
+        Keyboard.has_cursor_control, Keyboard.price
+    )
+    # Only the search narrows the scan; every other filter is a facet
+    query = apply_filters(
+        select(*columns, func.count()),
+        KeyboardFilters(search=filters.search, fuzzy=filters.fuzzy)
+    ).group_by(*columns)
+
+    rows = [
+        FacetRow(getattr(keyboard_type, "value", keyboard_type), *rest)
+        for keyboard_type, *rest in (await db.execute(query)).all()
+    ]
+    return compute_facets(rows, filters, bucket_width)
@@ -0,0 +1,213 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException, Query
+from sqlalchemy import or_, and_
+
+from .models import Keyboard
+from .schemas import KeyboardType, SortOption
+from .search import keyboards_fts, uses_fts, fts_query
+from .utils.text import ascii_lower
+
+
+@dataclass(frozen=True)
+class KeyboardFilters:
+    """Parsed filter parameters shared by the keyboard listing endpoints."""
+    min_price: Optional[int] = None
+    max_price: Optional[int] = None
+    include_null_price: bool = True
+    only_null_price: bool = False
+    key_ranges: Optional[Tuple[str, ...]] = None
+    keyboard_type: Optional[KeyboardType] = None
+    is_wireless: Optional[bool] = None
+    has_cursor_control: Optional[bool] = None
+    search: Optional[str] = None
+    fuzzy: bool = False
+
+
+def keyboard_filters(
+    min_price: Optional[int] = Query(None, description="Minimum price"),
+    max_price: Optional[int] = Query(None, description="Maximum price"),
+    include_null_price: bool = Query(True, description="Include keyboards with no price"),
+    only_null_price: bool = Query(False, description="Only show keyboards with no price (DIY only)"),
+    key_ranges: Optional[str] = Query(None, description="Comma-separated key ranges (e.g., 'tkl,compact')"),
+    keyboard_type: Optional[KeyboardType] = Query(None, description="Filter by keyboard type"),
+    is_wireless: Optional[bool] = Query(None, description="Filter by wireless"),
+    has_cursor_control: Optional[bool] = Query(None, description="Filter by cursor control"),
+    search: Optional[str] = Query(None, description="Search by name"),
+    fuzzy: bool = Query(False, description="Typo-tolerant search (matches shared trigrams)"),
+) -> KeyboardFilters:
+    """FastAPI dependency that collects the keyboard filter query parameters."""
+    ranges = None
+    if key_ranges:
+        ranges = tuple(sorted({r.strip() for r in key_ranges.split(",")}))
+
+    return KeyboardFilters(
+        min_price=min_price,
+        max_price=max_price,
+        include_null_price=include_null_price,
+        only_null_price=only_null_price,
+        key_ranges=ranges,
+        keyboard_type=keyboard_type,
+        is_wireless=is_wireless,
+        has_cursor_control=has_cursor_control,
+        search=search or None,
+        fuzzy=fuzzy,
+    )
+
+
+def apply_filters(query, filters: KeyboardFilters):
+    """Apply keyboard filters to a SQLAlchemy query."""
+    # Price filter
+    if filters.only_null_price:
+        # Only show keyboards with no price (DIY only)
+        query = query.filter(Keyboard.price.is_(None))
+    elif filters.min_price is not None or filters.max_price is not None:
+        price_conditions = []
+
+        # Add price range condition
+        if filters.min_price is not None and filters.max_price is not None:
+            price_conditions.append(and_(Keyboard.price >= filters.min_price, Keyboard.price <= filters.max_price))
+        elif filters.min_price is not None:
+            price_conditions.append(Keyboard.price >= filters.min_price)
+        elif filters.max_price is not None:
+            price_conditions.append(Keyboard.price <= filters.max_price)
+
+        # Include NULL prices if requested
+        if filters.include_null_price:
+            price_conditions.append(Keyboard.price.is_(None))
+
+        query = query.filter(or_(*price_conditions))
+    elif not filters.include_null_price:
+        # Only show keyboards with price (exclude NULL)
+        query = query.filter(Keyboard.price.isnot(None))
+
+    # Key ranges filter
+    if filters.key_ranges:
+        query = query.filter(Keyboard.key_count_range.in_(filters.key_ranges))
+
+    # Keyboard type filter
+    if filters.keyboard_type is not None:
+        query = query.filter(Keyboard.keyboard_type == filters.keyboard_type)
+
+    # Tag filters (무선, 커서조작만 남김)
+    if filters.is_wireless is not None:
+        query = query.filter(Keyboard.is_wireless == filters.is_wireless)
+    if filters.has_cursor_control is not None:
+        query = query.filter(Keyboard.has_cursor_control == filters.has_cursor_control)
+
+    # Search filter: FTS5 trigram index, or LIKE for short/wildcard terms.
+    # LIKE already ignores ASCII case, so matching the stored lower-cased key
+    # is equivalent and lets COUNT scan a covering index.
+    if filters.search:
+        if uses_fts(filters.search):
+            query = query.join(keyboards_fts, keyboards_fts.c.rowid == Keyboard.id).filter(
+                keyboards_fts.c.name_key.match(fts_query(filters.search, filters.fuzzy))
+            )
+        else:
+            query = query.filter(Keyboard.name_key.contains(filters.search))
+
+    return query
+
+
+def apply_sort(query, sort_by: SortOption, filters: Optional[KeyboardFilters] = None):
+    """
+    Apply a sort option to a SQLAlchemy query.
+
+    Name sorting is case-insensitive (via the stored name_key) and prices
+    sort with NULLs last. Relevance needs a full-text search in `filters`
+    and otherwise falls back to name order.
+    Ties are broken by id so that the order is fully deterministic.
+    """
+    if sort_by == SortOption.relevance:
+        if filters is not None and uses_fts(filters.search):
+            return query.order_by(keyboards_fts.c.rank, Keyboard.id.asc())
+        sort_by = SortOption.name_asc
+
+    if sort_by == SortOption.name_asc:
+        return query.order_by(Keyboard.name_key.asc(), Keyboard.id.asc())
+    elif sort_by == SortOption.name_desc:
+        return query.order_by(Keyboard.name_key.desc(), Keyboard.id.desc())
+    elif sort_by == SortOption.price_asc:
+        # "price IS NULL" first spells NULLS LAST in a form the price indexes can serve
+        return query.order_by(Keyboard.price.is_(None), Keyboard.price.asc(), Keyboard.id.asc())
+    elif sort_by == SortOption.price_desc:
+        return query.order_by(Keyboard.price.is_(None), Keyboard.price.desc(), Keyboard.id.desc())
+    return query
+
+
+def sort_key_of(sort_by: SortOption, name: str, price: Optional[int]) -> Any:
+    """Return the primary sort key of a row for the given sort option."""
+    if sort_by in (SortOption.name_asc, SortOption.name_desc):
+        return ascii_lower(name)
+    return price
+
+
+def encode_cursor(sort_by: SortOption, key: Any, last_id: int) -> str:
+    """Encode the position after a row as an opaque cursor string."""
+    raw = json.dumps([sort_by.value, key, last_id], separators=(",", ":"), ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, sort_by: SortOption) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (sort key, id) of the last row of the previous page
+
+    Raises:
+        HTTPException: If the cursor is malformed or was issued for another sort option
+    """
+    invalid = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, key, last_id = json.loads(raw)
+    except (ValueError, TypeError, binascii.Error):
+        raise invalid
+
+    if sort_value != sort_by.value:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort option")
+    if type(last_id) is not int:
+        raise invalid
+    if sort_by in (SortOption.name_asc, SortOption.name_desc):
+        if not isinstance(key, str):
+            raise invalid
+    elif key is not None and type(key) is not int:
+        raise invalid
+
+    return key, last_id
+
+
+def apply_keyset(query, sort_by: SortOption, key: Any, last_id: int):
+    """
+    Restrict a query to the rows that come after (key, last_id) in apply_sort order.
+
+    NULL prices sort last in both price orders, so a cursor inside the NULL
+    block only pages by id, and a cursor before it keeps the whole block.
+    """
+    if sort_by == SortOption.name_asc:
+        name_key = Keyboard.name_key
+        return query.filter(or_(name_key > key, and_(name_key == key, Keyboard.id > last_id)))
+    elif sort_by == SortOption.name_desc:
+        name_key = Keyboard.name_key
+        return query.filter(or_(name_key < key, and_(name_key == key, Keyboard.id < last_id)))
+    elif sort_by == SortOption.price_asc:
+        if key is None:
+            return query.filter(Keyboard.price.is_(None), Keyboard.id > last_id)
+        return query.filter(or_(
+            Keyboard.price > key,
+            and_(Keyboard.price == key, Keyboard.id > last_id),
+            Keyboard.price.is_(None)
+        ))
+    elif sort_by == SortOption.price_desc:
+        if key is None:
+            return query.filter(Keyboard.price.is_(None), Keyboard.id < last_id)
+        return query.filter(or_(
+            Keyboard.price < key,
+            and_(Keyboard.price == key, Keyboard.id < last_id),
+            Keyboard.price.is_(None)
+        ))
+    return query
@@ -1,22 +1,28 @@
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 import os
 
-from .database import engine, Base
+from .database import engine, async_engine, async_read_engine
+from .bulk_import import IMPORT_MAX_REQUEST_SIZE
 from .routers import keyboards, admin
-from .utils.file_upload import UPLOAD_DIR
-
-# Create database tables
-Base.metadata.create_all(bind=engine)
+from .middleware import MaxBodySizeMiddleware
+from .metrics import METRICS_ENABLED, CONTENT_TYPE, MetricsMiddleware, instrument_engine, render_metrics
+from . import slow_queries
+from .startup import lifespan
+from .static_files import UploadFiles
+from .utils.file_upload import UPLOAD_DIR, MAX_REQUEST_SIZE
 
 # Initialize FastAPI app
+# Schema check, uploads directory and worker shutdown run in the lifespan
+# (app/startup.py), not at import time
 app = FastAPI(
     title="Split Keyboard API",
     description="API for split keyboard comparison website",
-    version="3.1.0"
+    version="3.1.0",
+    lifespan=lifespan
 )
 
+
 # CORS configuration
 # In production, replace with your actual frontend domain
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "http://localhost:5173,http://localhost:3000").split(",")
@@ -29,13 +35,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files directory for uploads
-# UPLOAD_DIR is configured via environment variable (default: "uploads")
-# In production, use absolute path like /var/lib/split-keyboard/uploads
-if not os.path.exists(UPLOAD_DIR):
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+# Refuse oversize uploads before the form parser spools them to disk
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_body_size=MAX_REQUEST_SIZE,
+    path_limits={"/api/admin/keyboards/import": IMPORT_MAX_REQUEST_SIZE}
+)
+
+# Slow-query log with EXPLAIN QUERY PLAN (opt-in, SLOW_QUERY_MS > 0)
+if slow_queries.SLOW_QUERY_MS > 0:
+    slow_queries.instrument_engine(async_engine.sync_engine)
+    if async_read_engine is not async_engine:
+        slow_queries.instrument_engine(async_read_engine.sync_engine)
+    app.add_middleware(slow_queries.SlowQueryMiddleware)
+
+# Per-route latency / size / SQL metrics (outermost, so it times everything)
+if METRICS_ENABLED:
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "write")
+    if async_read_engine is not async_engine:
+        instrument_engine(async_read_engine.sync_engine, "read")
+    app.add_middleware(MetricsMiddleware, routes=app.router.routes)
 
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+# Uploaded images: validators, 304, ranges, optional X-Accel-Redirect
+# (the directory is created by the lifespan)
+app.mount("/uploads", UploadFiles(UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(keyboards.router)
@@ -56,3 +80,10 @@ def root():
 def health_check():
     """Health check endpoint."""
     return {"status": "healthy"}
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        """Prometheus metrics of this process (not proxied by nginx; scrape the app port)."""
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
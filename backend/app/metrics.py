@@ -0,0 +1,237 @@
+"""
+Request and database metrics in the Prometheus text format (GET /metrics).
+
+MetricsMiddleware records, per route template (e.g. /api/keyboards/{keyboard_id},
+never the raw path) and method: a latency histogram, requests in flight,
+a response size histogram and a request counter by status. SQLAlchemy
+engine events count the statements each request runs and the time spent in
+them; requests see only their own queries because the per-request counter
+lives in a context variable (SQLAlchemy's async greenlets inherit it).
+
+Everything is kept in process memory with plain dicts, so recording a
+request costs a few microseconds (benchmarks/metrics_overhead.py). With
+several worker processes each one reports its own numbers.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Expose GET /metrics and record request / query metrics (1 = enabled)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Label for requests that match no route (kept as one series on purpose)
+UNMATCHED_ROUTE = "<unmatched>"
+
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonic counter per label set (also used as a gauge with inc/dec)."""
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), kind: str = "counter"):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.kind = kind
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with _lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    """Cumulative histogram per label set."""
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...], labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with _lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}"
+
+
+http_requests = Counter(
+    "http_requests_total", "Requests by route, method and status code", ("method", "route", "status")
+)
+http_requests_in_flight = Counter(
+    "http_requests_in_flight", "Requests being handled", ("method", "route"), kind="gauge"
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time until the last response byte was sent",
+    LATENCY_BUCKETS, ("method", "route")
+)
+http_response_size = Histogram(
+    "http_response_size_bytes", "Response body size", SIZE_BUCKETS, ("method", "route")
+)
+http_request_db_queries = Histogram(
+    "http_request_db_queries", "SQL statements run per request", QUERY_COUNT_BUCKETS, ("method", "route")
+)
+http_request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL statements per request",
+    LATENCY_BUCKETS, ("method", "route")
+)
+db_queries = Counter("db_queries_total", "SQL statements run, by engine", ("engine",))
+db_query_duration = Counter("db_query_duration_seconds_total", "Time spent in SQL statements, by engine", ("engine",))
+
+METRICS = (
+    http_requests, http_requests_in_flight, http_request_duration, http_response_size,
+    http_request_db_queries, http_request_db_duration, db_queries, db_query_duration,
+)
+
+# [statements, seconds] of the request being handled (None outside requests)
+_request_queries: ContextVar[Optional[List]] = ContextVar("request_queries", default=None)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count statements and their time on `engine` (a sync Engine; pass async_engine.sync_engine)."""
+
+    labels = (name,)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_start
+        db_queries.inc(labels)
+        db_query_duration.inc(labels, elapsed)
+        current = _request_queries.get()
+        if current is not None:
+            current[0] += 1
+            current[1] += elapsed
+
+
+def route_table(routes) -> List[tuple]:
+    """(path regex, methods or None, label) per route, in routing order."""
+    return [
+        (route.path_regex, getattr(route, "methods", None), getattr(route, "path_format", route.path))
+        for route in routes
+    ]
+
+
+def route_label(table: List[tuple], method: str, path: str) -> str:
+    """Path template of the route a request goes to (a mount's path for mounted apps)."""
+    partial = None
+    for path_regex, methods, label in table:
+        if path_regex.match(path):
+            if methods is None or method in methods:
+                return label
+            if partial is None:
+                partial = label  # path matches, method does not (405)
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record latency, size, status and SQL statements of every HTTP request."""
+
+    def __init__(self, app, routes):
+        self.app = app
+        self.routes = routes
+        self._table = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self._table is None:
+            # Built on the first request, after every route was registered
+            self._table = route_table(self.routes)
+        labels = (scope["method"], route_label(self._table, scope["method"], scope["path"]))
+        start = time.perf_counter()
+        queries = [0, 0.0]
+        token = _request_queries.set(queries)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_requests_in_flight.inc(labels)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            http_requests_in_flight.dec(labels)
+            http_requests.inc(labels + (status,))
+            http_request_duration.observe(labels, time.perf_counter() - start)
+            http_response_size.observe(labels, size)
+            http_request_db_queries.observe(labels, queries[0])
+            http_request_db_duration.observe(labels, queries[1])
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+
+class MaxBodySizeMiddleware:
+    """
+    Reject request bodies larger than `max_body_size` while they arrive.
+
+    `path_limits` overrides the limit for specific paths (e.g. the bulk
+    import endpoint, which takes a whole image archive).
+
+    Requests that announce a too large Content-Length are refused before any
+    of the body is read; chunked bodies are cut off as soon as the running
+    total crosses the limit. Either way an oversize upload is never spooled
+    to disk in full by the form parser.
+    """
+
+    def __init__(self, app, max_body_size: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.path_limits = path_limits or {}
+
+    def _too_large(self, max_body_size: int) -> HTTPException:
+        return HTTPException(
+            status_code=413,
+            detail=f"Request body too large. Maximum size: {max_body_size / (1024 * 1024):.1f}MB"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        max_body_size = self.path_limits.get(scope["path"], self.max_body_size)
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > max_body_size:
+                await self._send_too_large(send, max_body_size)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body_size:
+                    # FastAPI re-raises HTTPExceptions from body parsing as-is
+                    raise self._too_large(max_body_size)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _send_too_large(self, send, max_body_size: int) -> None:
+        body = f'{{"detail":"{self._too_large(max_body_size).detail}"}}'.encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,232 @@
+"""
+Schema and data migrations for existing databases (`python migrate.py`).
+
+Applied migrations are recorded in the schema_migrations table. A migration
+has up to three parts, run in this order:
+
+  schema    idempotent DDL (add missing columns)
+  data      a set-based UPDATE ... WHERE over keyboards, run in id ranges of
+            `batch_size` rows; each range commits together with a checkpoint
+            (the last id done), so an interrupted run resumes where it stopped
+  finalize  idempotent DDL that is cheaper after the backfill (indexes)
+
+The WHERE clause of a data step selects only rows that still need the
+change, so re-running a range (or the whole migration) updates nothing twice.
+
+A new database gets the current schema from create_all and has no rows to
+migrate; app startup records the migrations as applied for an empty
+keyboards table. Adding a migration: append it to MIGRATIONS and bump
+SCHEMA_VERSION in app/startup.py.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base
+from .models import Keyboard
+
+# Rows per data migration batch (one transaction and one checkpoint each)
+MIGRATION_BATCH_SIZE = 5000
+
+
+class PendingMigrationsError(RuntimeError):
+    """The database has rows and unapplied migrations (run `python migrate.py`)."""
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("name", String(100), primary_key=True),
+    Column("started_at", DateTime, nullable=False),
+    Column("finished_at", DateTime, nullable=True),
+    # Last keyboards.id covered by the data step (resume point)
+    Column("checkpoint", Integer, nullable=True),
+    Column("rows_updated", Integer, nullable=False, default=0),
+)
+
+
+@dataclass
+class DataStep:
+    """UPDATE keyboards SET <set_clause> WHERE <where>, in id batches."""
+    set_clause: str
+    # Rows that still need the change (keeps re-runs idempotent)
+    where: str
+
+
+@dataclass
+class Migration:
+    name: str
+    description: str
+    schema: Optional[Callable[[Connection], None]] = None
+    data: Optional[DataStep] = None
+    finalize: Optional[Callable[[Connection], None]] = None
+
+
+def _add_missing_columns(conn: Connection, columns: Dict[str, str]) -> None:
+    existing = {row[1] for row in conn.execute(text("PRAGMA table_info(keyboards)"))}
+    for name, ddl in columns.items():
+        if name not in existing:
+            conn.execute(text(f"ALTER TABLE keyboards ADD COLUMN {name} {ddl}"))
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    existing = {row[1] for row in conn.execute(text("PRAGMA index_list(keyboards)"))}
+    for index in sorted(Keyboard.__table__.indexes, key=lambda i: i.name):
+        if index.name not in existing:
+            index.create(bind=conn)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        name="0001_tag_columns",
+        description="has_column_stagger / has_splay tag columns",
+        schema=lambda conn: _add_missing_columns(conn, {
+            "has_column_stagger": "BOOLEAN DEFAULT 0",
+            "has_splay": "BOOLEAN DEFAULT 0",
+        }),
+    ),
+    Migration(
+        name="0002_keyboard_type",
+        description="keyboard_type column, filled from the deprecated layout tags",
+        schema=lambda conn: _add_missing_columns(conn, {
+            "keyboard_type": "VARCHAR(50) DEFAULT 'none' NOT NULL",
+        }),
+        # 우선순위: ortholinear > column_stagger > splay (이미 종류가 정해진 키보드는 그대로)
+        data=DataStep(
+            set_clause=(
+                "keyboard_type = CASE WHEN has_ortholinear THEN 'ortholinear' "
+                "WHEN has_column_stagger THEN 'column_stagger' ELSE 'splay' END"
+            ),
+            where="keyboard_type = 'none' AND (has_ortholinear OR has_column_stagger OR has_splay)",
+        ),
+    ),
+    Migration(
+        name="0003_name_key_indexes",
+        description="stored name_key = lower(name) and the listing indexes",
+        schema=lambda conn: _add_missing_columns(conn, {"name_key": "VARCHAR(255)"}),
+        data=DataStep(
+            set_clause="name_key = lower(name)",
+            where="name_key IS NULL OR name_key != lower(name)",
+        ),
+        finalize=_create_missing_indexes,
+    ),
+]
+
+
+def applied_migrations(conn: Connection) -> Dict[str, dict]:
+    """schema_migrations rows by name (finished or in progress)."""
+    return {row.name: row._asdict() for row in conn.execute(select(schema_migrations))}
+
+
+def pending_migrations(conn: Connection) -> List[Migration]:
+    applied = applied_migrations(conn)
+    return [m for m in MIGRATIONS if applied.get(m.name, {}).get("finished_at") is None]
+
+
+def apply_without_data(conn: Connection, migrations: List[Migration]) -> None:
+    """
+    Apply migrations to an empty keyboards table (startup, inside its transaction).
+
+    There are no rows to migrate, so only the DDL parts run.
+    """
+    now = datetime.utcnow()
+    for migration in migrations:
+        if migration.schema:
+            migration.schema(conn)
+        if migration.finalize:
+            migration.finalize(conn)
+        conn.execute(schema_migrations.delete().where(schema_migrations.c.name == migration.name))
+        conn.execute(schema_migrations.insert().values(
+            name=migration.name, started_at=now, finished_at=now, rows_updated=0
+        ))
+
+
+def _run_data_step(engine: Engine, migration: Migration, checkpoint: int, batch_size: int,
+                   report: Callable[[str], None]) -> int:
+    step = migration.data
+    record = schema_migrations.c.name == migration.name
+    update = text(
+        f"UPDATE keyboards SET {step.set_clause} "
+        f"WHERE id > :after AND id <= :upto AND ({step.where})"
+    )
+
+    with engine.connect() as conn:
+        remaining = conn.execute(text("SELECT count(*) FROM keyboards WHERE id > :after"),
+                                 {"after": checkpoint}).scalar()
+    if checkpoint:
+        report(f"  resuming after id {checkpoint}, {remaining} rows left")
+
+    scanned = updated = 0
+    while True:
+        # Range end: the batch_size-th id after the checkpoint (or the last id).
+        # Read outside the write transaction, so the lock is held only for the UPDATE.
+        with engine.connect() as conn:
+            upto = conn.execute(
+                text("SELECT id FROM keyboards WHERE id > :after ORDER BY id LIMIT 1 OFFSET :skip"),
+                {"after": checkpoint, "skip": batch_size - 1}
+            ).scalar()
+            if upto is None:
+                upto = conn.execute(text("SELECT max(id) FROM keyboards WHERE id > :after"),
+                                    {"after": checkpoint}).scalar()
+        if upto is None:
+            return updated
+
+        with engine.begin() as conn:
+            count = conn.execute(update, {"after": checkpoint, "upto": upto}).rowcount
+            conn.execute(schema_migrations.update().where(record).values(
+                checkpoint=upto, rows_updated=schema_migrations.c.rows_updated + count
+            ))
+        scanned = min(scanned + batch_size, remaining)
+        updated += count
+        report(f"  ids {checkpoint + 1}-{upto}: {count} rows updated ({scanned}/{remaining} scanned)")
+        checkpoint = upto
+
+
+def run_migrations(engine: Engine, batch_size: int = MIGRATION_BATCH_SIZE,
+                   report: Callable[[str], None] = print) -> List[str]:
+    """
+    Apply every pending migration; safe to re-run after an interruption.
+
+    Returns:
+        Names of the migrations that were applied
+    """
+    if not inspect(engine).has_table("keyboards"):
+        # New database: ensure_schema creates the current schema and records
+        # the migrations as applied (there is nothing to migrate)
+        report("No keyboards table yet; nothing to migrate")
+        return []
+
+    schema_migrations.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        applied = applied_migrations(conn)
+
+    done = []
+    for migration in MIGRATIONS:
+        state = applied.get(migration.name)
+        if state is not None and state["finished_at"] is not None:
+            continue
+        report(f"[{migration.name}] {migration.description}")
+        record = schema_migrations.c.name == migration.name
+
+        with engine.begin() as conn:
+            if state is None:
+                conn.execute(schema_migrations.insert().values(
+                    name=migration.name, started_at=datetime.utcnow(), rows_updated=0
+                ))
+            if migration.schema:
+                migration.schema(conn)
+
+        updated = 0
+        if migration.data:
+            checkpoint = (state or {}).get("checkpoint") or 0
+            updated = _run_data_step(engine, migration, checkpoint, batch_size, report)
+
+        with engine.begin() as conn:
+            if migration.finalize:
+                migration.finalize(conn)
+            conn.execute(schema_migrations.update().where(record).values(finished_at=datetime.utcnow()))
+        report(f"[OK] {migration.name}" + (f" ({updated} rows updated)" if migration.data else ""))
+        done.append(migration.name)
+    return done
@@ -1,6 +1,8 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Enum
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Enum, Index
+from sqlalchemy.orm import validates
 from sqlalchemy.sql import func
 from .database import Base
+from .utils.text import ascii_lower
 import enum
 
 
@@ -20,6 +22,8 @@ class Keyboard(Base):
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(255), nullable=False)
+    # lower(name)을 저장해 둔 정렬 키 (이름 정렬/커서 페이지네이션용 인덱스)
+    name_key = Column(String(255), nullable=True)
     price = Column(Integer, nullable=True)
     link = Column(String(500), nullable=False)
     image_path = Column(String(500), nullable=False)
@@ -42,6 +46,27 @@ class Keyboard(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    @validates("name")
+    def _sync_name_key(self, key, value):
+        """Keep name_key equal to SQLite's lower(name) whenever name changes."""
+        self.name_key = ascii_lower(value) if value is not None else None
+        return value
+
+
+# Indexes matching the listing's filter and sort shapes (see check_query_plans.py).
+# Every sort order ends with id so keyset pagination can seek straight to a cursor.
+Index(
+    "ix_keyboards_name_key",
+    Keyboard.name_key, Keyboard.id,
+    # Trailing columns make COUNT with price/tag/search filters an index-only scan
+    Keyboard.price, Keyboard.is_wireless, Keyboard.has_cursor_control
+)
+Index("ix_keyboards_price_asc", Keyboard.price.is_(None), Keyboard.price, Keyboard.id)
+Index("ix_keyboards_price_desc", Keyboard.price.is_(None), Keyboard.price.desc(), Keyboard.id.desc())
+Index("ix_keyboards_price", Keyboard.price)
+Index("ix_keyboards_type_name_key", Keyboard.keyboard_type, Keyboard.name_key, Keyboard.id)
+Index("ix_keyboards_key_range_name_key", Keyboard.key_count_range, Keyboard.name_key, Keyboard.id)
+
 
 class Admin(Base):
     __tablename__ = "admins"
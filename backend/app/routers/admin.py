@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from contextlib import AsyncExitStack
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
-from ..database import get_db
+from ..database import AsyncReadSessionLocal, get_db, get_read_db
 from ..models import Admin, Keyboard
 from ..schemas import (
     AdminLogin,
@@ -11,24 +13,40 @@ from ..schemas import (
     AdminListResponse,
     Token,
     KeyboardResponse,
-    KeyboardTags,
-    KeyboardType
+    KeyboardType,
+    KeyboardImportResponse,
+    CacheStatsResponse,
+    SlowQueryListResponse,
+    SlowQueryOrder,
+    SlowQueryResponse
 )
-from ..auth import create_access_token, get_current_admin
-from ..utils.security import verify_password, get_password_hash
+from ..serializers import serialize_keyboard, forget_keyboard
+from ..auth import create_access_token, get_current_admin, forget_admin_tokens
+from ..utils.security import verify_password_async, get_password_hash_async
+from ..throttle import check_login_allowed, record_login_failure
 from ..utils.file_upload import save_upload_file, delete_upload_file
+from ..bulk_import import import_keyboards
+from ..catalog_version import bump_catalog_version
+from ..cache import response_cache
+from ..slow_queries import SLOW_QUERY_BUFFER_SIZE, SLOW_QUERY_MS, clear_slow_queries, recorded_slow_queries
 
 router = APIRouter(prefix="/api/admin", tags=["admin"])
 
 
 @router.post("/login", response_model=Token)
-def login(credentials: AdminLogin, db: Session = Depends(get_db)):
+async def login(credentials: AdminLogin, request: Request):
     """Admin login endpoint."""
-    # Find admin by username
-    admin = db.query(Admin).filter(Admin.username == credentials.username).first()
+    # Per-IP and per-username throttling (429) before any bcrypt work
+    check_login_allowed(request.client.host if request.client else "", credentials.username)
 
-    # Verify credentials
-    if not admin or not verify_password(credentials.password, admin.password_hash):
+    # Find admin by username (short session: no read connection is held
+    # while the password check waits for the bcrypt executor)
+    async with AsyncReadSessionLocal() as db:
+        admin = await db.scalar(select(Admin).filter(Admin.username == credentials.username))
+
+    # Verify credentials (bcrypt runs on its own bounded executor)
+    if not admin or not await verify_password_async(credentials.password, admin.password_hash):
+        record_login_failure(credentials.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -52,43 +70,50 @@ async def create_keyboard(
     has_cursor_control: bool = Form(False),
     image: UploadFile = File(...),
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new keyboard (admin only)."""
-    # Save uploaded image
-    image_filename = await save_upload_file(image)
-
-    # Create keyboard
-    keyboard = Keyboard(
-        name=name,
-        price=price,
-        link=link,
-        image_path=image_filename,
-        key_count_range=key_count_range,
-        keyboard_type=keyboard_type,
-        is_wireless=is_wireless,
-        has_cursor_control=has_cursor_control
-    )
+    # Save uploaded image and its resized variants (kept until the row is committed)
+    async with save_upload_file(image, db) as image_filename:
+        # Create keyboard
+        keyboard = Keyboard(
+            name=name,
+            price=price,
+            link=link,
+            image_path=image_filename,
+            key_count_range=key_count_range,
+            keyboard_type=keyboard_type,
+            is_wireless=is_wireless,
+            has_cursor_control=has_cursor_control
+        )
 
-    db.add(keyboard)
-    db.commit()
-    db.refresh(keyboard)
-
-    return KeyboardResponse(
-        id=keyboard.id,
-        name=keyboard.name,
-        price=keyboard.price,
-        link=keyboard.link,
-        image_url=f"/uploads/{keyboard.image_path}",
-        key_count_range=keyboard.key_count_range,
-        keyboard_type=keyboard.keyboard_type,
-        tags=KeyboardTags(
-            is_wireless=keyboard.is_wireless,
-            has_cursor_control=keyboard.has_cursor_control
-        ),
-        created_at=keyboard.created_at,
-        updated_at=keyboard.updated_at
-    )
+        db.add(keyboard)
+        await db.commit()
+        # Right after the commit: nothing that follows may leave other workers on the old catalog
+        bump_catalog_version()
+
+    await db.refresh(keyboard)
+
+    return Response(content=serialize_keyboard(keyboard).json, media_type="application/json")
+
+
+@router.post("/keyboards/import", response_model=KeyboardImportResponse)
+async def import_keyboards_bulk(
+    manifest: UploadFile = File(...),
+    images: UploadFile = File(...),
+    dry_run: bool = Form(False),
+    current_admin: Admin = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Bulk import keyboards (admin only).
+
+    `manifest` is a CSV or JSONL file with one keyboard per row and an
+    `image` column naming a file in the `images` zip archive. Valid rows are
+    imported even if others fail; per-row errors are returned.
+    """
+    # Bumps the catalog generation after every committed batch
+    return await import_keyboards(db, await manifest.read(), manifest.filename, images.file, dry_run)
 
 
 @router.put("/keyboards/{keyboard_id}", response_model=KeyboardResponse)
@@ -103,82 +128,85 @@ async def update_keyboard(
     has_cursor_control: bool = Form(False),
     image: Optional[UploadFile] = File(None),
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a keyboard (admin only)."""
-    # Find keyboard
-    keyboard = db.query(Keyboard).filter(Keyboard.id == keyboard_id).first()
-    if not keyboard:
-        raise HTTPException(status_code=404, detail="Keyboard not found")
+    # Find keyboard on a read connection: the single writer connection is not
+    # taken before the new image is stored and its variants are rendered
+    async with AsyncReadSessionLocal() as read_db:
+        if await read_db.get(Keyboard, keyboard_id) is None:
+            raise HTTPException(status_code=404, detail="Keyboard not found")
 
-    # Update image if provided
-    if image:
-        # Delete old image
-        delete_upload_file(keyboard.image_path)
-        # Save new image
-        image_filename = await save_upload_file(image)
-        keyboard.image_path = image_filename
-
-    # Update keyboard fields
-    keyboard.name = name
-    keyboard.price = price
-    keyboard.link = link
-    keyboard.key_count_range = key_count_range
-    keyboard.keyboard_type = keyboard_type
-    keyboard.is_wireless = is_wireless
-    keyboard.has_cursor_control = has_cursor_control
-
-    db.commit()
-    db.refresh(keyboard)
-
-    return KeyboardResponse(
-        id=keyboard.id,
-        name=keyboard.name,
-        price=keyboard.price,
-        link=keyboard.link,
-        image_url=f"/uploads/{keyboard.image_path}",
-        key_count_range=keyboard.key_count_range,
-        keyboard_type=keyboard.keyboard_type,
-        tags=KeyboardTags(
-            is_wireless=keyboard.is_wireless,
-            has_cursor_control=keyboard.has_cursor_control
-        ),
-        created_at=keyboard.created_at,
-        updated_at=keyboard.updated_at
-    )
+    async with AsyncExitStack() as stack:
+        # Save the new image if provided (kept until the row is committed)
+        new_image_path = None
+        if image:
+            new_image_path = await stack.enter_async_context(save_upload_file(image, db))
+
+        # Deleted meanwhile: the new image is released on the way out
+        keyboard = await db.get(Keyboard, keyboard_id)
+        if not keyboard:
+            raise HTTPException(status_code=404, detail="Keyboard not found")
+
+        old_image_path = keyboard.image_path
+        if new_image_path:
+            keyboard.image_path = new_image_path
+
+        # Update keyboard fields
+        keyboard.name = name
+        keyboard.price = price
+        keyboard.link = link
+        keyboard.key_count_range = key_count_range
+        keyboard.keyboard_type = keyboard_type
+        keyboard.is_wireless = is_wireless
+        keyboard.has_cursor_control = has_cursor_control
+
+        await db.commit()
+        bump_catalog_version()
+
+    # Release the old image (removed only if no other keyboard uses it)
+    if keyboard.image_path != old_image_path:
+        await delete_upload_file(db, old_image_path)
+
+    await db.refresh(keyboard)
+
+    return Response(content=serialize_keyboard(keyboard).json, media_type="application/json")
 
 
 @router.delete("/keyboards/{keyboard_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_keyboard(
+async def delete_keyboard(
     keyboard_id: int,
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a keyboard (admin only)."""
     # Find keyboard
-    keyboard = db.query(Keyboard).filter(Keyboard.id == keyboard_id).first()
+    keyboard = await db.get(Keyboard, keyboard_id)
     if not keyboard:
         raise HTTPException(status_code=404, detail="Keyboard not found")
 
-    # Delete image file
-    delete_upload_file(keyboard.image_path)
-
     # Delete from database
-    db.delete(keyboard)
-    db.commit()
+    image_path = keyboard.image_path
+    await db.delete(keyboard)
+    await db.commit()
+    bump_catalog_version()
+    forget_keyboard(keyboard_id)
+
+    # Release the image (removed only if no other keyboard uses it)
+    await delete_upload_file(db, image_path)
 
     return None
 
 
 @router.post("/accounts", response_model=AdminResponse)
-def create_admin_account(
+async def create_admin_account(
     account: AdminCreate,
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new admin account (admin only)."""
     # Check if username already exists
-    existing_admin = db.query(Admin).filter(Admin.username == account.username).first()
+    existing_admin = await db.scalar(select(Admin).filter(Admin.username == account.username))
     if existing_admin:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -188,12 +216,12 @@ def create_admin_account(
     # Create new admin
     new_admin = Admin(
         username=account.username,
-        password_hash=get_password_hash(account.password)
+        password_hash=await get_password_hash_async(account.password)
     )
 
     db.add(new_admin)
-    db.commit()
-    db.refresh(new_admin)
+    await db.commit()
+    await db.refresh(new_admin)
 
     return AdminResponse(
         id=new_admin.id,
@@ -203,12 +231,12 @@ def create_admin_account(
 
 
 @router.get("/accounts", response_model=AdminListResponse)
-def get_admin_accounts(
+async def get_admin_accounts(
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get all admin accounts (admin only)."""
-    admins = db.query(Admin).all()
+    admins = (await db.execute(select(Admin))).scalars().all()
 
     return AdminListResponse(
         accounts=[
@@ -223,10 +251,10 @@ def get_admin_accounts(
 
 
 @router.delete("/accounts/{account_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_admin_account(
+async def delete_admin_account(
     account_id: int,
     current_admin: Admin = Depends(get_current_admin),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an admin account (admin only). Cannot delete own account."""
     # Check if trying to delete own account
@@ -237,12 +265,41 @@ def delete_admin_account(
         )
 
     # Find admin account
-    admin = db.query(Admin).filter(Admin.id == account_id).first()
+    admin = await db.get(Admin, account_id)
     if not admin:
         raise HTTPException(status_code=404, detail="Admin account not found")
 
-    # Delete account
-    db.delete(admin)
-    db.commit()
+    # Delete account (its tokens stop working right away)
+    await db.delete(admin)
+    await db.commit()
+    forget_admin_tokens()
+
+    return None
+
+
+@router.get("/cache/stats", response_model=CacheStatsResponse)
+async def get_cache_stats(current_admin: Admin = Depends(get_current_admin)):
+    """Get response cache counters for sizing (admin only)."""
+    return CacheStatsResponse(**response_cache.stats())
+
+
+@router.get("/slow-queries", response_model=SlowQueryListResponse)
+async def get_slow_queries(
+    order: SlowQueryOrder = Query(SlowQueryOrder.slowest, description="slowest or recent first"),
+    limit: int = Query(50, ge=1, le=1000, description="Maximum number of queries"),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """Get recorded slow SQL statements with their plans (admin only; SLOW_QUERY_MS > 0)."""
+    entries = recorded_slow_queries(slowest_first=order == SlowQueryOrder.slowest, limit=limit)
+    return SlowQueryListResponse(
+        threshold_ms=SLOW_QUERY_MS,
+        capacity=SLOW_QUERY_BUFFER_SIZE,
+        queries=[SlowQueryResponse(**vars(entry)) for entry in entries]
+    )
+
 
+@router.delete("/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_slow_queries(current_admin: Admin = Depends(get_current_admin)):
+    """Clear the recorded slow queries (admin only)."""
+    clear_slow_queries()
     return None
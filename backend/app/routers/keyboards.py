@@ -1,163 +1,273 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_, func
-from typing import Optional, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
+from typing import Any, Optional, Tuple
 import math
 
-from ..database import get_db
+from ..database import AsyncReadSessionLocal
 from ..models import Keyboard
 from ..schemas import (
     KeyboardResponse,
     KeyboardListResponse,
     KeyboardCompareRequest,
     KeyboardCompareResponse,
-    KeyboardTags,
-    KeyboardType,
-    SortOption
+    KeyboardFacetsResponse,
+    ExportFormat,
+    SortOption,
+    PaginationMode,
+    CountMode
 )
+from ..filters import (
+    KeyboardFilters,
+    keyboard_filters,
+    apply_filters,
+    apply_sort,
+    apply_keyset,
+    decode_cursor,
+    encode_cursor,
+    sort_key_of
+)
+from ..serializers import serialize_keyboard, keyboards_json
+from ..catalog_index import get_catalog_index
+from ..facets import get_facets
+from ..compare import MAX_COMPARE_KEYBOARDS, diff_keyboards
+from ..export import MEDIA_TYPES, export_keyboards
+from ..cache import cached_json_response
 
 router = APIRouter(prefix="/api/keyboards", tags=["keyboards"])
 
-
-def keyboard_to_response(keyboard: Keyboard, base_url: str = "") -> KeyboardResponse:
-    """Convert a Keyboard model to KeyboardResponse schema."""
-    return KeyboardResponse(
-        id=keyboard.id,
-        name=keyboard.name,
-        price=keyboard.price,
-        link=keyboard.link,
-        image_url=f"/uploads/{keyboard.image_path}",
-        key_count_range=keyboard.key_count_range,
-        keyboard_type=keyboard.keyboard_type,
-        tags=KeyboardTags(
-            is_wireless=keyboard.is_wireless,
-            has_cursor_control=keyboard.has_cursor_control
-        ),
-        created_at=keyboard.created_at,
-        updated_at=keyboard.updated_at
-    )
+# Upper bound for count=estimated in cursor mode
+ESTIMATED_COUNT_CAP = 1000
 
 
 @router.get("", response_model=KeyboardListResponse)
-def get_keyboards(
-    min_price: Optional[int] = Query(None, description="Minimum price"),
-    max_price: Optional[int] = Query(None, description="Maximum price"),
-    include_null_price: bool = Query(True, description="Include keyboards with no price"),
-    only_null_price: bool = Query(False, description="Only show keyboards with no price (DIY only)"),
-    key_ranges: Optional[str] = Query(None, description="Comma-separated key ranges (e.g., 'tkl,compact')"),
-    keyboard_type: Optional[KeyboardType] = Query(None, description="Filter by keyboard type"),
-    is_wireless: Optional[bool] = Query(None, description="Filter by wireless"),
-    has_cursor_control: Optional[bool] = Query(None, description="Filter by cursor control"),
-    search: Optional[str] = Query(None, description="Search by name"),
+async def get_keyboards(
+    request: Request,
+    filters: KeyboardFilters = Depends(keyboard_filters),
     sort_by: SortOption = Query(SortOption.name_asc, description="Sort option"),
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Items per page"),
-    db: Session = Depends(get_db)
+    pagination: PaginationMode = Query(PaginationMode.page, description="Offset (page) or keyset (cursor) pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (cursor mode)"),
+    count: CountMode = Query(CountMode.exact, description="How to compute total (cursor mode)")
 ):
     """Get keyboards list with filtering, sorting, and pagination."""
-    # Build query
-    query = db.query(Keyboard)
-
-    # Price filter
-    if only_null_price:
-        # Only show keyboards with no price (DIY only)
-        query = query.filter(Keyboard.price.is_(None))
-    elif min_price is not None or max_price is not None:
-        price_conditions = []
-
-        # Add price range condition
-        if min_price is not None and max_price is not None:
-            price_conditions.append(and_(Keyboard.price >= min_price, Keyboard.price <= max_price))
-        elif min_price is not None:
-            price_conditions.append(Keyboard.price >= min_price)
-        elif max_price is not None:
-            price_conditions.append(Keyboard.price <= max_price)
-
-        # Include NULL prices if requested
-        if include_null_price:
-            price_conditions.append(Keyboard.price.is_(None))
-
-        query = query.filter(or_(*price_conditions))
-    elif not include_null_price:
-        # Only show keyboards with price (exclude NULL)
-        query = query.filter(Keyboard.price.isnot(None))
-
-    # Key ranges filter
-    if key_ranges:
-        ranges = [r.strip() for r in key_ranges.split(",")]
-        query = query.filter(Keyboard.key_count_range.in_(ranges))
-
-    # Keyboard type filter
-    if keyboard_type is not None:
-        query = query.filter(Keyboard.keyboard_type == keyboard_type)
-
-    # Tag filters (무선, 커서조작만 남김)
-    if is_wireless is not None:
-        query = query.filter(Keyboard.is_wireless == is_wireless)
-    if has_cursor_control is not None:
-        query = query.filter(Keyboard.has_cursor_control == has_cursor_control)
-
-    # Search filter
-    if search:
-        query = query.filter(Keyboard.name.contains(search))
-
-    # Get total count before pagination
-    total = query.count()
-
-    # Sorting (case-insensitive for name sorting)
-    if sort_by == SortOption.name_asc:
-        query = query.order_by(func.lower(Keyboard.name).asc())
-    elif sort_by == SortOption.name_desc:
-        query = query.order_by(func.lower(Keyboard.name).desc())
-    elif sort_by == SortOption.price_asc:
-        # NULL prices last
-        query = query.order_by(Keyboard.price.asc().nullslast())
-    elif sort_by == SortOption.price_desc:
-        # NULL prices last
-        query = query.order_by(Keyboard.price.desc().nullslast())
-
-    # Pagination
+    if pagination == PaginationMode.cursor:
+        if sort_by == SortOption.relevance:
+            raise HTTPException(status_code=400, detail="Cursor pagination does not support relevance sort")
+        after = decode_cursor(cursor, sort_by) if cursor else None
+
+        async def render() -> bytes:
+            async with AsyncReadSessionLocal() as db:
+                return await _list_keyboards_after(db, filters, sort_by, after, limit, count)
+
+        return await cached_json_response(request, ("cursor", filters, sort_by, after, limit, count), render)
+
+    async def render() -> bytes:
+        async with AsyncReadSessionLocal() as db:
+            return await _list_keyboards(db, filters, sort_by, page, limit)
+
+    return await cached_json_response(request, ("list", filters, sort_by, page, limit), render)
+
+
+async def _list_keyboards(
+    db: AsyncSession,
+    filters: KeyboardFilters,
+    sort_by: SortOption,
+    page: int,
+    limit: int
+) -> bytes:
+    """Offset pagination; returns the KeyboardListResponse JSON."""
     offset = (page - 1) * limit
-    keyboards = query.offset(offset).limit(limit).all()
+
+    # Answer from the in-memory catalog index when enabled
+    index = get_catalog_index()
+    if index is not None and index.supports(filters, sort_by):
+        total, items = index.page(filters, sort_by, offset, limit)
+    else:
+        # Build query
+        query = apply_filters(select(Keyboard), filters)
+
+        # Get total count before pagination
+        total = await _count(db, query)
+
+        # Sorting (case-insensitive for name sorting)
+        query = apply_sort(query, sort_by, filters)
+
+        # Pagination
+        keyboards = (await db.execute(query.offset(offset).limit(limit))).scalars().all()
+        items = [serialize_keyboard(kb) for kb in keyboards]
 
     # Calculate total pages
     total_pages = math.ceil(total / limit) if total > 0 else 0
 
-    return KeyboardListResponse(
-        keyboards=[keyboard_to_response(kb) for kb in keyboards],
+    return keyboards_json(
+        items,
         total=total,
         page=page,
-        total_pages=total_pages
+        total_pages=total_pages,
+        next_cursor=None,
+        total_is_estimate=False
+    )
+
+
+async def _list_keyboards_after(
+    db: AsyncSession,
+    filters: KeyboardFilters,
+    sort_by: SortOption,
+    after: Optional[Tuple[Any, int]],
+    limit: int,
+    count: CountMode
+) -> bytes:
+    """Keyset pagination: fetch the page following `after` without OFFSET; returns the JSON."""
+    items = None
+    total = None
+    total_is_estimate = False
+
+    # One extra row tells us whether another page follows
+    index = get_catalog_index()
+    if index is not None and index.supports(filters, sort_by):
+        result = index.page_after(filters, sort_by, after, limit + 1)
+        if result is not None:
+            total, items = result
+
+    if items is None:
+        query = apply_filters(select(Keyboard), filters)
+
+        if count == CountMode.exact:
+            total = await _count(db, query)
+        elif count == CountMode.estimated:
+            total, total_is_estimate = await _estimate_count(db, query)
+
+        if after is not None:
+            query = apply_keyset(query, sort_by, *after)
+        query = apply_sort(query, sort_by, filters).limit(limit + 1)
+        keyboards = (await db.execute(query)).scalars().all()
+        items = [serialize_keyboard(kb) for kb in keyboards]
+
+    if count == CountMode.none:
+        total = None
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(sort_by, sort_key_of(sort_by, last.name, last.price), last.id)
+
+    return keyboards_json(
+        items,
+        total=total,
+        page=None,
+        total_pages=None,
+        next_cursor=next_cursor,
+        total_is_estimate=total_is_estimate
+    )
+
+
+async def _count(db: AsyncSession, query) -> int:
+    """COUNT(*) of a filtered select."""
+    return await db.scalar(select(func.count()).select_from(query.subquery()))
+
+
+async def _estimate_count(db: AsyncSession, query) -> Tuple[int, bool]:
+    """
+    Count matching rows, but stop at ESTIMATED_COUNT_CAP.
+
+    Returns:
+        (count, is_estimate); when capped the count is a lower bound
+    """
+    capped = query.with_only_columns(Keyboard.id).limit(ESTIMATED_COUNT_CAP + 1).subquery()
+    counted = await db.scalar(select(func.count()).select_from(capped))
+    if counted > ESTIMATED_COUNT_CAP:
+        return ESTIMATED_COUNT_CAP, True
+    return counted, False
+
+
+# Declared before /{keyboard_id} so "facets" and "export" are not parsed as ids
+@router.get("/facets", response_model=KeyboardFacetsResponse)
+async def get_keyboard_facets(
+    request: Request,
+    filters: KeyboardFilters = Depends(keyboard_filters),
+    price_bucket: int = Query(50000, ge=1, description="Price histogram bucket width")
+):
+    """
+    Count keyboards per filter option for the current filters.
+
+    Each facet is counted with every filter except its own, so the counts
+    show what selecting another option would return.
+    """
+    async def render() -> bytes:
+        async with AsyncReadSessionLocal() as db:
+            facets = await get_facets(db, filters, price_bucket)
+            return facets.model_dump_json().encode()
+
+    return await cached_json_response(request, ("facets", filters, price_bucket), render)
+
+
+@router.get("/export")
+async def export_keyboard_catalog(
+    filters: KeyboardFilters = Depends(keyboard_filters),
+    format: ExportFormat = Query(ExportFormat.ndjson, description="ndjson or csv"),
+    sort_by: Optional[SortOption] = Query(None, description="Sort option (default: by id)")
+):
+    """
+    Stream every keyboard matching the filters as NDJSON or CSV.
+
+    Unlike the listing there is no page size limit and no COUNT; rows are
+    streamed from a server-side cursor as they are read.
+    """
+    return StreamingResponse(
+        export_keyboards(filters, sort_by, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="keyboards.{format.value}"'}
     )
 
 
 @router.get("/{keyboard_id}", response_model=KeyboardResponse)
-def get_keyboard(keyboard_id: int, db: Session = Depends(get_db)):
+async def get_keyboard(keyboard_id: int, request: Request):
     """Get a specific keyboard by ID."""
-    keyboard = db.query(Keyboard).filter(Keyboard.id == keyboard_id).first()
+    async def render() -> bytes:
+        async with AsyncReadSessionLocal() as db:
+            keyboard = await db.get(Keyboard, keyboard_id)
 
-    if not keyboard:
-        raise HTTPException(status_code=404, detail="Keyboard not found")
+            if not keyboard:
+                raise HTTPException(status_code=404, detail="Keyboard not found")
 
-    return keyboard_to_response(keyboard)
+            return serialize_keyboard(keyboard).json
 
+    return await cached_json_response(request, ("detail", keyboard_id), render)
 
-@router.post("/compare", response_model=KeyboardCompareResponse)
-def compare_keyboards(
-    request: KeyboardCompareRequest,
-    db: Session = Depends(get_db)
-):
-    """Compare two keyboards."""
-    keyboards = db.query(Keyboard).filter(
-        Keyboard.id.in_(request.keyboard_ids)
-    ).all()
 
-    if len(keyboards) != 2:
+@router.post("/compare", response_model=KeyboardCompareResponse)
+async def compare_keyboards(request: Request, compare: KeyboardCompareRequest):
+    """Compare up to MAX_COMPARE_KEYBOARDS keyboards, with their differences."""
+    keyboard_ids = tuple(sorted(set(compare.keyboard_ids)))
+    if len(keyboard_ids) != len(compare.keyboard_ids):
+        raise HTTPException(status_code=400, detail="Duplicate keyboard ids")
+    if len(keyboard_ids) > MAX_COMPARE_KEYBOARDS:
         raise HTTPException(
-            status_code=404,
-            detail="One or both keyboards not found"
+            status_code=400,
+            detail=f"Compare at most {MAX_COMPARE_KEYBOARDS} keyboards"
         )
 
-    return KeyboardCompareResponse(
-        keyboards=[keyboard_to_response(kb) for kb in keyboards]
-    )
+    async def render() -> bytes:
+        async with AsyncReadSessionLocal() as db:
+            # Primary key lookup, one query for all ids
+            keyboards = (await db.execute(
+                select(Keyboard).filter(Keyboard.id.in_(keyboard_ids)).order_by(Keyboard.id)
+            )).scalars().all()
+
+            if len(keyboards) != len(keyboard_ids):
+                raise HTTPException(
+                    status_code=404,
+                    detail="One or more keyboards not found"
+                )
+
+            return keyboards_json(
+                (serialize_keyboard(kb) for kb in keyboards),
+                diff=diff_keyboards(keyboards).model_dump()
+            )
+
+    # POST is never answered with 304; the cache only saves the rendering
+    return await cached_json_response(request, ("compare", keyboard_ids), render, conditional=False)
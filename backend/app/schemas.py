@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -29,6 +29,28 @@ class SortOption(str, Enum):
     name_desc = "name_desc"
     price_asc = "price_asc"
     price_desc = "price_desc"
+    relevance = "relevance"  # full-text rank of `search`; name order without a search
+
+
+class PaginationMode(str, Enum):
+    page = "page"  # offset pagination with page numbers
+    cursor = "cursor"  # keyset pagination with an opaque next_cursor
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"  # capped count, cheap on large catalogs
+    none = "none"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"  # one KeyboardResponse JSON object per line
+    csv = "csv"  # bulk import manifest columns
+
+
+class SlowQueryOrder(str, Enum):
+    slowest = "slowest"
+    recent = "recent"
 
 
 # Keyboard Schemas
@@ -56,12 +78,19 @@ class KeyboardUpdate(KeyboardBase):
     pass
 
 
+class KeyboardImages(BaseModel):
+    """Resized variants of the keyboard image"""
+    thumbnail_url: str  # smallest WebP variant, for list views
+    srcset: Dict[str, str]  # format ("webp", "jpeg") -> srcset attribute value
+
+
 class KeyboardResponse(BaseModel):
     id: int
     name: str
     price: Optional[int]
     link: str
-    image_url: str
+    image_url: str  # original upload
+    images: KeyboardImages
     key_count_range: str
     keyboard_type: KeyboardType
     tags: KeyboardTags
@@ -74,17 +103,52 @@ class KeyboardResponse(BaseModel):
 
 class KeyboardListResponse(BaseModel):
     keyboards: List[KeyboardResponse]
-    total: int
-    page: int
-    total_pages: int
+    total: Optional[int]
+    page: Optional[int]
+    total_pages: Optional[int]
+    # Cursor mode only
+    next_cursor: Optional[str] = None
+    total_is_estimate: bool = False
+
+
+class PriceBucket(BaseModel):
+    min_price: int  # inclusive
+    max_price: int  # exclusive
+    count: int
+
+
+class KeyboardFacetsResponse(BaseModel):
+    """필터 사이드바용 옵션별 개수 (각 항목은 자기 필터를 제외한 나머지 필터로 집계)"""
+    total: int  # keyboards matching all filters
+    keyboard_type: Dict[str, int]
+    key_count_range: Dict[str, int]
+    is_wireless: Dict[str, int]  # "true" / "false"
+    has_cursor_control: Dict[str, int]  # "true" / "false"
+    price_histogram: List[PriceBucket]  # non-empty buckets only, ascending
+    null_price: int
 
 
 class KeyboardCompareRequest(BaseModel):
-    keyboard_ids: List[int] = Field(..., min_length=2, max_length=2)
+    # At most MAX_COMPARE_KEYBOARDS ids (checked by the endpoint)
+    keyboard_ids: List[int] = Field(..., min_length=2)
+
+
+class KeyboardPairDiff(BaseModel):
+    keyboard_ids: List[int]  # [a, b] in id order
+    differing_attributes: List[str]
+    price_delta: Optional[int] = None  # price of b minus price of a (None if either has no price)
+    shared_tags: List[str]
+
+
+class KeyboardCompareDiff(BaseModel):
+    differing_attributes: List[str]  # attributes that are not the same for all keyboards
+    shared_tags: List[str]  # tags every keyboard has
+    pairs: List[KeyboardPairDiff]
 
 
 class KeyboardCompareResponse(BaseModel):
-    keyboards: List[KeyboardResponse]
+    keyboards: List[KeyboardResponse]  # in id order
+    diff: KeyboardCompareDiff
 
 
 # Admin Schemas
@@ -118,3 +182,45 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    expires_at: Optional[int] = None  # "exp" claim (unix time)
+
+
+class ImportRowError(BaseModel):
+    row: int  # line number in the manifest (CSV header = line 1)
+    name: Optional[str] = None
+    error: str
+
+
+class KeyboardImportResponse(BaseModel):
+    dry_run: bool
+    total_rows: int
+    imported: int  # rows inserted (dry run: rows that would be inserted)
+    failed: int
+    images: int  # distinct images stored (dry run: checked)
+    errors: List[ImportRowError]
+
+
+class CacheStatsResponse(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class SlowQueryResponse(BaseModel):
+    duration_ms: float
+    statement: str
+    parameters: list
+    route: Optional[str] = None  # "GET /api/keyboards"; None outside a request
+    plan: List[str]  # EXPLAIN QUERY PLAN details (SELECTs on SQLite)
+    recorded_at: datetime  # when the slowest run happened
+    count: int  # runs of this statement over the threshold
+    total_ms: float
+    last_recorded_at: datetime
+
+
+class SlowQueryListResponse(BaseModel):
+    threshold_ms: float  # 0 = recorder off
+    capacity: int  # distinct statements kept
+    queries: List[SlowQueryResponse]
@@ -0,0 +1,146 @@
+"""
+Full-text name search backed by an SQLite FTS5 trigram index.
+
+keyboards_fts is an external-content FTS5 table over keyboards.name_key
+(the stored lower-cased name), kept in sync by triggers. The trigram
+tokenizer turns any substring of three or more characters into an indexed
+lookup, which replaces the leading-wildcard LIKE scan and gives bm25
+relevance ranking. Shorter terms and terms with LIKE wildcards keep the
+original LIKE semantics.
+"""
+import logging
+from typing import Optional, Union
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, Float, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+from .utils.text import ascii_lower
+
+logger = logging.getLogger(__name__)
+
+# Separate metadata: create_all must not try to create the virtual table
+keyboards_fts = Table(
+    "keyboards_fts",
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("name_key", String),
+    Column("rank", Float),
+)
+
+# Trigram tokens are 3 characters; shorter terms cannot use the index
+MIN_FTS_TERM_LENGTH = 3
+
+_SEARCH_INDEX_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS keyboards_fts USING fts5(
+        name_key,
+        content='keyboards',
+        content_rowid='id',
+        tokenize='trigram case_sensitive 1'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS keyboards_fts_ai AFTER INSERT ON keyboards BEGIN
+        INSERT INTO keyboards_fts(rowid, name_key) VALUES (new.id, new.name_key);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS keyboards_fts_ad AFTER DELETE ON keyboards BEGIN
+        INSERT INTO keyboards_fts(keyboards_fts, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS keyboards_fts_au AFTER UPDATE OF name_key ON keyboards BEGIN
+        INSERT INTO keyboards_fts(keyboards_fts, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+        INSERT INTO keyboards_fts(rowid, name_key) VALUES (new.id, new.name_key);
+    END
+    """,
+]
+
+_fts_enabled = False
+
+
+def _create_search_index(conn) -> None:
+    exists = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'keyboards_fts'"
+    )).first() is not None
+    for statement in _SEARCH_INDEX_DDL:
+        conn.execute(text(statement))
+    if not exists:
+        # Index the rows that predate the FTS table
+        conn.execute(text("INSERT INTO keyboards_fts(keyboards_fts) VALUES ('rebuild')"))
+
+
+def ensure_search_index(bind: Union[Engine, Connection]) -> bool:
+    """
+    Create the FTS5 table and its sync triggers if they do not exist yet.
+
+    `bind` is an Engine (own transaction) or a Connection whose transaction
+    the caller commits (app startup runs it inside the schema lock).
+
+    Returns:
+        True if full-text search is available, False if this SQLite build
+        lacks FTS5 or the trigram tokenizer (search then falls back to LIKE)
+    """
+    global _fts_enabled
+    if bind.dialect.name != "sqlite":
+        return False
+
+    try:
+        if isinstance(bind, Engine):
+            with bind.begin() as conn:
+                _create_search_index(conn)
+        else:
+            _create_search_index(bind)
+    except OperationalError as e:
+        logger.warning("Full-text search disabled: %s", e)
+        _fts_enabled = False
+        return False
+
+    _fts_enabled = True
+    return True
+
+
+def detect_search_index(conn: Connection) -> bool:
+    """Enable full-text search if the index already exists (no DDL)."""
+    global _fts_enabled
+    _fts_enabled = conn.dialect.name == "sqlite" and conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'keyboards_fts'"
+    )).first() is not None
+    return _fts_enabled
+
+
+def fts_enabled() -> bool:
+    return _fts_enabled
+
+
+def uses_fts(search: Optional[str]) -> bool:
+    """Whether a search term is answered from the FTS index."""
+    return (
+        _fts_enabled
+        and search is not None
+        and len(search) >= MIN_FTS_TERM_LENGTH
+        and "%" not in search
+        and "_" not in search
+    )
+
+
+def _quote(term: str) -> str:
+    """Quote a term as an FTS5 string literal."""
+    return '"' + term.replace('"', '""') + '"'
+
+
+def fts_query(search: str, fuzzy: bool = False) -> str:
+    """
+    Build an FTS5 MATCH expression for a search term.
+
+    Exact mode matches the term as a substring (a trigram phrase). Fuzzy mode
+    matches any of the term's trigrams, so typos still hit; bm25 ranks rows
+    sharing more trigrams first.
+    """
+    term = ascii_lower(search)
+    if not fuzzy:
+        return _quote(term)
+    trigrams = sorted({term[i:i + 3] for i in range(len(term) - 2)})
+    return " OR ".join(_quote(t) for t in trigrams)
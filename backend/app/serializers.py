@@ -0,0 +1,98 @@
+"""
+JSON serialization of keyboard rows.
+
+Every keyboard is turned into its JSON bytes once with orjson and kept in a
+per-row cache keyed by id, so a listing body is just the cached rows joined
+together. An entry is reused while updated_at and the editable columns are
+unchanged (updated_at alone only has one-second resolution). The output has
+the same shape as schemas.KeyboardResponse, which documents it in the
+OpenAPI schema.
+"""
+import os
+from typing import Any, Iterable, NamedTuple, Optional
+
+import orjson
+
+from .cache import ResponseCache
+from .models import Keyboard
+from .utils.image_variants import IMAGE_VARIANT_WIDTHS, variant_filename, variant_srcsets
+
+# Maximum number of serialized rows kept in memory
+ROW_CACHE_SIZE = int(os.getenv("ROW_CACHE_SIZE", 4096))
+
+
+class SerializedKeyboard(NamedTuple):
+    """JSON bytes of one keyboard plus the fields needed for cursors."""
+    id: int
+    name: str
+    price: Optional[int]
+    json: bytes
+
+
+# keyboard id -> (row version, SerializedKeyboard)
+row_cache = ResponseCache(ROW_CACHE_SIZE)
+
+
+def _row_version(keyboard: Keyboard) -> tuple:
+    return (
+        keyboard.updated_at, keyboard.name, keyboard.price, keyboard.link, keyboard.image_path,
+        keyboard.key_count_range, keyboard.keyboard_type, keyboard.is_wireless, keyboard.has_cursor_control,
+    )
+
+
+def keyboard_to_dict(keyboard: Keyboard) -> dict:
+    """Convert a Keyboard model to a KeyboardResponse-shaped dict."""
+    return {
+        "id": keyboard.id,
+        "name": keyboard.name,
+        "price": keyboard.price,
+        "link": keyboard.link,
+        "image_url": f"/uploads/{keyboard.image_path}",
+        "images": {
+            "thumbnail_url": f"/uploads/{variant_filename(keyboard.image_path, IMAGE_VARIANT_WIDTHS[0], 'webp')}",
+            "srcset": variant_srcsets(keyboard.image_path),
+        },
+        "key_count_range": keyboard.key_count_range,
+        "keyboard_type": keyboard.keyboard_type,
+        "tags": {
+            "is_wireless": keyboard.is_wireless,
+            "has_cursor_control": keyboard.has_cursor_control,
+        },
+        "created_at": keyboard.created_at,
+        "updated_at": keyboard.updated_at,
+    }
+
+
+def encode_keyboard(keyboard: Keyboard) -> SerializedKeyboard:
+    """Encode a keyboard (or a keyboards row) without going through the row cache."""
+    return SerializedKeyboard(
+        id=keyboard.id,
+        name=keyboard.name,
+        price=keyboard.price,
+        json=orjson.dumps(keyboard_to_dict(keyboard))
+    )
+
+
+def serialize_keyboard(keyboard: Keyboard) -> SerializedKeyboard:
+    """Return the cached JSON of a keyboard, re-encoding it when the row changed."""
+    version = _row_version(keyboard)
+    entry = row_cache.get(keyboard.id)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    row = encode_keyboard(keyboard)
+    row_cache.set(keyboard.id, (version, row))
+    return row
+
+
+def forget_keyboard(keyboard_id: int) -> None:
+    """Drop a keyboard's cached JSON (after it was deleted)."""
+    row_cache.discard(keyboard_id)
+
+
+def keyboards_json(rows: Iterable[SerializedKeyboard], **fields: Any) -> bytes:
+    """Assemble `{"keyboards": [...], **fields}` from serialized rows."""
+    body = b'{"keyboards":[' + b",".join(row.json for row in rows) + b"]"
+    if fields:
+        body += b"," + orjson.dumps(fields)[1:-1]
+    return body + b"}"
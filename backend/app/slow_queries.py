@@ -0,0 +1,193 @@
+"""
+Opt-in slow-query recorder (SLOW_QUERY_MS > 0).
+
+SQLAlchemy cursor events time every statement; one that takes longer than
+SLOW_QUERY_MS is logged with its bound parameters, the route of the request
+that ran it and, for SELECTs on SQLite, its EXPLAIN QUERY PLAN (run on the
+same connection right after the statement). Slow runs are kept in memory
+for GET /api/admin/slow-queries and `python check_db.py --slow-queries`,
+one entry per statement: its slowest run (parameters, route, plan) plus how
+often it was slow. At most SLOW_QUERY_BUFFER_SIZE statements are kept; when
+the buffer is full, the statement whose slowest run is the fastest makes
+room, so a burst of merely slow queries cannot push out the worst ones.
+
+The route comes from the ASGI scope of the current request, which
+SlowQueryMiddleware puts in a context variable; FastAPI stores the matched
+route in that scope, so nothing is resolved until a query is actually slow.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this many milliseconds are recorded (0 = off)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 0))
+# Statements kept for the admin endpoint (least slow dropped first)
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", 100))
+
+# Longest parameter value kept (bound values can be long search strings)
+MAX_PARAMETER_LENGTH = 200
+# Parameter sets kept from an executemany
+MAX_PARAMETER_SETS = 3
+
+
+@dataclass
+class SlowQuery:
+    duration_ms: float
+    statement: str
+    parameters: list
+    route: Optional[str]
+    plan: List[str]
+    recorded_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    # Runs of this statement over the threshold and their total time
+    count: int = 1
+    total_ms: float = 0.0
+    last_recorded_at: Optional[datetime] = None
+
+    def __post_init__(self):
+        self.total_ms = self.total_ms or self.duration_ms
+        self.last_recorded_at = self.last_recorded_at or self.recorded_at
+
+
+# Normalized statement -> its slowest run
+_slow_queries: Dict[str, SlowQuery] = {}
+_lock = threading.Lock()
+
+# ASGI scope of the request being handled (None outside requests)
+_current_scope: ContextVar[Optional[dict]] = ContextVar("slow_query_scope", default=None)
+
+
+def _short(value):
+    if isinstance(value, (str, bytes)) and len(value) > MAX_PARAMETER_LENGTH:
+        return value[:MAX_PARAMETER_LENGTH] + ("..." if isinstance(value, str) else b"...")
+    return value
+
+
+def _format_parameters(parameters, executemany: bool) -> list:
+    if executemany:
+        sets = list(parameters)
+        kept = [_format_parameters(p, False) for p in sets[:MAX_PARAMETER_SETS]]
+        if len(sets) > MAX_PARAMETER_SETS:
+            kept.append(f"... {len(sets) - MAX_PARAMETER_SETS} more")
+        return kept
+    if isinstance(parameters, dict):
+        return [f"{name}={_short(value)!r}" for name, value in parameters.items()]
+    return [repr(_short(value)) for value in parameters or ()]
+
+
+def _explain(conn, statement: str, parameters, executemany: bool) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines of a SELECT (SQLite only)."""
+    if conn.dialect.name != "sqlite" or executemany:
+        return []
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return []
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    except Exception as e:  # the recorder must never break the query it watches
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _route_of(scope: Optional[dict]) -> Optional[str]:
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return f"{scope['method']} {getattr(route, 'path_format', scope['path'])}"
+
+
+def _record(entry: SlowQuery) -> None:
+    key = " ".join(entry.statement.split())
+    with _lock:
+        kept = _slow_queries.get(key)
+        if kept is not None:
+            if entry.duration_ms > kept.duration_ms:
+                # The slowest run's details replace the kept ones, the totals carry over
+                entry.count = kept.count + 1
+                entry.total_ms = round(kept.total_ms + entry.duration_ms, 3)
+                _slow_queries[key] = entry
+            else:
+                kept.count += 1
+                kept.total_ms = round(kept.total_ms + entry.duration_ms, 3)
+                kept.last_recorded_at = entry.recorded_at
+            return
+        if len(_slow_queries) >= SLOW_QUERY_BUFFER_SIZE:
+            if SLOW_QUERY_BUFFER_SIZE <= 0:
+                return
+            least = min(_slow_queries, key=lambda k: _slow_queries[k].duration_ms)
+            if _slow_queries[least].duration_ms >= entry.duration_ms:
+                return
+            del _slow_queries[least]
+        _slow_queries[key] = entry
+
+
+def instrument_engine(engine: Engine, threshold_ms: float = SLOW_QUERY_MS) -> None:
+    """Record statements on `engine` slower than `threshold_ms` (pass async_engine.sync_engine)."""
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._slow_query_start
+        if elapsed < threshold:
+            return
+        entry = SlowQuery(
+            duration_ms=round(elapsed * 1000, 3),
+            statement=statement,
+            parameters=_format_parameters(parameters, executemany),
+            route=_route_of(_current_scope.get()),
+            plan=_explain(conn, statement, parameters, executemany),
+        )
+        _record(entry)
+        logger.warning(
+            "Slow query (%.1f ms, %s): %s | parameters: %s | plan: %s",
+            entry.duration_ms, entry.route or "no request", " ".join(statement.split()),
+            ", ".join(map(str, entry.parameters)), "; ".join(entry.plan) or "-"
+        )
+
+
+class SlowQueryMiddleware:
+    """Make the current request's scope available to the slow-query recorder."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _current_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_scope.reset(token)
+
+
+def recorded_slow_queries(slowest_first: bool = True, limit: Optional[int] = None) -> List[SlowQuery]:
+    """Recorded slow statements, slowest run or most recent run first."""
+    with _lock:
+        entries = list(_slow_queries.values())
+    if slowest_first:
+        entries.sort(key=lambda entry: entry.duration_ms, reverse=True)
+    else:
+        entries.sort(key=lambda entry: entry.last_recorded_at, reverse=True)
+    return entries[:limit] if limit else entries
+
+
+def clear_slow_queries() -> None:
+    with _lock:
+        _slow_queries.clear()
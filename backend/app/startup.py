@@ -0,0 +1,108 @@
+"""
+Application startup and shutdown (the FastAPI lifespan).
+
+Importing the app has no side effects: no DDL, no filesystem writes, no
+.env loading (run.py loads .env; with plain uvicorn use --env-file). The
+schema check runs once per worker at startup and is gated by SQLite's
+PRAGMA user_version, so a worker that finds the current SCHEMA_VERSION
+only reads one pragma. When the schema is behind, the first worker takes
+the write lock (BEGIN IMMEDIATE) and creates the missing tables and the
+search index; workers starting at the same time wait on the lock
+(busy_timeout), see the new version and skip the DDL instead of racing.
+
+`python check_startup.py` measures worker boot against a budget.
+"""
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .catalog_index import stop_catalog_index_rebuild
+from .database import Base, engine
+from .migrations import PendingMigrationsError, apply_without_data, pending_migrations
+from .search import detect_search_index, ensure_search_index
+from .utils.file_upload import UPLOAD_DIR
+from .utils.image_variants import shutdown_image_workers
+from .utils.security import shutdown_hash_workers
+
+logger = logging.getLogger(__name__)
+
+# Bump when create_all / the search index DDL would change an existing
+# database, and with every migration added to app/migrations.py
+SCHEMA_VERSION = 2
+
+
+def _user_version(conn) -> int:
+    return conn.execute(text("PRAGMA user_version")).scalar()
+
+
+def ensure_schema(engine: Engine = engine) -> bool:
+    """
+    Create missing tables and the search index unless the database is current.
+
+    Migrations for an empty keyboards table (a new database) are recorded as
+    applied here. With rows to migrate, the pending migrations are left to
+    `python migrate.py` (a data migration can take minutes on a large
+    catalog) and startup fails: the queries need the migrated columns, so a
+    worker that came up would answer every listing with a 500.
+
+    Returns:
+        True if DDL ran, False if the schema was already at SCHEMA_VERSION
+
+    Raises:
+        PendingMigrationsError: If migrations are pending on a non-empty database
+    """
+    if engine.dialect.name != "sqlite":
+        # No user_version outside SQLite; create_all only issues missing tables
+        Base.metadata.create_all(bind=engine)
+        ensure_search_index(engine)
+        return True
+
+    with engine.connect() as conn:
+        if _user_version(conn) >= SCHEMA_VERSION:
+            detect_search_index(conn)
+            return False
+
+    with engine.connect() as conn:
+        # Write lock first, then re-check: another worker may have just finished
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        current = _user_version(conn)
+        if current >= SCHEMA_VERSION:
+            conn.commit()
+            detect_search_index(conn)
+            return False
+        Base.metadata.create_all(bind=conn)
+        pending = pending_migrations(conn)
+        if pending and conn.execute(text("SELECT 1 FROM keyboards LIMIT 1")).first() is None:
+            apply_without_data(conn, pending)
+            pending = []
+        if pending:
+            conn.rollback()
+            raise PendingMigrationsError(
+                "Database has pending migrations (%s); run `python migrate.py`"
+                % ", ".join(migration.name for migration in pending)
+            )
+        ensure_search_index(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+
+    logger.info("Database schema updated from version %d to %d", current, SCHEMA_VERSION)
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Blocking is fine here: no request is served before startup completes
+    # (and the first threadpool call alone costs more than the pragma read)
+    ensure_schema()
+    # UPLOAD_DIR is configured via environment variable (default: "uploads")
+    # In production, use absolute path like /var/lib/split-keyboard/uploads
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    yield
+    await stop_catalog_index_rebuild()
+    # Stop the image resizing worker processes and the bcrypt threads
+    shutdown_image_workers()
+    shutdown_hash_workers()
@@ -0,0 +1,275 @@
+"""
+Serving of UPLOAD_DIR under /uploads (a plain ASGI app, not StaticFiles).
+
+- Strong validators from a single stat(). The ETag of a content-addressed
+  name is its stem (the SHA-256 of the bytes, plus the variant width), so
+  it does not change when the file is copied or restored with a new mtime;
+  legacy names get "<mtime hex>-<size hex>". That is also the format nginx
+  uses, and If-None-Match / If-Range accept it for content-addressed names
+  too, so caches filled by nginx (direct serving, or the X-Accel-Redirect
+  body) stay valid. If-None-Match / If-Modified-Since are answered with 304
+  without opening the file.
+- Single byte ranges (Range, If-Range): 206, or 416 when unsatisfiable.
+  Multi-range requests get the whole file.
+- The body goes out through the ASGI zero-copy extension (sendfile) when the
+  server offers it, otherwise in SERVE_CHUNK_SIZE reads on the threadpool;
+  most images fit in one read.
+- UPLOAD_ACCEL_REDIRECT hands the body off to nginx with X-Accel-Redirect
+  to an internal location (see deployment/nginx.conf). The app still answers
+  404 and 304 and sets the cache headers; nginx sends the bytes and handles
+  ranges.
+
+Content-addressed names never change and are cached for a year; other
+(legacy) names are cached for UPLOAD_CACHE_MAX_AGE seconds and then
+revalidated. Only image extensions are served, so an upload that is still
+being written (a temporary name) is never visible.
+"""
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi.concurrency import run_in_threadpool
+
+from .utils.file_upload import is_content_addressed
+
+# Content-addressed uploads never change under the same name
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Cache lifetime of uploads with other (legacy) names, in seconds
+UPLOAD_CACHE_MAX_AGE = int(os.getenv("UPLOAD_CACHE_MAX_AGE", 86400))
+
+# Internal nginx location that serves UPLOAD_DIR, e.g. /_uploads/ (empty = off)
+UPLOAD_ACCEL_REDIRECT = os.getenv("UPLOAD_ACCEL_REDIRECT", "")
+
+# Bytes read per threadpool call when sendfile is not available
+SERVE_CHUNK_SIZE = 256 * 1024
+
+# Extensions of uploads and their variants
+CONTENT_TYPES = {
+    ".jpg": b"image/jpeg",
+    ".jpeg": b"image/jpeg",
+    ".png": b"image/png",
+    ".webp": b"image/webp",
+}
+
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """ETag in nginx's format, from mtime and size."""
+    return f'"{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+
+def make_etag(name: str, stat_result: os.stat_result) -> str:
+    """ETag of an upload: the content hash for content-addressed names, else mtime-size."""
+    if is_content_addressed(name):
+        return f'"{os.path.splitext(name)[0]}"'
+    return stat_etag(stat_result)
+
+
+def _http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+
+def _parse_http_date(value: bytes) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value.decode("latin-1")).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def is_not_modified(headers: dict, etags: Tuple[str, ...], mtime: float) -> bool:
+    """Conditional GET: If-None-Match (any of `etags`) wins over If-Modified-Since."""
+    if_none_match = headers.get(b"if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == b"*":
+            return True
+        # Weak comparison (RFC 9110 13.1.2)
+        tags = {tag.strip().removeprefix(b"W/") for tag in if_none_match.split(b",")}
+        return any(etag.encode() in tags for etag in etags)
+
+    if_modified_since = headers.get(b"if-modified-since")
+    if if_modified_since is not None:
+        since = _parse_http_date(if_modified_since)
+        return since is not None and int(mtime) <= since
+    return False
+
+
+def parse_range(value: bytes, size: int) -> Optional[Tuple[int, int]]:
+    """
+    First and last byte of a single `bytes=` range.
+
+    Returns:
+        (start, end) inclusive, or None to send the whole file (no usable
+        Range: malformed, another unit or several ranges)
+
+    Raises:
+        ValueError: If the range is not satisfiable (416)
+    """
+    unit, _, spec = value.decode("latin-1").partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first.isdigit() or last.isdigit()):
+        return None
+    if not first.isdigit():
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("empty suffix range")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if start >= size:
+        raise ValueError("range starts past the end")
+    end = int(last) if last.isdigit() else size - 1
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _if_range_matches(value: bytes, etags: Tuple[str, ...], last_modified: str) -> bool:
+    value = value.strip()
+    if value.startswith((b'"', b"W/")):
+        return any(value == etag.encode() for etag in etags)  # strong comparison
+    return value == last_modified.encode()
+
+
+def _read(path: str, offset: int, count: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return f.read(count)
+
+
+class UploadFiles:
+    """ASGI app serving the flat UPLOAD_DIR (mounted at /uploads)."""
+
+    def __init__(self, directory: str, accel_redirect: str = UPLOAD_ACCEL_REDIRECT):
+        self.directory = directory
+        self.accel_redirect = accel_redirect
+
+    async def __call__(self, scope, receive, send):
+        assert scope["type"] == "http"
+        method = scope["method"]
+        if method not in ("GET", "HEAD"):
+            await self._empty(send, 405, [(b"allow", b"GET, HEAD")])
+            return
+
+        root_path = scope.get("root_path", "")
+        path = scope["path"]
+        name = path[len(root_path):] if path.startswith(root_path) else path
+        name = name.lstrip("/")
+        content_type = CONTENT_TYPES.get(os.path.splitext(name)[1].lower())
+        # Uploads are a flat directory: no separators, no dot files
+        if content_type is None or "/" in name or "\\" in name or name.startswith("."):
+            await self._empty(send, 404)
+            return
+
+        full_path = os.path.join(self.directory, name)
+        try:
+            # One stat on a local disk is cheaper than a threadpool round trip
+            stat_result = os.stat(full_path)
+        except OSError:
+            stat_result = None
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            await self._empty(send, 404)
+            return
+
+        size = stat_result.st_size
+        etag = make_etag(name, stat_result)
+        # Validators a client may hold for these bytes: ours, and nginx's
+        etags = (etag, stat_etag(stat_result)) if is_content_addressed(name) else (etag,)
+        last_modified = _http_date(stat_result.st_mtime)
+        cache_control = IMMUTABLE_CACHE_CONTROL if is_content_addressed(name) else (
+            f"public, max-age={UPLOAD_CACHE_MAX_AGE}"
+        )
+        headers = [
+            (b"etag", etag.encode()),
+            (b"last-modified", last_modified.encode()),
+            (b"cache-control", cache_control.encode()),
+        ]
+
+        request_headers = dict(scope["headers"])
+        if is_not_modified(request_headers, etags, stat_result.st_mtime):
+            await self._empty(send, 304, headers)
+            return
+
+        headers.append((b"content-type", content_type))
+        if self.accel_redirect:
+            # nginx serves the body (and any Range) from its internal location
+            location = self.accel_redirect.rstrip("/") + "/" + quote(name)
+            await self._empty(send, 200, headers + [(b"x-accel-redirect", location.encode())])
+            return
+
+        headers.append((b"accept-ranges", b"bytes"))
+        status = 200
+        start, end = 0, size - 1
+        range_header = request_headers.get(b"range")
+        if range_header is not None and method == "GET":
+            if_range = request_headers.get(b"if-range")
+            if if_range is None or _if_range_matches(if_range, etags, last_modified):
+                try:
+                    byte_range = parse_range(range_header, size)
+                except ValueError:
+                    await self._empty(send, 416, headers + [(b"content-range", f"bytes */{size}".encode())])
+                    return
+                if byte_range is not None:
+                    start, end = byte_range
+                    status = 206
+                    headers.append((b"content-range", f"bytes {start}-{end}/{size}".encode()))
+
+        count = end - start + 1
+        headers.append((b"content-length", str(count).encode()))
+        if method == "HEAD" or count == 0:
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        try:
+            await self._send_file(scope, send, full_path, status, headers, start, count)
+        except FileNotFoundError:
+            # Deleted between stat and open (nothing was sent yet)
+            await self._empty(send, 404)
+
+    @staticmethod
+    async def _empty(send, status: int, headers: Optional[List[Tuple[bytes, bytes]]] = None) -> None:
+        headers = list(headers or [])
+        if status != 304:  # a 304 has no body and describes the 200 it replaces
+            headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_file(self, scope, send, full_path, status, headers, start, count) -> None:
+        start_message = {"type": "http.response.start", "status": status, "headers": headers}
+
+        if ZEROCOPY_EXTENSION in scope.get("extensions", {}):
+            file = await run_in_threadpool(open, full_path, "rb")
+            try:
+                await send(start_message)
+                await send({"type": ZEROCOPY_EXTENSION, "file": file, "offset": start, "count": count})
+            finally:
+                await run_in_threadpool(file.close)
+            return
+
+        if count <= SERVE_CHUNK_SIZE:
+            body = await run_in_threadpool(_read, full_path, start, count)
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        file = await run_in_threadpool(open, full_path, "rb")
+        try:
+            await send(start_message)
+            offset, remaining = start, count
+            while remaining > 0:
+                chunk = await run_in_threadpool(os.pread, file.fileno(), min(SERVE_CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break  # truncated underneath us; the client sees a short body
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b""})
+        finally:
+            await run_in_threadpool(file.close)
@@ -0,0 +1,88 @@
+"""
+In-memory rate limiting for the admin login.
+
+Each key (client IP, username) gets a token bucket that holds up to `limit`
+attempts and refills at `limit` per `window` seconds. Buckets live in a
+bounded LRU, so a flood of distinct keys cannot grow memory without limit;
+a bucket evicted early only forgets attempts (it fails open). State is per
+process.
+"""
+import os
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+from fastapi import HTTPException, status
+
+# Login attempts per client IP and failed logins per username, per window
+LOGIN_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", 20))
+LOGIN_FAILURES_PER_USERNAME = int(os.getenv("LOGIN_FAILURES_PER_USERNAME", 10))
+LOGIN_THROTTLE_WINDOW = float(os.getenv("LOGIN_THROTTLE_WINDOW", 60))
+
+# Tracked keys per limiter
+THROTTLE_MAX_KEYS = 10000
+
+
+class RateLimiter:
+    """Token buckets keyed by client IP or username (used from the event loop only)."""
+
+    def __init__(self, limit: int, window: float, max_keys: int = THROTTLE_MAX_KEYS):
+        self.limit = limit
+        self.rate = limit / window
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def _tokens(self, key: Hashable, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.limit, now))
+        return min(self.limit, tokens + (now - updated) * self.rate)
+
+    def retry_after(self, key: Hashable) -> Optional[float]:
+        """Seconds until `key` may try again, or None if it has an attempt left."""
+        if self.limit <= 0:
+            return None
+        tokens = self._tokens(key, time.monotonic())
+        if tokens >= 1:
+            return None
+        return (1 - tokens) / self.rate
+
+    def hit(self, key: Hashable) -> None:
+        """Use up one attempt of `key`."""
+        if self.limit <= 0:
+            return
+        now = time.monotonic()
+        self._buckets[key] = (max(self._tokens(key, now) - 1, 0), now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+
+login_ip_limiter = RateLimiter(LOGIN_ATTEMPTS_PER_IP, LOGIN_THROTTLE_WINDOW)
+login_username_limiter = RateLimiter(LOGIN_FAILURES_PER_USERNAME, LOGIN_THROTTLE_WINDOW)
+
+
+def check_login_allowed(client_ip: str, username: str) -> None:
+    """
+    Count a login attempt from `client_ip` and refuse it if either limit is used up.
+
+    Raises:
+        HTTPException: 429 with Retry-After while the IP or username is throttled
+    """
+    waits = [
+        wait for wait in (
+            login_ip_limiter.retry_after(client_ip),
+            login_username_limiter.retry_after(username),
+        )
+        if wait is not None
+    ]
+    if waits:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts. Try again later.",
+            headers={"Retry-After": str(max(1, round(max(waits))))},
+        )
+    login_ip_limiter.hit(client_ip)
+
+
+def record_login_failure(username: str) -> None:
+    """Count a failed login against the username."""
+    login_username_limiter.hit(username)
@@ -1,11 +1,32 @@
+"""
+Content-addressed storage for uploaded keyboard images.
+
+Uploads are stored as `<sha256><ext>`, so identical images share one file
+(and one set of resized variants). A file is only deleted once no keyboard
+row references it any more, and because a name always denotes the same
+bytes it can be cached by clients forever.
+"""
+import asyncio
+import hashlib
 import os
-import uuid
+import re
+import tempfile
+import zlib
+from collections import Counter
+from contextlib import asynccontextmanager
 from fastapi import UploadFile, HTTPException
-from typing import List
-from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Iterable, Optional, Tuple
+
+from ..models import Keyboard
+from .image_variants import delete_variant_files, generate_variants, variants_exist
 
-# Load environment variables
-load_dotenv()
+try:
+    import fcntl
+except ImportError:  # Windows: uploads in flight are only tracked per process
+    fcntl = None
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
@@ -13,6 +34,15 @@ ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 # Maximum file size (5MB)
 MAX_FILE_SIZE = 5 * 1024 * 1024
 
+# Streamed uploads are copied to disk in chunks of this size
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# Request body limit: one image plus the other form fields
+MAX_REQUEST_SIZE = MAX_FILE_SIZE + 64 * 1024
+
+# Content-addressed names: sha256 hex digest (+ variant suffix) + extension
+CONTENT_NAME_RE = re.compile(r"^[0-9a-f]{64}(_\d+w)?\.[a-z]+$")
+
 # Upload directory - use environment variable or default to "uploads"
 # In production, this should be set to an absolute path like /var/lib/split-keyboard/uploads
 UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
@@ -29,60 +59,269 @@ def validate_image_file(file: UploadFile) -> None:
         )
 
 
-def sanitize_filename(filename: str) -> str:
-    """Sanitize filename to prevent security issues."""
-    # Get file extension
-    file_ext = os.path.splitext(filename)[1].lower()
+def image_extension_of(head: bytes) -> Optional[str]:
+    """Extension matching the magic bytes at the start of an image, or None."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def detect_image_extension(file_path: str) -> Optional[str]:
+    """Extension matching the file's actual format (from its magic bytes), or None."""
+    with open(file_path, "rb") as f:
+        return image_extension_of(f.read(12))
+
+
+def content_filename(digest: str, file_ext: str) -> str:
+    """Storage name of an upload: its SHA-256 plus the extension of its format."""
+    return f"{digest}{file_ext}"
+
+
+def is_content_addressed(filename: str) -> bool:
+    """Whether a file name is derived from its content (and therefore immutable)."""
+    return CONTENT_NAME_RE.match(filename) is not None
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _discard(out, tmp_path: str) -> None:
+    out.close()
+    os.remove(tmp_path)
+
+
+async def stream_to_temp_file(file: UploadFile) -> Tuple[str, str, int]:
+    """
+    Copy an upload into a temporary file in UPLOAD_DIR, chunk by chunk.
+
+    Memory use stays at one chunk regardless of the file size, the size limit
+    is checked after every chunk and the SHA-256 of the content is computed
+    on the way. Disk writes run in the threadpool.
+
+    Returns:
+        (temporary file path, sha256 hex digest, size in bytes)
+
+    Raises:
+        HTTPException: If the file is larger than MAX_FILE_SIZE (the
+            temporary file is removed)
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    fd, tmp_path = await run_in_threadpool(tempfile.mkstemp, dir=UPLOAD_DIR, suffix=".part")
+    out = os.fdopen(fd, "wb")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024)}MB"
+                )
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+        await run_in_threadpool(out.close)
+    except BaseException:
+        await run_in_threadpool(_discard, out, tmp_path)
+        raise
+
+    return tmp_path, digest.hexdigest(), size
 
-    # Generate unique filename with UUID
-    unique_filename = f"{uuid.uuid4()}{file_ext}"
 
-    return unique_filename
+# Uploads that are stored but whose keyboard row is not committed yet.
+# delete_upload_file() never removes these, even at zero database references.
+_pending_uploads: Counter = Counter()
+
+# Other worker processes see them through shared byte-range locks on this
+# file in UPLOAD_DIR (one byte per name, at the name's CRC32; a collision
+# only keeps a file that could have been removed)
+UPLOAD_LOCK_FILE = ".upload-locks"
+_lock_fd: Optional[int] = None
+# Lock byte -> pending uploads of this process on it
+_held_offsets: Counter = Counter()
+
+
+def _lock_offset(filename: str) -> int:
+    return zlib.crc32(filename.encode())
+
+
+def _lock_file() -> Optional[int]:
+    """Descriptor of the lock file (kept open: closing it would drop this process's locks)."""
+    global _lock_fd
+    if _lock_fd is None and fcntl is not None:
+        _lock_fd = os.open(os.path.join(UPLOAD_DIR, UPLOAD_LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    return _lock_fd
+
+
+def _place_file(tmp_path: str, file_path: str) -> None:
+    if os.path.exists(file_path):
+        # Same content is already stored
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, file_path)
 
 
-async def save_upload_file(file: UploadFile) -> str:
+def name_temp_file(tmp_path: str, digest: str) -> str:
     """
-    Save an uploaded file and return the file path.
+    Content-addressed name for a temporary upload.
+
+    The extension follows the real format, so identical bytes always get the
+    same name whatever the client called the file.
+
+    Raises:
+        HTTPException: If the file is not a JPEG/PNG/WebP image (the
+            temporary file is removed)
+    """
+    file_ext = detect_image_extension(tmp_path)
+    if file_ext is None:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=400, detail="Invalid image file")
+    return content_filename(digest, file_ext)
+
+
+async def _lock_shared(offset: int) -> None:
+    """Take the shared lock on a name's byte without blocking the event loop."""
+    lock_fd = _lock_file()
+    if lock_fd is not None and not _held_offsets[offset]:
+        delay = 0.001
+        while True:
+            try:
+                fcntl.lockf(lock_fd, fcntl.LOCK_SH | fcntl.LOCK_NB, 1, offset)
+                break
+            except OSError:
+                # Another process is removing this very name (a few unlinks)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+    _held_offsets[offset] += 1
+
+
+def _unlock_shared(offset: int) -> None:
+    _held_offsets[offset] -= 1
+    if _held_offsets[offset] <= 0:
+        del _held_offsets[offset]
+        if _lock_fd is not None:
+            fcntl.lockf(_lock_fd, fcntl.LOCK_UN, 1, offset)
+
+
+@asynccontextmanager
+async def hold_uploads(filenames: Iterable[str]) -> AsyncIterator[None]:
+    """
+    Protect stored images from delete_upload_file() while the block runs.
+
+    Enter before placing the files and commit the rows that reference them
+    inside the block.
+    """
+    filenames = list(filenames)
+    # Seen by deletes in this process at once, before any await
+    _pending_uploads.update(filenames)
+    held = []
+    try:
+        for filename in filenames:
+            offset = _lock_offset(filename)
+            await _lock_shared(offset)
+            held.append(offset)
+        yield
+    finally:
+        _pending_uploads.subtract(filenames)
+        for filename in filenames:
+            if _pending_uploads[filename] <= 0:
+                del _pending_uploads[filename]
+        for offset in held:
+            _unlock_shared(offset)
+
+
+async def place_upload(tmp_path: str, filename: str) -> None:
+    """
+    Move a named temporary upload into UPLOAD_DIR and make sure its variants exist.
+
+    Must run inside hold_uploads() for `filename`.
+
+    Raises:
+        HTTPException: If the image cannot be decoded
+    """
+    await run_in_threadpool(_place_file, tmp_path, os.path.join(UPLOAD_DIR, filename))
+    if not variants_exist(filename, UPLOAD_DIR):
+        await generate_variants(filename, UPLOAD_DIR)
+
+
+@asynccontextmanager
+async def save_upload_file(file: UploadFile, db: AsyncSession) -> AsyncIterator[str]:
+    """
+    Save an uploaded image (and its variants) under its content hash.
+
+    Use as `async with save_upload_file(image, db) as filename:` and commit
+    the row that references `filename` inside the block; until then the file
+    is protected from a concurrent delete_upload_file() of the same content.
+    If the block raises, the file is released again.
 
     Args:
         file: The uploaded file
+        db: Session used to release the file on failure
 
-    Returns:
+    Yields:
         The relative path to the saved file
 
     Raises:
-        HTTPException: If file validation fails or file is too large
+        HTTPException: If file validation fails, the file is too large or
+            it is not a decodable image
     """
     # Validate file type
     validate_image_file(file)
 
-    # Read file content
-    content = await file.read()
+    # Stream to a temporary file (size limit enforced per chunk)
+    tmp_path, digest, _ = await stream_to_temp_file(file)
+    filename = await run_in_threadpool(name_temp_file, tmp_path, digest)
 
-    # Check file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / (1024 * 1024)}MB"
-        )
+    try:
+        async with hold_uploads([filename]):
+            await place_upload(tmp_path, filename)
+            yield filename
+    except Exception:
+        await db.rollback()
+        await delete_upload_file(db, filename)
+        raise
 
-    # Generate safe filename
-    safe_filename = sanitize_filename(file.filename)
 
-    # Create upload directory if it doesn't exist
-    os.makedirs(UPLOAD_DIR, exist_ok=True)
+async def delete_upload_file(db: AsyncSession, filename: str) -> bool:
+    """
+    Release an uploaded image after the row using it was changed or deleted.
 
-    # Save file
-    file_path = os.path.join(UPLOAD_DIR, safe_filename)
-    with open(file_path, "wb") as f:
-        f.write(content)
+    The file and its variants are removed only when no keyboard references
+    them any more (call after the commit) and no upload of the same content
+    is in flight in this or another worker process.
 
-    # Return relative path
-    return safe_filename
+    Returns:
+        True if the files were removed
+    """
+    references = await db.scalar(
+        select(func.count()).select_from(Keyboard).filter(Keyboard.image_path == filename)
+    )
+    # No await between this check and the removal: an upload registering the
+    # same name either happened before (and is seen here) or runs after the
+    # file is gone (and stores it again).
+    offset = _lock_offset(filename)
+    if references or _pending_uploads[filename] or _held_offsets[offset]:
+        return False
 
+    lock_fd = _lock_file()
+    if lock_fd is not None:
+        try:
+            # Fails while another process holds an upload of this name
+            fcntl.lockf(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, offset)
+        except OSError:
+            return False
 
-def delete_upload_file(filename: str) -> None:
-    """Delete an uploaded file."""
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    try:
+        file_path = os.path.join(UPLOAD_DIR, filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        delete_variant_files(filename, UPLOAD_DIR)
+    finally:
+        if lock_fd is not None:
+            fcntl.lockf(lock_fd, fcntl.LOCK_UN, 1, offset)
+    return True
@@ -0,0 +1,196 @@
+"""
+Resized WebP/JPEG variants of uploaded keyboard images.
+
+Each upload is decoded once and written out at every width in
+IMAGE_VARIANT_WIDTHS, in both formats, next to the original in UPLOAD_DIR.
+Variant names are derived from the original's name
+(`<stem>_<width>w.webp` / `<stem>_<width>w.jpg`), so the API can list them
+without storing anything extra in the database. Images narrower than a
+target width are not upscaled; that variant keeps the original size.
+
+Decoding and resizing is CPU-bound, so it runs in a process pool instead of
+on the event loop. Uploads are content-addressed, so several requests (or
+workers) can render the same image at once: a process renders each image
+only once at a time, and every variant goes through its own temporary file,
+so concurrent renders of the same image only replace a variant with
+identical bytes. Storing and releasing uploads is handled by file_upload,
+which passes its UPLOAD_DIR in.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+# Target widths in pixels (smallest one is used as the list-view thumbnail)
+IMAGE_VARIANT_WIDTHS = tuple(sorted(
+    int(w) for w in os.getenv("IMAGE_VARIANT_WIDTHS", "320,640,1280").split(",") if w.strip()
+))
+
+# Number of worker processes for resizing (0 = one per CPU)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2)) or None
+
+# Output format -> (file extension, PIL save options)
+VARIANT_FORMATS = {
+    "webp": (".webp", {"format": "WEBP", "quality": 80, "method": 4}),
+    "jpeg": (".jpg", {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True}),
+}
+
+VARIANT_NAME_RE = re.compile(r"_\d+w\.(webp|jpg)$")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+# Image name -> render in progress in this process (joined by later callers)
+_rendering: Dict[str, "asyncio.Future[List[str]]"] = {}
+
+
+class InvalidImageError(ValueError):
+    """The upload could not be decoded as an image."""
+
+
+def is_variant_filename(filename: str) -> bool:
+    """Whether a file in UPLOAD_DIR is a generated variant rather than an original."""
+    return VARIANT_NAME_RE.search(filename) is not None
+
+
+def variant_filename(image_path: str, width: int, fmt: str) -> str:
+    """Name of one variant of an uploaded image."""
+    stem = os.path.splitext(image_path)[0]
+    return f"{stem}_{width}w{VARIANT_FORMATS[fmt][0]}"
+
+
+def variant_filenames(image_path: str) -> List[str]:
+    """Names of every variant of an uploaded image."""
+    return [
+        variant_filename(image_path, width, fmt)
+        for fmt in VARIANT_FORMATS
+        for width in IMAGE_VARIANT_WIDTHS
+    ]
+
+
+def variant_srcsets(image_path: str, base_url: str = "/uploads") -> Dict[str, str]:
+    """`srcset` attribute values per format, e.g. {"webp": "/uploads/x_320w.webp 320w, ..."}."""
+    prefix = f"{base_url}/{os.path.splitext(image_path)[0]}"
+    return {
+        fmt: ", ".join(f"{prefix}_{width}w{ext} {width}w" for width in IMAGE_VARIANT_WIDTHS)
+        for fmt, (ext, _) in VARIANT_FORMATS.items()
+    }
+
+
+def variants_exist(image_path: str, upload_dir: str) -> bool:
+    """Whether every variant of an uploaded image is on disk."""
+    return all(os.path.exists(os.path.join(upload_dir, name)) for name in variant_filenames(image_path))
+
+
+def render_variants(image_path: str, upload_dir: str) -> List[str]:
+    """
+    Decode an uploaded image and write all of its variants.
+
+    Runs inside a worker process. Each variant is written to a temporary file
+    of its own (a dot file, never served) and renamed into place, so a reader
+    never sees a half-written image and concurrent renders of the same image
+    do not share a file.
+
+    Returns:
+        The variant filenames that were written
+
+    Raises:
+        InvalidImageError: If the file is not a decodable image
+        OSError: If a variant cannot be written
+    """
+    # Pillow is only needed where images are decoded (worker processes, backfill)
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(os.path.join(upload_dir, image_path)) as source:
+            source.load()
+            image = ImageOps.exif_transpose(source)
+            # Neither variant keeps transparency; flatten onto white like a JPEG export
+            if image.mode in ("RGBA", "LA", "P"):
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+    except FileNotFoundError:
+        raise
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError, ValueError) as e:
+        raise InvalidImageError(f"{image_path}: {e}") from None
+
+    written = []
+    # Largest first, so each smaller size is resampled from an already reduced image
+    for width in sorted(IMAGE_VARIANT_WIDTHS, reverse=True):
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt, (_, options) in VARIANT_FORMATS.items():
+            filename = variant_filename(image_path, width, fmt)
+            fd, tmp_path = tempfile.mkstemp(dir=upload_dir, prefix=f".{filename}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    image.save(out, **options)
+                os.replace(tmp_path, os.path.join(upload_dir, filename))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            written.append(filename)
+    return written
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: forking a process that already runs event loop and DB threads is unsafe
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def generate_variants(image_path: str, upload_dir: str) -> List[str]:
+    """
+    Write the variants of a freshly saved upload in the process pool.
+
+    A render of the same image already running in this process is joined
+    instead of started again. Nothing is deleted here on failure: the
+    caller releases the upload (delete_upload_file), which leaves files
+    alone while another request still holds the same image.
+
+    Raises:
+        HTTPException: If the upload cannot be decoded as an image (400)
+    """
+    render = _rendering.get(image_path)
+    if render is None:
+        loop = asyncio.get_running_loop()
+        render = asyncio.ensure_future(
+            loop.run_in_executor(_get_executor(), render_variants, image_path, upload_dir)
+        )
+        _rendering[image_path] = render
+        render.add_done_callback(lambda _: _rendering.pop(image_path, None))
+    try:
+        # A cancelled request must not cancel the render other requests wait for
+        return await asyncio.shield(render)
+    except InvalidImageError:
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+
+def delete_variant_files(image_path: str, upload_dir: str) -> None:
+    """Delete all variants of an uploaded image."""
+    for filename in variant_filenames(image_path):
+        file_path = os.path.join(upload_dir, filename)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+def shutdown_image_workers() -> None:
+    """Stop the worker processes (called on application shutdown)."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
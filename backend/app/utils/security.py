@@ -1,14 +1,98 @@
-from passlib.context import CryptContext
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-# Password hashing context with bcrypt
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from fastapi import HTTPException, status
+
+# Password hashing context with bcrypt (created on first use: importing
+# passlib and loading the bcrypt backend is a noticeable part of worker boot)
+_pwd_context = None
+
+# bcrypt runs on its own threads so a burst of logins cannot take over the
+# shared threadpool; at most PASSWORD_HASH_WORKERS hashes run at once and at
+# most PASSWORD_HASH_QUEUE more wait, anything beyond that is refused (503).
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 1))
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", 8))
+# Scheduling priority of the bcrypt threads (Linux nice value; 0 = unchanged),
+# so on a busy CPU catalog requests run first
+PASSWORD_HASH_NICE = int(os.getenv("PASSWORD_HASH_NICE", 10))
+
+
+def _lower_thread_priority() -> None:
+    if PASSWORD_HASH_NICE <= 0:
+        return
+    try:
+        # On Linux the nice value is per thread
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PASSWORD_HASH_NICE)
+    except (AttributeError, OSError):
+        pass
+
+
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt", initializer=_lower_thread_priority
+)
+# Jobs queued or running on _hash_executor (decremented by the executor)
+_hash_jobs = 0
+_hash_jobs_lock = threading.Lock()
+
+def _get_pwd_context():
+    global _pwd_context
+    if _pwd_context is None:
+        from passlib.context import CryptContext
+        _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _pwd_context
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return _get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password using bcrypt."""
-    return pwd_context.hash(password)
+    return _get_pwd_context().hash(password)
+
+
+def _hash_job_done(future) -> None:
+    global _hash_jobs
+    with _hash_jobs_lock:
+        _hash_jobs -= 1
+
+
+async def _run_hash_job(func, *args):
+    global _hash_jobs
+    with _hash_jobs_lock:
+        full = _hash_jobs >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE
+        if not full:
+            _hash_jobs += 1
+    if full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many password checks in progress. Try again later.",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        future = _hash_executor.submit(func, *args)
+    except RuntimeError:  # executor shut down
+        _hash_job_done(None)
+        raise
+    # A job is counted until the executor is done with it: a request that
+    # goes away (client disconnect) only cancels a job that has not started
+    future.add_done_callback(_hash_job_done)
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt executor (503 when its queue is full)."""
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash on the bcrypt executor (503 when its queue is full)."""
+    return await _run_hash_job(get_password_hash, password)
+
+
+def shutdown_hash_workers() -> None:
+    """Stop the bcrypt threads (app shutdown)."""
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
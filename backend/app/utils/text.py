@@ -0,0 +1,8 @@
+# SQLite's lower() and LIKE only fold ASCII letters; mirror that exactly so
+# sorting and search done in Python match the SQL path byte for byte.
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def ascii_lower(value: str) -> str:
+    """Lower-case ASCII letters only, like SQLite's built-in lower()."""
+    return value.translate(_ASCII_LOWER)
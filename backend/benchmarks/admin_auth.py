@@ -0,0 +1,60 @@
+"""
+Latency of authenticated admin requests.
+
+Logs in once and sends --requests sequential GET /api/admin/cache/stats
+requests on a keep-alive connection; every one goes through
+get_current_admin. Prints mean / p50 / p99 latency. Run it against a
+server started with AUTH_CACHE_TTL=0 (JWT check + admin lookup per request)
+and one with the default verified-token cache to compare.
+
+Usage: python benchmarks/admin_auth.py --username admin --password secret
+                                       [--base http://127.0.0.1:8000] [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from urllib.parse import urlsplit
+
+from http_load import http_request, percentile, timed_requests
+
+
+async def run(base: str, username: str, password: str, count: int, path: str) -> None:
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+
+    status, payload = await http_request(
+        host, port, "POST", "/api/admin/login", {"Content-Type": "application/json"},
+        json.dumps({"username": username, "password": password}).encode()
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed: {status} {payload[:200]!r}")
+    token = json.loads(payload)["access_token"]
+
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+        f"Authorization: Bearer {token}\r\n\r\n"
+    ).encode()
+    await timed_requests(host, port, request, min(count, 100))  # warm up
+    latencies = await timed_requests(host, port, request, count)
+
+    print(f"{path}: {count} requests")
+    print(f"  mean {statistics.mean(latencies) * 1000:.3f} ms"
+          f"  p50 {percentile(latencies, 50) * 1000:.3f} ms"
+          f"  p99 {percentile(latencies, 99) * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/admin/cache/stats")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base, args.username, args.password, args.requests, args.path))
+
+
+if __name__ == "__main__":
+    main()
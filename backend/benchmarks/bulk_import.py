@@ -0,0 +1,157 @@
+"""
+Import throughput: one bulk import vs one admin POST per keyboard.
+
+Generates --rows keyboards, each with its own small JPEG (so every image is
+stored and resized), and adds them to a running server twice: through
+POST /api/admin/keyboards/import (manifest + zip in a single request) and
+through --writers concurrent clients calling POST /api/admin/keyboards once
+per keyboard. Prints rows per second for both.
+
+With --same-image every row uses one picture, which leaves out the image
+resizing (stored once) and measures the row handling alone, e.g. a
+re-sync of catalog data.
+
+Both runs add keyboards to the catalog; point the server at a scratch
+database and UPLOAD_DIR.
+
+Usage: python benchmarks/bulk_import.py --username admin --password secret
+                                        [--base http://127.0.0.1:8000]
+                                        [--rows 200] [--writers 4] [--same-image]
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import time
+import uuid
+import zipfile
+from urllib.parse import urlsplit
+
+from PIL import Image
+
+from http_load import http_request, multipart_body
+
+
+def make_images(count: int, run_id: str, same_image: bool = False) -> list:
+    """Distinct 640x480 JPEGs (different colours, so no two share a hash)."""
+    if same_image:
+        return make_images(1, run_id) * count
+    images = []
+    for i in range(count):
+        colour = (i * 37 % 256, i * 91 % 256, (i * 13 + len(run_id)) % 256)
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), colour).save(buffer, "JPEG", quality=85, comment=f"{run_id}-{i}".encode())
+        images.append(buffer.getvalue())
+    return images
+
+
+def make_rows(count: int, run_id: str, prefix: str) -> list:
+    return [
+        {
+            "name": f"{prefix} {run_id} {i:05d}",
+            "price": str(50000 + i * 100),
+            "link": f"https://example.com/{run_id}/{i}",
+            "key_count_range": "40",
+            "keyboard_type": "column_stagger",
+            "is_wireless": "true" if i % 2 else "false",
+            "image": f"images/{i:05d}.jpg",
+        }
+        for i in range(count)
+    ]
+
+
+def import_body(rows: list, images: list) -> tuple:
+    manifest = io.StringIO()
+    writer = csv.DictWriter(manifest, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_STORED) as zf:
+        for row, image in zip(rows, images):
+            zf.writestr(row["image"], image)
+
+    return multipart_body({}, files={
+        "manifest": ("manifest.csv", manifest.getvalue().encode(), "text/csv"),
+        "images": ("images.zip", archive.getvalue(), "application/zip"),
+    })
+
+
+async def bulk(host: str, port: int, auth: dict, rows: list, images: list) -> float:
+    body, content_type = import_body(rows, images)
+    start = time.perf_counter()
+    status, payload = await http_request(
+        host, port, "POST", "/api/admin/keyboards/import", {**auth, "Content-Type": content_type}, body
+    )
+    elapsed = time.perf_counter() - start
+    if status != 200:
+        raise SystemExit(f"Import failed: {status} {payload[:200]!r}")
+    result = json.loads(payload)
+    if result["imported"] != len(rows):
+        raise SystemExit(f"Import reported errors: {result['errors'][:5]}")
+    return elapsed
+
+
+async def one_by_one(host: str, port: int, auth: dict, rows: list, images: list, writers: int) -> float:
+    queue = list(zip(rows, images))
+    errors = 0
+
+    async def writer():
+        nonlocal errors
+        while queue:
+            row, image = queue.pop()
+            fields = {name: value for name, value in row.items() if name != "image"}
+            body, content_type = multipart_body(fields, image)
+            status, _ = await http_request(
+                host, port, "POST", "/api/admin/keyboards", {**auth, "Content-Type": content_type}, body
+            )
+            errors += status != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    elapsed = time.perf_counter() - start
+    if errors:
+        raise SystemExit(f"{errors} single creates failed")
+    return elapsed
+
+
+async def run(base: str, username: str, password: str, count: int, writers: int, same_image: bool) -> None:
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+
+    status, payload = await http_request(
+        host, port, "POST", "/api/admin/login", {"Content-Type": "application/json"},
+        json.dumps({"username": username, "password": password}).encode()
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed: {status} {payload[:200]!r}")
+    auth = {"Authorization": f"Bearer {json.loads(payload)['access_token']}"}
+
+    run_id = uuid.uuid4().hex[:8]
+    elapsed = await bulk(
+        host, port, auth, make_rows(count, run_id, "Bulk"), make_images(count, run_id + "b", same_image)
+    )
+    print(f"bulk import:      {count} rows in {elapsed:6.2f}s  {count / elapsed:8.1f} rows/s")
+
+    elapsed = await one_by_one(
+        host, port, auth, make_rows(count, run_id, "Single"), make_images(count, run_id + "s", same_image), writers
+    )
+    print(f"single creates:   {count} rows in {elapsed:6.2f}s  {count / elapsed:8.1f} rows/s ({writers} clients)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--same-image", action="store_true", help="Use one image for every row")
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base, args.username, args.password, args.rows, args.writers, args.same_image))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compare two benchmark result files (suite.py / http_load.py --output).
+
+Prints p50 / p95 / p99 and throughput of every case found in both runs
+with the relative change, and marks a case as a regression when its p95
+grew (or its rps dropped) by more than --threshold. Exits with status 1
+if any case regressed, so it can gate a CI job.
+
+Usage: python benchmarks/compare_results.py baseline.json new.json [--threshold 0.2]
+"""
+import argparse
+import json
+import sys
+
+
+def _change(old, new):
+    if not old or new is None:
+        return None
+    return (new - old) / old
+
+
+def _format(change) -> str:
+    return "      -" if change is None else f"{change * 100:+6.1f}%"
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print the comparison; returns the names of regressed cases."""
+    regressions = []
+    old_results, new_results = baseline["results"], current["results"]
+    print(f"baseline: {baseline['meta'].get('revision')} {baseline['meta'].get('time')}")
+    print(f"current:  {current['meta'].get('revision')} {current['meta'].get('time')}")
+    print()
+    print(f"{'case':42s} {'p50 ms':>9s} {'':7s} {'p95 ms':>9s} {'':7s} {'p99 ms':>9s} {'':7s} {'rps':>9s} {'':7s}")
+
+    for name, new in new_results.items():
+        old = old_results.get(name)
+        if old is None:
+            continue
+        columns = []
+        for key in ("p50_ms", "p95_ms", "p99_ms", "rps"):
+            columns.append(f"{new.get(key) or 0:9.2f} {_format(_change(old.get(key), new.get(key)))}")
+
+        p95_change = _change(old.get("p95_ms"), new.get("p95_ms"))
+        rps_change = _change(old.get("rps"), new.get("rps"))
+        regressed = (p95_change or 0) > threshold or (rps_change or 0) < -threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:42s} {' '.join(columns)}{'  REGRESSION' if regressed else ''}")
+
+    missing = set(old_results) - set(new_results)
+    if missing:
+        print(f"\n{len(missing)} case(s) only in the baseline")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative slowdown (default: 0.2)")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+
+    regressions = compare(baseline, current, args.threshold)
+    print()
+    if regressions:
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"No regressions above {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
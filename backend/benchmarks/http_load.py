@@ -0,0 +1,207 @@
+"""
+Minimal HTTP/1.1 keep-alive load driver (stdlib only).
+
+Opens N concurrent connections to a running server and replays GET requests
+for a fixed duration, then prints requests per second and p50/p95/p99
+latency. A connection whose request exceeds --timeout is counted and dropped.
+With --output the results are also written as JSON (see save_results), so
+runs can be compared with benchmarks/compare_results.py.
+
+Usage: python benchmarks/http_load.py [--url http://127.0.0.1:8000/api/keyboards]
+                                      [--connections 500] [--duration 10]
+                                      [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import time
+import uuid
+from urllib.parse import urlsplit
+
+
+async def _request(reader, writer, request: bytes) -> int:
+    """Send one request on a keep-alive connection and return the status code."""
+    writer.write(request)
+    await writer.drain()
+
+    # Status line + headers
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    if length:
+        await reader.readexactly(length)
+    return status
+
+
+async def http_request(host: str, port: int, method: str, path: str, headers: dict, body: bytes = b"") -> tuple:
+    """Send a single request on a fresh connection; returns (status, body)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {host}", "Connection: close", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), payload
+
+
+def multipart_body(fields: dict, image: bytes = None, filename: str = "bench.jpg", files: dict = None) -> tuple:
+    """
+    Encode form fields plus file parts; returns (body, content type).
+
+    `image` is sent as the `image` file part; `files` maps further part names
+    to (filename, content, content type).
+    """
+    files = dict(files or {})
+    if image is not None:
+        files["image"] = (filename, image, "image/jpeg")
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (part_filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{part_filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+async def timed_requests(host: str, port: int, request: bytes, count: int) -> list:
+    """Send `count` requests one after another on one keep-alive connection; returns latencies (s)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    latencies = []
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            status = await _request(reader, writer, request)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                raise RuntimeError(f"HTTP {status}")
+    finally:
+        writer.close()
+    return latencies
+
+
+def percentile(values: list, q: float) -> float:
+    """q-th percentile (0-100) of a non-empty list, nearest-rank."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def latency_stats(latencies: list) -> dict:
+    """p50/p95/p99 of latencies (s) in milliseconds."""
+    if not latencies:
+        return {}
+    return {f"p{q}_ms": round(percentile(latencies, q) * 1000, 3) for q in (50, 95, 99)}
+
+
+def save_results(path: str, results: dict, **meta) -> None:
+    """
+    Write benchmark results as JSON.
+
+    `results` maps a case name to its numbers (requests, rps, p50_ms,
+    p95_ms, p99_ms, ...); `meta` describes the run and is stored next to
+    them along with the git revision and Python version.
+    """
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": revision,
+        "python": platform.python_version(),
+        **meta,
+    }
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+async def _worker(host: str, port: int, request: bytes, deadline: float, timeout: float, stats: dict) -> None:
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        stats["errors"] += 1
+        return
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = await asyncio.wait_for(_request(reader, writer, request), timeout)
+            stats["latencies"].append(time.perf_counter() - start)
+            stats["requests"] += 1
+            if status >= 400:
+                stats["errors"] += 1
+    except asyncio.TimeoutError:
+        stats["timeouts"] += 1
+    except (ConnectionError, asyncio.IncompleteReadError):
+        stats["errors"] += 1
+    finally:
+        writer.close()
+
+
+async def run_load(url: str, connections: int, duration: float, timeout: float = 10,
+                   extra_headers: str = "") -> dict:
+    """
+    Drive `connections` keep-alive clients against `url` for `duration` seconds.
+
+    `extra_headers` are raw header lines ("Name: value\r\n" each) added to every request.
+    """
+    parts = urlsplit(url)
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or 80
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n{extra_headers}\r\n".encode()
+
+    stats = {"requests": 0, "errors": 0, "timeouts": 0, "latencies": []}
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(_worker(host, port, request, deadline, timeout, stats) for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    stats["seconds"] = round(elapsed, 2)
+    stats["rps"] = round(stats["requests"] / elapsed, 1)
+    stats.update(latency_stats(stats.pop("latencies")))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/keyboards")
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--timeout", type=float, default=10, help="Per-request timeout (seconds)")
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    stats = asyncio.run(run_load(args.url, args.connections, args.duration, args.timeout))
+    print(f"{args.url}")
+    print(f"  connections: {args.connections}, duration: {stats['seconds']}s")
+    print(f"  requests: {stats['requests']}, errors: {stats['errors']}, timed out connections: {stats['timeouts']}")
+    print(f"  requests/sec: {stats['rps']}")
+    if "p50_ms" in stats:
+        print(f"  latency p50: {stats['p50_ms']} ms, p95: {stats['p95_ms']} ms, p99: {stats['p99_ms']} ms")
+    if args.output:
+        save_results(
+            args.output, {args.url: stats},
+            driver="http_load", connections=args.connections, duration=args.duration
+        )
+        print(f"  results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Catalog latency during a login storm.
+
+Runs the http_load read driver against a public endpoint twice: alone, and
+while --attackers clients keep posting wrong passwords to
+POST /api/admin/login as fast as they can (the real admin username, so each
+attempt that gets through costs a bcrypt check). Prints catalog requests
+per second and p50/p99 latency for both runs, plus the login status codes
+(401 = checked, 429 = throttled, 503 = bcrypt queue full).
+
+Usage: python benchmarks/login_storm.py --username admin
+                                        [--base http://127.0.0.1:8000]
+                                        [--connections 50] [--attackers 50]
+                                        [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from http_load import http_request, run_load
+
+
+async def _attacker(host: str, port: int, username: str, deadline: float, statuses: Counter) -> None:
+    body = json.dumps({"username": username, "password": "wrong-password"}).encode()
+    while time.perf_counter() < deadline:
+        try:
+            status, _ = await http_request(
+                host, port, "POST", "/api/admin/login", {"Content-Type": "application/json"}, body
+            )
+        except OSError:
+            status = "error"
+        statuses[status] += 1
+
+
+async def run(base: str, path: str, username: str, connections: int, attackers: int, duration: float) -> None:
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+
+    def report(label: str, stats: dict) -> None:
+        print(f"{label:14s} {stats['rps']:8.1f} req/s  p50 {stats.get('p50_ms', 0):7.2f} ms"
+              f"  p99 {stats.get('p99_ms', 0):7.2f} ms  errors {stats['errors']}")
+
+    report("catalog alone", await run_load(base + path, connections, duration))
+
+    statuses = Counter()
+    deadline = time.perf_counter() + duration
+    stats, *_ = await asyncio.gather(
+        run_load(base + path, connections, duration),
+        *(_attacker(host, port, username, deadline, statuses) for _ in range(attackers))
+    )
+    report("during storm", stats)
+    print(f"login attempts: {sum(statuses.values())} " + ", ".join(f"{k}: {v}" for k, v in sorted(statuses.items(), key=str)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/keyboards?sort_by=price_desc")
+    parser.add_argument("--username", required=True, help="Existing admin username to attack")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--attackers", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base, args.path, args.username, args.connections, args.attackers, args.duration))
+
+
+if __name__ == "__main__":
+    main()
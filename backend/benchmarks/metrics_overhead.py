@@ -0,0 +1,88 @@
+"""
+Cost of the request / SQL metrics (app/metrics.py).
+
+  middleware   a trivial ASGI endpoint called in-process, bare and wrapped in
+               MetricsMiddleware with the app's real route table (route
+               matching, histograms, counters)
+  query        SELECT 1 on an in-memory SQLite engine, with and without the
+               engine event listeners
+
+Each variant runs --rounds times, interleaved, and the fastest round is
+reported, so a noisy machine does not swamp the difference. Prints the
+added time per request / per statement in microseconds. For the
+end-to-end effect run the suite twice and compare:
+
+    METRICS_ENABLED=0 python benchmarks/suite.py --database bench.db --output off.json
+    METRICS_ENABLED=1 python benchmarks/suite.py --database bench.db --output on.json
+    python benchmarks/compare_results.py off.json on.json
+
+Usage: python benchmarks/metrics_overhead.py [--requests 20000] [--queries 20000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+from app.metrics import MetricsMiddleware, instrument_engine
+from app.routers import admin, keyboards
+from suite import call
+
+
+async def _endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"ok":true}'})
+
+
+async def _time_requests(app, count: int) -> float:
+    paths = ["/api/keyboards", "/api/keyboards/42", "/api/keyboards/facets", "/api/admin/keyboards/7"]
+    start = time.perf_counter()
+    for i in range(count):
+        await call(app, "GET", paths[i % len(paths)])
+    return (time.perf_counter() - start) / count
+
+
+def _time_queries(engine, count: int) -> float:
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        start = time.perf_counter()
+        for _ in range(count):
+            conn.execute(statement).scalar()
+        return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    routes = keyboards.router.routes + admin.router.routes
+    wrapped = MetricsMiddleware(_endpoint, routes=routes)
+    asyncio.run(_time_requests(_endpoint, 1000))  # warm up
+    bare = measured = float("inf")
+    for _ in range(args.rounds):
+        bare = min(bare, asyncio.run(_time_requests(_endpoint, args.requests)))
+        measured = min(measured, asyncio.run(_time_requests(wrapped, args.requests)))
+    print(f"middleware: {bare * 1e6:8.2f} us bare, {measured * 1e6:8.2f} us with metrics"
+          f"  (+{(measured - bare) * 1e6:.2f} us per request, {len(routes)} routes)")
+
+    plain = create_engine("sqlite://")
+    instrumented = create_engine("sqlite://")
+    instrument_engine(instrumented, "bench")
+    _time_queries(plain, 1000)  # warm up
+    bare = measured = float("inf")
+    for _ in range(args.rounds):
+        bare = min(bare, _time_queries(plain, args.queries))
+        measured = min(measured, _time_queries(instrumented, args.queries))
+    print(f"query:      {bare * 1e6:8.2f} us bare, {measured * 1e6:8.2f} us with metrics"
+          f"  (+{(measured - bare) * 1e6:.2f} us per statement)")
+
+
+if __name__ == "__main__":
+    main()
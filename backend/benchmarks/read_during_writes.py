@@ -0,0 +1,84 @@
+"""
+Read throughput while admins upload keyboards.
+
+Runs the http_load read driver against a public endpoint while a number of
+concurrent admin clients keep creating keyboards (multipart upload of
+test_keyboard.jpg) and deleting them again. Prints read requests per second
+and the number of completed admin writes.
+
+Usage: python benchmarks/read_during_writes.py --username admin --password secret
+                                               [--base http://127.0.0.1:8000]
+                                               [--connections 100] [--writers 4]
+                                               [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from http_load import http_request, multipart_body, run_load
+
+IMAGE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_keyboard.jpg")
+
+
+async def _writer(host: str, port: int, token: str, image: bytes, deadline: float, stats: dict) -> None:
+    auth = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        body, content_type = multipart_body(
+            {"name": f"Bench {uuid.uuid4().hex[:8]}", "link": "https://example.com", "key_count_range": "40", "price": "100000"},
+            image
+        )
+        status, payload = await http_request(host, port, "POST", "/api/admin/keyboards", {**auth, "Content-Type": content_type}, body)
+        if status != 200:
+            stats["errors"] += 1
+            continue
+        keyboard_id = json.loads(payload)["id"]
+        status, _ = await http_request(host, port, "DELETE", f"/api/admin/keyboards/{keyboard_id}", auth)
+        stats["writes"] += 2 if status == 204 else 1
+
+
+async def run(base: str, username: str, password: str, connections: int, writers: int, duration: float, path: str) -> None:
+    parts = urlsplit(base)
+    host, port = parts.hostname, parts.port or 80
+
+    status, payload = await http_request(
+        host, port, "POST", "/api/admin/login", {"Content-Type": "application/json"},
+        json.dumps({"username": username, "password": password}).encode()
+    )
+    if status != 200:
+        raise SystemExit(f"Login failed: {status} {payload[:200]!r}")
+    token = json.loads(payload)["access_token"]
+
+    with open(IMAGE_PATH, "rb") as f:
+        image = f.read()
+
+    stats = {"writes": 0, "errors": 0}
+    deadline = time.perf_counter() + duration
+    reads, *_ = await asyncio.gather(
+        run_load(base + path, connections, duration),
+        *(_writer(host, port, token, image, deadline, stats) for _ in range(writers))
+    )
+
+    print(f"reads:  {reads['requests']} ({reads['rps']} req/s), errors: {reads['errors']}, timed out: {reads['timeouts']}")
+    print(f"writes: {stats['writes']} ({stats['writes'] / duration:.1f} /s), errors: {stats['errors']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base", default="http://127.0.0.1:8000")
+    parser.add_argument("--path", default="/api/keyboards?sort_by=price_desc")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.base, args.username, args.password, args.connections, args.writers, args.duration, args.path))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Compressed JSON responses: size and per-request cost by Content-Encoding.
+
+For each case (listing pages of 20 and 100 items, facets, compare/4) the
+app is called in-process (benchmarks/suite.py) --iterations times with
+Accept-Encoding set to identity, gzip, br and zstd, with the response cache
+on, so the compressed bytes come from the cache entry after the first
+request. The `nginx-gzip` rows add what on-the-fly compression costs on
+every request instead (gzip level 1, nginx's default gzip_comp_level) to
+the identity timings.
+
+Runs on a copy of --database (fill one with generate_catalog.py). brotli
+and zstd rows need `pip install brotli zstandard`.
+
+Usage: python benchmarks/response_compression.py --database database.db
+                                                 [--iterations 500]
+                                                 [--output compression.json]
+"""
+import argparse
+import asyncio
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_load import latency_stats, save_results
+from suite import call, copy_database, lifespan
+
+ENCODINGS = ("identity", "gzip", "br", "zstd")
+
+
+def build_cases(database: str) -> dict:
+    """Case name -> (method, path, params, body)."""
+    with sqlite3.connect(database) as conn:
+        ids = [row[0] for row in conn.execute("SELECT id FROM keyboards ORDER BY id LIMIT 4")]
+    if len(ids) < 4:
+        raise SystemExit("The database needs at least 4 keyboards (see generate_catalog.py)")
+    return {
+        "list/20": ("GET", "/api/keyboards", {"limit": 20}, b""),
+        "list/100": ("GET", "/api/keyboards", {"limit": 100}, b""),
+        "facets": ("GET", "/api/keyboards/facets", {}, b""),
+        "compare/4": ("POST", "/api/keyboards/compare", {}, ('{"keyboard_ids":%s}' % ids).encode()),
+    }
+
+
+async def timed(app, iterations: int, method: str, path: str, params: dict, headers: dict, body: bytes):
+    status, response = await call(app, method, path, params, headers=headers, body=body)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        await call(app, method, path, params, headers=headers, body=body)
+        latencies.append(time.perf_counter() - t)
+    return status, response, latencies, time.perf_counter() - start
+
+
+async def run(database: str, iterations: int) -> dict:
+    from app.compression import available_encodings
+    from app.main import app
+
+    available = available_encodings()
+    results = {}
+    async with lifespan(app):
+        for case, (method, path, params, body) in build_cases(database).items():
+            headers = {"content-type": "application/json"} if body else {}
+            for encoding in ENCODINGS:
+                if encoding != "identity" and encoding not in available:
+                    print(f"{case}/{encoding}: not available")
+                    continue
+                status, response, latencies, elapsed = await timed(
+                    app, iterations, method, path, params, {**headers, "accept-encoding": encoding}, body
+                )
+                results[f"{case}/{encoding}"] = {
+                    "requests": iterations, "status": status, "bytes": len(response),
+                    "rps": round(iterations / elapsed, 1), **latency_stats(latencies)
+                }
+                if encoding == "identity":
+                    # The same responses compressed again on every request
+                    start = time.perf_counter()
+                    for _ in range(iterations):
+                        compressed = gzip.compress(response, compresslevel=1)
+                    per_request = (time.perf_counter() - start) / iterations
+                    results[f"{case}/nginx-gzip"] = {
+                        "requests": iterations, "status": status, "bytes": len(compressed),
+                        "rps": round(iterations / (elapsed + per_request * iterations), 1),
+                        **latency_stats([latency + per_request for latency in latencies])
+                    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="database.db", help="SQLite database to copy and benchmark")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        raise SystemExit(f"Database not found: {args.database}")
+
+    workdir = tempfile.mkdtemp(prefix="keyboard-bench-")
+    database = os.path.join(workdir, "bench.db")
+    # Settings are read at import time, so set them before the app is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    try:
+        copy_database(args.database, database)
+        results = asyncio.run(run(database, args.iterations))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for name, stats in results.items():
+        print(f"{name:<24} {stats['bytes']:>8} B {stats['rps']:>10.1f} req/s"
+              f"  p50 {stats['p50_ms']:8.3f} ms  p99 {stats['p99_ms']:8.3f} ms")
+    if args.output:
+        save_results(args.output, results, driver="response_compression",
+                     database=os.path.abspath(args.database), iterations=args.iterations)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Per-row serialization cost of a 100-item keyboard page.
+
+Compares the Pydantic paths with the cached orjson serializer
+(app/serializers.py):
+
+  fastapi_default   KeyboardResponse per row, re-validated against the
+                    response_model, jsonable_encoder + json.dumps
+  pydantic_json     KeyboardResponse per row + model_dump_json
+  orjson_cold       serialize_keyboard with an empty row cache
+  orjson_cached     serialize_keyboard with every row cached (the
+                    steady state between admin edits)
+
+Usage: python benchmarks/serialize_rows.py [--rows 100] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Keyboard, KeyboardType
+from app.schemas import KeyboardImages, KeyboardListResponse, KeyboardResponse, KeyboardTags
+from app.serializers import keyboards_json, row_cache, serialize_keyboard
+from app.utils.image_variants import IMAGE_VARIANT_WIDTHS, variant_filename, variant_srcsets
+
+
+def make_keyboards(count: int):
+    created = datetime(2024, 1, 1, 12, 0, 0)
+    types = list(KeyboardType)
+    return [
+        Keyboard(
+            id=i + 1,
+            name=f"Keyboard {i:04d}",
+            price=None if i % 7 == 0 else 50000 + i * 1000,
+            link=f"https://example.com/keyboards/{i}",
+            image_path=f"{i:064x}.jpg",
+            key_count_range="40",
+            keyboard_type=types[i % len(types)],
+            is_wireless=i % 2 == 0,
+            has_cursor_control=i % 3 == 0,
+            created_at=created,
+            updated_at=created + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+def pydantic_row(keyboard: Keyboard) -> KeyboardResponse:
+    return KeyboardResponse(
+        id=keyboard.id,
+        name=keyboard.name,
+        price=keyboard.price,
+        link=keyboard.link,
+        image_url=f"/uploads/{keyboard.image_path}",
+        images=KeyboardImages(
+            thumbnail_url=f"/uploads/{variant_filename(keyboard.image_path, IMAGE_VARIANT_WIDTHS[0], 'webp')}",
+            srcset=variant_srcsets(keyboard.image_path)
+        ),
+        key_count_range=keyboard.key_count_range,
+        keyboard_type=keyboard.keyboard_type,
+        tags=KeyboardTags(
+            is_wireless=keyboard.is_wireless,
+            has_cursor_control=keyboard.has_cursor_control
+        ),
+        created_at=keyboard.created_at,
+        updated_at=keyboard.updated_at
+    )
+
+
+def fastapi_default(keyboards) -> bytes:
+    response = KeyboardListResponse(
+        keyboards=[pydantic_row(kb) for kb in keyboards], total=len(keyboards), page=1, total_pages=1
+    )
+    # What FastAPI does with a returned model: validate against response_model, then encode
+    validated = KeyboardListResponse.model_validate(response.model_dump())
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def pydantic_json(keyboards) -> bytes:
+    return KeyboardListResponse(
+        keyboards=[pydantic_row(kb) for kb in keyboards], total=len(keyboards), page=1, total_pages=1
+    ).model_dump_json().encode()
+
+
+def orjson_page(keyboards) -> bytes:
+    return keyboards_json(
+        [serialize_keyboard(kb) for kb in keyboards],
+        total=len(keyboards), page=1, total_pages=1, next_cursor=None, total_is_estimate=False
+    )
+
+
+def orjson_cold(keyboards) -> bytes:
+    row_cache.clear()
+    return orjson_page(keyboards)
+
+
+def measure(fn, keyboards, repeat: int) -> float:
+    """Best-of-5 mean seconds per call."""
+    fn(keyboards)
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn(keyboards)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    keyboards = make_keyboards(args.rows)
+    assert json.loads(pydantic_json(keyboards)) == json.loads(orjson_page(keyboards))
+
+    print(f"{args.rows}-row page, best of 5 x {args.repeat}")
+    for name, fn in (
+        ("fastapi_default", fastapi_default),
+        ("pydantic_json", pydantic_json),
+        ("orjson_cold", orjson_cold),
+        ("orjson_cached", orjson_page),
+    ):
+        seconds = measure(fn, keyboards, args.repeat)
+        print(f"  {name:16s} {seconds * 1000:8.3f} ms/page {seconds / args.rows * 1e6:8.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
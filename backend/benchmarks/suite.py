@@ -0,0 +1,368 @@
+"""
+In-process benchmark suite for the API.
+
+Calls the ASGI app directly (no sockets, no server), so the numbers are
+the cost of routing, queries and serialization alone. Cases:
+
+  list/<filters>/<sort>          first page of GET /api/keyboards for every
+                                 filter set x sort option
+  list/<filters>/<sort>/cursor   the second page in cursor mode (all sorts
+                                 but relevance)
+  list/all/<sort>/deep           page --deep-page in offset mode
+  search/*                       full-text, short (LIKE), fuzzy, relevance
+  facets, detail, compare/2, compare/4, export/filtered
+  admin/login, admin/create, admin/update, admin/delete
+
+Each case runs --warmup times, then --iterations times in sequence; p50,
+p95, p99 and operations per second are printed and, with --output, saved
+as JSON in the http_load.py format (compare runs with compare_results.py).
+
+The suite works on a copy of --database (fill one with
+generate_catalog.py) and a scratch upload directory, so the admin cases
+never touch the original. The response cache is off unless --cache.
+
+Usage: python benchmarks/suite.py --database database.db [--iterations 50]
+                                  [--warmup 5] [--only list/] [--cache]
+                                  [--output results.json]
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+from urllib.parse import urlencode
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from http_load import latency_stats, multipart_body, save_results
+
+ADMIN_USERNAME = "bench"
+ADMIN_PASSWORD = "bench-password"
+
+FILTER_SETS = {
+    "all": {},
+    "price_range": {"min_price": 100000, "max_price": 300000, "include_null_price": "false"},
+    "with_null_price": {"min_price": 100000, "max_price": 300000},
+    "only_null_price": {"only_null_price": "true"},
+    "key_ranges": {"key_ranges": "40,30"},
+    "keyboard_type": {"keyboard_type": "column_stagger"},
+    "wireless": {"is_wireless": "true"},
+    "cursor_control": {"has_cursor_control": "true"},
+    "combined": {
+        "max_price": 250000, "key_ranges": "40", "keyboard_type": "dactyl",
+        "is_wireless": "true", "include_null_price": "false",
+    },
+}
+SORTS = ("name_asc", "name_desc", "price_asc", "price_desc", "relevance")
+
+
+@dataclass
+class Case:
+    name: str
+    request: Callable[[int], tuple]  # iteration -> (method, path, params, headers, body)
+    max_iterations: Optional[int] = None
+    on_response: Optional[Callable[[bytes], None]] = None
+
+
+async def call(app, method: str, path: str, params: Optional[dict] = None,
+               headers: Optional[dict] = None, body: bytes = b"") -> tuple:
+    """One HTTP request straight into the ASGI app; returns (status, body)."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": [(b"host", b"bench")] + [
+            (name.lower().encode(), value.encode()) for name, value in (headers or {}).items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    request_sent = False
+    response = {"status": 0, "body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return response["status"], b"".join(response["body"])
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Run the app's startup handlers, then its shutdown handlers on exit."""
+    messages = asyncio.Queue()
+    events = {"startup": asyncio.Event(), "shutdown": asyncio.Event()}
+
+    async def send(message):
+        for event, finished in events.items():
+            if message["type"].startswith(f"lifespan.{event}."):
+                finished.set()
+
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, messages.get, send)
+    )
+    await messages.put({"type": "lifespan.startup"})
+    await events["startup"].wait()
+    try:
+        yield
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        await events["shutdown"].wait()
+        await task
+
+
+def copy_database(source: str, target: str) -> None:
+    """Consistent copy of a SQLite database (including its WAL)."""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+
+
+def prepare_copy(path: str, admin_hash: str) -> dict:
+    """Add the bench admin to the copy and sample ids and search terms."""
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM admins WHERE username = ?", (ADMIN_USERNAME,))
+        conn.execute("INSERT INTO admins (username, password_hash) VALUES (?, ?)", (ADMIN_USERNAME, admin_hash))
+        rows = conn.execute("SELECT count(*) FROM keyboards").fetchone()[0]
+        ids = [row[0] for row in conn.execute("SELECT id FROM keyboards ORDER BY random() LIMIT 500")]
+        names = [row[0] for row in conn.execute("SELECT name FROM keyboards ORDER BY random() LIMIT 20")]
+    if len(ids) < 4:
+        raise SystemExit("The database needs at least 4 keyboards (see generate_catalog.py)")
+    return {"rows": rows, "ids": ids, "names": names}
+
+
+def search_terms(names: list) -> dict:
+    """A word from a real name, its 2-letter prefix and a misspelling of it."""
+    words = [w for name in names for w in re.findall(r"\w+", name) if len(w) >= 5 and w.isascii()]
+    word = words[0] if words else names[0][:5]
+    typo = word[0] + word[2] + word[1] + word[3:] if len(word) > 3 else word
+    return {"word": word, "short": word[:2], "typo": typo}
+
+
+def jpeg_bytes() -> bytes:
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 300), (90, 120, 200)).save(buffer, "JPEG", quality=80)
+    return buffer.getvalue()
+
+
+def build_cases(sample: dict, token_holder: dict, deep_page: int) -> list:
+    ids, terms = sample["ids"], search_terms(sample["names"])
+    cases = []
+
+    def get(path, params=None):
+        return lambda i: ("GET", path, params, None, b"")
+
+    for filter_name, filters in FILTER_SETS.items():
+        for sort in SORTS:
+            params = {**filters, "sort_by": sort}
+            cases.append(Case(f"list/{filter_name}/{sort}", get("/api/keyboards", params)))
+            if sort == "relevance":
+                continue  # not supported in cursor mode
+            cases.append(Case(
+                f"list/{filter_name}/{sort}/cursor",
+                get("/api/keyboards", {**params, "pagination": "cursor", "cursor": "<next>"})
+            ))
+    for sort in SORTS:
+        cases.append(Case(f"list/all/{sort}/deep", get("/api/keyboards", {"sort_by": sort, "page": deep_page})))
+
+    cases += [
+        Case("search/fts", get("/api/keyboards", {"search": terms["word"]})),
+        Case("search/short", get("/api/keyboards", {"search": terms["short"]})),
+        Case("search/fuzzy", get("/api/keyboards", {"search": terms["typo"], "fuzzy": "true"})),
+        Case("search/relevance", get("/api/keyboards", {"search": terms["word"], "sort_by": "relevance"})),
+        Case("facets", get("/api/keyboards/facets")),
+        Case("detail", lambda i: ("GET", f"/api/keyboards/{ids[i % len(ids)]}", None, None, b"")),
+        Case("compare/2", lambda i: (
+            "POST", "/api/keyboards/compare", None, {"Content-Type": "application/json"},
+            json.dumps({"keyboard_ids": random.Random(i).sample(ids, 2)}).encode()
+        )),
+        Case("compare/4", lambda i: (
+            "POST", "/api/keyboards/compare", None, {"Content-Type": "application/json"},
+            json.dumps({"keyboard_ids": random.Random(i).sample(ids, 4)}).encode()
+        )),
+        Case("export/filtered", get("/api/keyboards/export", {**FILTER_SETS["combined"], "format": "ndjson"}),
+             max_iterations=10),
+    ]
+
+    # Admin write paths; create/update/delete work on the keyboards created here
+    image = jpeg_bytes()
+    created = []
+
+    def auth():
+        return {"Authorization": f"Bearer {token_holder['token']}"}
+
+    def form(i, prefix):
+        return multipart_body(
+            {"name": f"{prefix} {i}", "link": "https://example.com/bench", "key_count_range": "40",
+             "keyboard_type": "splay", "price": str(100000 + i), "is_wireless": "true"},
+            image
+        )
+
+    def create(i):
+        body, content_type = form(i, "Bench Create")
+        return "POST", "/api/admin/keyboards", None, {**auth(), "Content-Type": content_type}, body
+
+    def update(i):
+        body, content_type = form(i, "Bench Update")
+        return "PUT", f"/api/admin/keyboards/{created[i % len(created)]}", None, \
+            {**auth(), "Content-Type": content_type}, body
+
+    def delete(i):
+        return "DELETE", f"/api/admin/keyboards/{created.pop()}", None, auth(), b""
+
+    def login(i):
+        return "POST", "/api/admin/login", None, {"Content-Type": "application/json"}, \
+            json.dumps({"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}).encode()
+
+    cases += [
+        Case("admin/login", login, max_iterations=10,
+             on_response=lambda payload: token_holder.update(token=json.loads(payload)["access_token"])),
+        Case("admin/create", create, on_response=lambda payload: created.append(json.loads(payload)["id"])),
+        Case("admin/update", update),
+        Case("admin/delete", delete),
+    ]
+    return cases
+
+
+async def next_cursor(app, method, path, params, headers, body) -> dict:
+    """Replace the cursor placeholder with the next_cursor of the first page."""
+    first = {k: v for k, v in params.items() if k != "cursor"}
+    _, payload = await call(app, method, path, first, headers, body)
+    cursor = json.loads(payload).get("next_cursor")
+    return {**first, "cursor": cursor} if cursor else first
+
+
+async def run_case(app, case: Case, warmup: int, iterations: int) -> dict:
+    if case.max_iterations:
+        iterations = min(iterations, case.max_iterations)
+        warmup = min(warmup, 1)
+
+    latencies, errors = [], 0
+    cursor_params = None
+    for i in range(warmup + iterations):
+        method, path, params, headers, body = case.request(i)
+        if params and params.get("cursor") == "<next>":
+            if cursor_params is None:
+                cursor_params = await next_cursor(app, method, path, params, headers, body)
+            params = cursor_params
+
+        start = time.perf_counter()
+        status, payload = await call(app, method, path, params, headers, body)
+        elapsed = time.perf_counter() - start
+
+        if status >= 400:
+            errors += 1
+        elif case.on_response:
+            case.on_response(payload)
+        if i >= warmup:
+            latencies.append(elapsed)
+
+    total = sum(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / total, 1) if total else None,
+        **latency_stats(latencies),
+    }
+
+
+async def run_suite(args, workdir: str) -> dict:
+    from app.database import async_engine, async_read_engine
+    from app.main import app
+    from app.utils.security import get_password_hash
+
+    database = os.path.join(workdir, "bench.db")
+    copy_database(args.database, database)
+    sample = prepare_copy(database, get_password_hash(ADMIN_PASSWORD))
+
+    token_holder = {"token": ""}
+    cases = build_cases(sample, token_holder, args.deep_page)
+    if args.only:
+        wanted = {case.name for case in cases if re.search(args.only, case.name)}
+        # Write cases need a token, update/delete need created keyboards
+        if any(name.startswith("admin/") for name in wanted):
+            wanted |= {"admin/login", "admin/create"}
+        cases = [case for case in cases if case.name in wanted]
+
+    results = {}
+    async with lifespan(app):
+        for case in cases:
+            results[case.name] = stats = await run_case(app, case, args.warmup, args.iterations)
+            print(f"{case.name:42s} {stats['rps'] or 0:9.1f} ops/s  p50 {stats.get('p50_ms', 0):8.3f} ms"
+                  f"  p95 {stats.get('p95_ms', 0):8.3f} ms  p99 {stats.get('p99_ms', 0):8.3f} ms"
+                  + (f"  errors {stats['errors']}" if stats["errors"] else ""))
+    await async_engine.dispose()
+    await async_read_engine.dispose()
+    return {"rows": sample["rows"], "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default="database.db", help="SQLite database to copy and benchmark")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--deep-page", type=int, default=500, help="Page number for the deep offset cases")
+    parser.add_argument("--only", help="Regex; run only matching cases (e.g. 'list/all/|search/')")
+    parser.add_argument("--cache", action="store_true", help="Keep the response cache on")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.database):
+        raise SystemExit(f"Database not found: {args.database}")
+
+    workdir = tempfile.mkdtemp(prefix="keyboard-bench-")
+    # Settings are read at import time, so set them before the app is imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["UPLOAD_DIR"] = os.path.join(workdir, "uploads")
+    os.environ["LOGIN_ATTEMPTS_PER_IP"] = "0"
+    os.environ["LOGIN_FAILURES_PER_USERNAME"] = "0"
+    if not args.cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    try:
+        run = asyncio.run(run_suite(args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.output:
+        save_results(
+            args.output, run["results"], driver="suite", database=os.path.abspath(args.database),
+            rows=run["rows"], iterations=args.iterations, warmup=args.warmup, cache=args.cache
+        )
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
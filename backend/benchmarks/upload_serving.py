@@ -0,0 +1,190 @@
+"""
+/uploads serving: app.static_files.UploadFiles vs Starlette's StaticFiles
+(what /uploads was mounted with before).
+
+Both serve the same scratch directory of content-addressed files:
+
+  get/20k, get/150k, get/2m   full download (thumbnail, image, large upload)
+  revalidate                  conditional GET with the ETag of a previous
+                              response (304 expected)
+  range/64k                   Range: bytes=0-65535 of the 2MB file (206;
+                              StaticFiles of this Starlette ignores Range
+                              and sends the whole file)
+
+In-process (default): each case is called --iterations times straight into
+the ASGI app (benchmarks/suite.py), so the numbers are the per-request cost
+of the serving code alone.
+
+With --http each variant runs in its own uvicorn process and
+benchmarks/http_load.py drives it with --connections keep-alive clients for
+--duration seconds per case (requests per second, p50/p95/p99).
+
+Usage: python benchmarks/upload_serving.py [--iterations 2000] [--http]
+                                           [--connections 50] [--duration 5]
+                                           [--output uploads.json]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from starlette.staticfiles import StaticFiles
+
+from app.static_files import UploadFiles
+from http_load import latency_stats, run_load, save_results
+from suite import call
+
+SIZES = {"20k": 20 * 1024, "150k": 150 * 1024, "2m": 2 * 1024 * 1024}
+
+
+def make_files(directory: str) -> dict:
+    """Random content-addressed .jpg files per size label; returns label -> name."""
+    names = {}
+    for label, size in SIZES.items():
+        data = os.urandom(size)
+        name = hashlib.sha256(data).hexdigest() + ".jpg"
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        names[label] = name
+    return names
+
+
+def make_app(variant: str, directory: str):
+    if variant == "staticfiles":
+        return StaticFiles(directory=directory)
+    return UploadFiles(directory, accel_redirect="")
+
+
+def cases(names: dict, etag: str) -> dict:
+    """Case name -> (path, headers)."""
+    result = {f"get/{label}": (f"/{name}", {}) for label, name in names.items()}
+    result["revalidate"] = (f"/{names['150k']}", {"If-None-Match": etag})
+    result["range/64k"] = (f"/{names['2m']}", {"Range": "bytes=0-65535"})
+    return result
+
+
+async def etag_of(app, path: str) -> str:
+    """ETag the app sends for `path` (each variant has its own format)."""
+    scope_headers = {}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            scope_headers.update(dict(message["headers"]))
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    await app({
+        "type": "http", "method": "GET", "path": path, "root_path": "", "headers": [],
+        "query_string": b"", "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+    }, receive, send)
+    return scope_headers[b"etag"].decode()
+
+
+async def run_in_process(directory: str, names: dict, iterations: int) -> dict:
+    results = {}
+    for variant in ("staticfiles", "uploadfiles"):
+        app = make_app(variant, directory)
+        etag = await etag_of(app, f"/{names['150k']}")
+        for case, (path, headers) in cases(names, etag).items():
+            for _ in range(max(iterations // 20, 1)):  # warm up
+                status, body = await call(app, "GET", path, headers=headers)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(iterations):
+                t = time.perf_counter()
+                await call(app, "GET", path, headers=headers)
+                latencies.append(time.perf_counter() - t)
+            elapsed = time.perf_counter() - start
+            results[f"{variant}/{case}"] = {
+                "requests": iterations, "status": status, "bytes": len(body),
+                "rps": round(iterations / elapsed, 1), **latency_stats(latencies)
+            }
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(variant: str, directory: str, port: int) -> None:
+    import uvicorn
+
+    uvicorn.run(make_app(variant, directory), host="127.0.0.1", port=port, log_level="warning")
+
+
+def run_http(directory: str, names: dict, connections: int, duration: float) -> dict:
+    results = {}
+    for variant in ("staticfiles", "uploadfiles"):
+        port = free_port()
+        server = subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "--serve", variant,
+            "--directory", directory, "--port", str(port)
+        ])
+        try:
+            deadline = time.time() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise SystemExit(f"[ERROR] {variant} server did not start")
+                    time.sleep(0.2)
+
+            etag = asyncio.run(etag_of(make_app(variant, directory), f"/{names['150k']}"))
+            for case, (path, headers) in cases(names, etag).items():
+                url = f"http://127.0.0.1:{port}{path}"
+                extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+                stats = asyncio.run(run_load(url, connections, duration, extra_headers=extra))
+                results[f"http/{variant}/{case}"] = stats
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--http", action="store_true", help="Drive uvicorn servers instead of in-process calls")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=5)
+    parser.add_argument("--output", help="Also write the results to this JSON file")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    parser.add_argument("--directory", help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.directory, args.port)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        names = make_files(directory)
+        if args.http:
+            results = run_http(directory, names, args.connections, args.duration)
+        else:
+            results = asyncio.run(run_in_process(directory, names, args.iterations))
+
+    for name, stats in results.items():
+        status = f"{stats['status']} {stats['bytes']:>8} B  " if "status" in stats else ""
+        print(f"{name:<32} {status}{stats['rps']:>10.1f} req/s  p50 {stats.get('p50_ms', 0):8.3f} ms"
+              f"  p95 {stats.get('p95_ms', 0):8.3f} ms  p99 {stats.get('p99_ms', 0):8.3f} ms")
+    if args.output:
+        save_results(args.output, results, driver="upload_serving", http=args.http,
+                     connections=args.connections if args.http else None)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
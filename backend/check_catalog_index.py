@@ -0,0 +1,166 @@
+"""
+Check that the in-memory catalog index answers like SQL
+
+Builds a CatalogIndex (CATALOG_INDEX=1) from a scratch SQLite database
+seeded with synthetic keyboards (generate_catalog.py, plus rows with NULL
+tags) and compares it with the SQL listing queries for random filter sets,
+sort orders, pages and cursors: totals and the ids of every page must be
+identical. Cases the index does not support (relevance, fuzzy or wildcard
+search) are skipped, as the listing sends them to SQL. Exits non-zero on
+the first mismatches.
+
+Usage: python check_catalog_index.py [--rows 3000] [--cases 400] [--seed 1] [-v]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+# Use a scratch database; must be set before the app is imported
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'index.db')}"
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.catalog_index import _load_catalog_index  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+from app.filters import KeyboardFilters, apply_filters, apply_keyset, apply_sort, sort_key_of  # noqa: E402
+from app.models import Keyboard  # noqa: E402
+from app.schemas import KeyboardType, SortOption  # noqa: E402
+from app.startup import ensure_schema  # noqa: E402
+from generate_catalog import make_keyboard  # noqa: E402
+
+KEY_RANGES = ("30", "40", "compact", "tkl", "full")
+PAGE_SIZES = (1, 7, 20, 100)
+
+
+def seed_catalog(rows: int, seed: int) -> list:
+    """Fill the scratch database; returns the names (search terms are cut from them)."""
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    batch = [make_keyboard(rng, i, ["seed.jpg"], now) for i in range(rows)]
+    # NULL tags match neither True nor False, in SQL and in the index
+    for row in rng.sample(batch, rows // 50):
+        row[rng.choice(("is_wireless", "has_cursor_control"))] = None
+    with engine.begin() as conn:
+        conn.execute(Keyboard.__table__.insert(), batch)
+    return [row["name"] for row in batch]
+
+
+def random_search(rng: random.Random, names: list) -> str:
+    if rng.random() < 0.1:
+        return "zzqx"
+    name = rng.choice(names)
+    length = rng.randint(1, 6)
+    start = rng.randrange(max(len(name) - length, 0) + 1)
+    term = name[start:start + length]
+    return term.upper() if rng.random() < 0.3 else term
+
+
+def random_filters(rng: random.Random, names: list) -> KeyboardFilters:
+    kwargs = {}
+    price = rng.random()
+    if price < 0.15:
+        kwargs["only_null_price"] = True
+    elif price < 0.6:
+        if rng.random() < 0.7:
+            kwargs["min_price"] = rng.randrange(0, 400000, 1000)
+        if rng.random() < 0.7:
+            kwargs["max_price"] = rng.randrange(100000, 600000, 1000)
+        kwargs["include_null_price"] = rng.random() < 0.5
+    elif price < 0.7:
+        kwargs["include_null_price"] = False
+    if rng.random() < 0.3:
+        kwargs["key_ranges"] = tuple(rng.sample(KEY_RANGES, rng.randint(1, 2)))
+    if rng.random() < 0.3:
+        kwargs["keyboard_type"] = rng.choice(list(KeyboardType))
+    if rng.random() < 0.3:
+        kwargs["is_wireless"] = rng.random() < 0.5
+    if rng.random() < 0.3:
+        kwargs["has_cursor_control"] = rng.random() < 0.5
+    if rng.random() < 0.4:
+        kwargs["search"] = random_search(rng, names)
+    return KeyboardFilters(**kwargs)
+
+
+def sql_page(db, filters: KeyboardFilters, sort_by: SortOption, offset: int, limit: int, after=None):
+    """(total, rows) the SQL listing path returns."""
+    base = apply_filters(db.query(Keyboard), filters)
+    total = base.count()
+    query = base if after is None else apply_keyset(base, sort_by, *after)
+    rows = apply_sort(query, sort_by, filters).offset(offset).limit(limit).all()
+    return total, rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare the catalog index with SQL")
+    parser.add_argument("--rows", type=int, default=3000)
+    parser.add_argument("--cases", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-v", action="store_true", dest="verbose")
+    args = parser.parse_args()
+
+    ensure_schema()
+    names = seed_catalog(args.rows, args.seed)
+    index = _load_catalog_index(0)
+    rng = random.Random(args.seed)
+    sorts = [sort_by for sort_by in SortOption if sort_by in index.orders]
+
+    checked = skipped = 0
+    mismatches = []
+    db = SessionLocal()
+    try:
+        while checked < args.cases:
+            filters = random_filters(rng, names)
+            sort_by = rng.choice(sorts)
+            if rng.random() < 0.1:
+                filters = KeyboardFilters(search=rng.choice(("co%", "a_b")))
+            if not index.supports(filters, sort_by):
+                skipped += 1
+                continue
+            limit = rng.choice(PAGE_SIZES)
+
+            # Offset page
+            total = sql_page(db, filters, sort_by, 0, 0)[0]
+            offset = rng.randrange(total + 1) if total else 0
+            expected_total, expected = sql_page(db, filters, sort_by, offset, limit)
+            got_total, got = index.page(filters, sort_by, offset, limit)
+            cases = [("page", offset, expected_total, [kb.id for kb in expected], got_total, [r.id for r in got])]
+
+            # Cursor page after a random row of the filtered order (or from the start)
+            after = None
+            if total and rng.random() < 0.8:
+                last = sql_page(db, filters, sort_by, rng.randrange(total), 1)[1][0]
+                after = (sort_key_of(sort_by, last.name, last.price), last.id)
+            expected_total, expected = sql_page(db, filters, sort_by, 0, limit, after)
+            result = index.page_after(filters, sort_by, after, limit)
+            if result is None:
+                mismatches.append(("cursor", filters, sort_by, after, "index rejected a live cursor"))
+            else:
+                got_total, got = result
+                cases.append(("cursor", after, expected_total, [kb.id for kb in expected],
+                              got_total, [r.id for r in got]))
+
+            for kind, position, expected_total, expected_ids, got_total, got_ids in cases:
+                if (expected_total, expected_ids) != (got_total, got_ids):
+                    mismatches.append((kind, filters, sort_by, position,
+                                       f"SQL {expected_total} {expected_ids[:10]} / index {got_total} {got_ids[:10]}"))
+                elif args.verbose:
+                    print(f"{kind:6} {sort_by.value:10} {position} total={got_total} {filters}")
+            checked += 1
+    finally:
+        db.close()
+
+    for kind, filters, sort_by, position, detail in mismatches[:20]:
+        print(f"[FAIL] {kind} {sort_by.value} at {position}: {filters}")
+        print(f"    {detail}")
+
+    print(f"{checked} cases checked ({skipped} not supported by the index, skipped), "
+          f"{len(mismatches)} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
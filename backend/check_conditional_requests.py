@@ -0,0 +1,88 @@
+"""
+Check ETag / If-None-Match handling of the cached JSON endpoints
+
+Calls the app in-process against a scratch database seeded with a few
+synthetic keyboards and sends conditional requests to the listing, facets
+and detail endpoints, with and without Accept-Encoding: the exact ETag, its
+weak form (W/"..."), a list containing it, "*" and a non-matching tag.
+Weak comparison applies (RFC 9110 13.1.2), so every form of the current
+ETag must get a 304 with the same ETag, and anything else a 200. Exits
+non-zero on the first unexpected status.
+
+Usage: python check_conditional_requests.py [-v]
+"""
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+
+# Use a scratch database and upload directory; must be set before the app is imported
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'conditional.db')}"
+os.environ["UPLOAD_DIR"] = os.path.join(_tmpdir.name, "uploads")
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.compression import available_encodings  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models import Keyboard  # noqa: E402
+from app.startup import ensure_schema  # noqa: E402
+from generate_catalog import make_keyboard  # noqa: E402
+
+PATHS = ("/api/keyboards?limit=50", "/api/keyboards?limit=1", "/api/keyboards/facets", "/api/keyboards/1")
+
+
+def seed_catalog(rows: int = 200) -> None:
+    ensure_schema()
+    rng = random.Random(1)
+    now = datetime(2026, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(Keyboard.__table__.insert(), [make_keyboard(rng, i, ["seed.jpg"], now) for i in range(rows)])
+
+
+def main() -> int:
+    verbose = "-v" in sys.argv
+    seed_catalog()
+    encodings = [None] + [encoding for encoding in ("gzip", "br", "zstd") if encoding in available_encodings()]
+
+    checked = 0
+    failures = []
+    with TestClient(app) as client:
+        for path in PATHS:
+            for encoding in encodings:
+                headers = {"accept-encoding": encoding or "identity"}
+                response = client.get(path, headers=headers)
+                etag = response.headers.get("etag")
+                if response.status_code != 200 or not etag:
+                    failures.append(f"{path} ({encoding}): {response.status_code}, ETag {etag!r}")
+                    continue
+                cases = {
+                    etag: 304,
+                    "W/" + etag: 304,
+                    f'"other", W/{etag}': 304,
+                    "*": 304,
+                    '"other"': 200,
+                    "W/" + etag[:-1] + 'x"': 200,
+                }
+                for if_none_match, expected in cases.items():
+                    response = client.get(path, headers={**headers, "if-none-match": if_none_match})
+                    checked += 1
+                    ok = response.status_code == expected and (
+                        expected == 200 or response.headers.get("etag") == etag
+                    )
+                    if verbose or not ok:
+                        print(f"{'    ' if ok else '[FAIL]'} {path} ({encoding or 'identity'}) "
+                              f"If-None-Match: {if_none_match} -> {response.status_code} (expected {expected})")
+                    if not ok:
+                        failures.append(path)
+
+    print(f"{checked} conditional requests checked, {len(failures)} failures")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,88 @@
+"""
+데이터베이스 확인 스크립트
+
+  python check_db.py
+      관리자 계정 목록 (database.db)
+
+  python check_db.py --slow-queries --username admin --password <password> [--url http://127.0.0.1:8000]
+      실행 중인 서버의 slow-query 버퍼 요약 (SLOW_QUERY_MS > 0 으로 실행된 서버).
+      같은 SQL끼리 묶어 횟수, 최대/평균 시간, 라우트, 가장 느린 실행의 EXPLAIN QUERY PLAN 출력
+"""
+import argparse
+import json
+import re
 import sqlite3
+import urllib.request
+
+# keyboards 테이블 전체 스캔 (인덱스 없이)
+_KEYBOARDS_SCAN = re.compile(r"^SCAN keyboards( |$)")
+
+
+def list_admins():
+    # 데이터베이스 연결
+    conn = sqlite3.connect('database.db')
+    cursor = conn.cursor()
+
+    # 관리자 계정 조회
+    print("=== 관리자 계정 목록 ===")
+    cursor.execute("SELECT id, username, created_at FROM admins")
+    admins = cursor.fetchall()
+
+    if admins:
+        for admin in admins:
+            print(f"ID: {admin[0]}, Username: {admin[1]}, Created: {admin[2]}")
+    else:
+        print("관리자 계정이 없습니다.")
+
+    conn.close()
+
+
+def _request(url: str, body: dict = None, token: str = None) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode() if body is not None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers)) as response:
+        return json.loads(response.read())
+
+
+def summarize_slow_queries(url: str, username: str, password: str, limit: int):
+    token = _request(f"{url}/api/admin/login", {"username": username, "password": password})["access_token"]
+    report = _request(f"{url}/api/admin/slow-queries?order=slowest&limit={limit}", token=token)
+
+    print("=== Slow queries ===")
+    if report["threshold_ms"] <= 0:
+        print("서버가 SLOW_QUERY_MS 없이 실행 중입니다 (기록 꺼짐).")
+        return
+    queries = report["queries"]
+    print(f"threshold {report['threshold_ms']} ms, {len(queries)} statements recorded "
+          f"(buffer {report['capacity']})")
 
-# 데이터베이스 연결
-conn = sqlite3.connect('database.db')
-cursor = conn.cursor()
+    # 서버가 이미 SQL별로 묶어서 가장 느린 실행을 보관함 - 최대 시간 순으로 출력
+    for worst in sorted(queries, key=lambda q: q["duration_ms"], reverse=True):
+        statement = " ".join(worst["statement"].split())
+        print()
+        print(f"{worst['count']}x  max {worst['duration_ms']:.1f} ms  avg {worst['total_ms'] / worst['count']:.1f} ms"
+              f"  route: {worst['route'] or '(no request)'}")
+        print(f"  {statement[:300]}{'...' if len(statement) > 300 else ''}")
+        print(f"  slowest parameters: {', '.join(map(str, worst['parameters']))}")
+        for line in worst["plan"]:
+            flag = "  <-- full scan" if _KEYBOARDS_SCAN.match(line) and "USING" not in line else ""
+            print(f"    {line}{flag}")
 
-# 관리자 계정 조회
-print("=== 관리자 계정 목록 ===")
-cursor.execute("SELECT id, username, created_at FROM admins")
-admins = cursor.fetchall()
 
-if admins:
-    for admin in admins:
-        print(f"ID: {admin[0]}, Username: {admin[1]}, Created: {admin[2]}")
-else:
-    print("관리자 계정이 없습니다.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="데이터베이스 확인")
+    parser.add_argument("--slow-queries", action="store_true", help="서버의 slow-query 버퍼 요약")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="서버 주소")
+    parser.add_argument("--username", help="관리자 계정")
+    parser.add_argument("--password", help="관리자 비밀번호")
+    parser.add_argument("--limit", type=int, default=1000, help="가져올 최대 쿼리 수")
+    args = parser.parse_args()
 
-conn.close()
+    if args.slow_queries:
+        if not args.username or not args.password:
+            parser.error("--slow-queries 에는 --username 과 --password 가 필요합니다")
+        summarize_slow_queries(args.url.rstrip("/"), args.username, args.password, args.limit)
+    else:
+        list_admins()
@@ -0,0 +1,185 @@
+"""
+Check that concurrent uploads of the same image all succeed
+
+Uploads are content-addressed, so identical images share one file and one
+set of variants. This check renders the same image in several processes at
+once (render_variants directly), then starts the API in a subprocess
+against a scratch database and upload directory and sends rounds of
+identical admin uploads at the same time. Exits non-zero when a render or
+an upload fails, when a committed keyboard is missing a variant or a
+variant does not decode, or when temporary files are left behind.
+
+Usage: python check_image_variants.py [--concurrency 4] [--rounds 6]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add the parent directory (and the benchmark helpers) to the path
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent / "benchmarks"))
+
+from check_upload_memory import ADMIN_PASSWORD, ADMIN_USERNAME, create_admin, free_port
+from http_load import http_request, multipart_body
+
+
+def make_image(seed: int) -> bytes:
+    """A small JPEG, different for every seed (so every round has a new hash)."""
+    from PIL import Image
+
+    image = Image.new("RGB", (1600, 900), (seed * 37 % 256, seed * 91 % 256, 120))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+def check_variants(upload_dir: str, image_path: str) -> list:
+    """Problems with the variants of one image (missing or not decodable)."""
+    from PIL import Image
+
+    from app.utils.image_variants import variant_filenames
+
+    problems = []
+    for name in variant_filenames(image_path):
+        path = os.path.join(upload_dir, name)
+        if not os.path.exists(path):
+            problems.append(f"{name}: missing")
+            continue
+        try:
+            with Image.open(path) as variant:
+                variant.load()
+        except Exception as e:
+            problems.append(f"{name}: {e}")
+    return problems
+
+
+def leftovers(upload_dir: str) -> list:
+    return [name for name in os.listdir(upload_dir) if name.endswith((".tmp", ".part"))]
+
+
+def check_render(workdir: str, concurrency: int, rounds: int) -> bool:
+    """render_variants of one image in several processes at once."""
+    from app.utils.file_upload import content_filename
+    from app.utils.image_variants import render_variants
+
+    upload_dir = os.path.join(workdir, "render")
+    os.makedirs(upload_dir)
+    errors = []
+    with ProcessPoolExecutor(concurrency, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for round_number in range(rounds):
+            filename = content_filename(f"{round_number:064x}", ".jpg")
+            with open(os.path.join(upload_dir, filename), "wb") as f:
+                f.write(make_image(round_number))
+            futures = [executor.submit(render_variants, filename, upload_dir) for _ in range(concurrency)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(f"{filename}: {type(e).__name__}: {e}")
+            errors += check_variants(upload_dir, filename)
+
+    print(f"render_variants: {rounds} rounds x {concurrency} processes, {len(errors)} errors")
+    for error in errors[:10]:
+        print(f"  {error}")
+    left = leftovers(upload_dir)
+    if left:
+        print(f"  temporary files left behind: {left}")
+    return not errors and not left
+
+
+async def upload_rounds(port: int, concurrency: int, rounds: int) -> list:
+    status, payload = await http_request(
+        "127.0.0.1", port, "POST", "/api/admin/login", {"Content-Type": "application/json"},
+        json.dumps({"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}).encode()
+    )
+    if status != 200:
+        raise SystemExit(f"[ERROR] Login failed: {status} {payload[:200]!r}")
+    token = json.loads(payload)["access_token"]
+
+    async def upload(image: bytes) -> int:
+        body, content_type = multipart_body(
+            {"name": "Variant check", "link": "https://example.com", "key_count_range": "40"}, image
+        )
+        headers = {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+        status, _ = await http_request("127.0.0.1", port, "POST", "/api/admin/keyboards", headers, body)
+        return status
+
+    statuses = []
+    for round_number in range(rounds):
+        image = make_image(1000 + round_number)
+        statuses.append(await asyncio.gather(*(upload(image) for _ in range(concurrency))))
+    return statuses
+
+
+def check_uploads(workdir: str, concurrency: int, rounds: int) -> bool:
+    """Identical admin uploads sent at the same time to a running server."""
+    upload_dir = os.path.join(workdir, "uploads")
+    database = os.path.join(workdir, "variants.db")
+    database_url = f"sqlite:///{database}"
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url, "UPLOAD_DIR": upload_dir}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=str(Path(__file__).parent), env=env
+    )
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise SystemExit("[ERROR] Server did not start")
+                time.sleep(0.2)
+
+        statuses = asyncio.run(upload_rounds(port, concurrency, rounds))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    with sqlite3.connect(database) as conn:
+        images = [row[0] for row in conn.execute("SELECT DISTINCT image_path FROM keyboards")]
+    problems = [problem for image_path in images for problem in check_variants(upload_dir, image_path)]
+
+    failed = sum(1 for round_statuses in statuses for status in round_statuses if status != 200)
+    print(f"Admin uploads: {rounds} rounds x {concurrency} identical, {failed} failed "
+          f"(statuses per round: {statuses})")
+    for problem in problems[:10]:
+        print(f"  {problem}")
+    left = leftovers(upload_dir)
+    if left:
+        print(f"  temporary files left behind: {left}")
+    return not failed and not problems and not left and len(images) == rounds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check concurrent uploads of the same image")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=6)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # Before anything imports app.database with the default DATABASE_URL
+        create_admin(f"sqlite:///{os.path.join(workdir, 'variants.db')}")
+        ok = check_render(workdir, args.concurrency, args.rounds)
+        ok = check_uploads(workdir, args.concurrency, args.rounds) and ok
+
+    print("[OK] Image variant check passed." if ok else "[FAIL] Image variant check failed.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Check `python migrate.py` on new and old databases
+
+Runs migrate.py in a subprocess (as deployment/deploy.sh does) against
+scratch SQLite databases:
+
+  new     no database file yet (first deploy)
+  empty   an old-schema keyboards table without rows
+  legacy  an old-schema keyboards table with rows to migrate
+
+Each database is migrated twice (the second run must change nothing).
+Exits non-zero when a run fails, when a migration is left unapplied, when
+the schema version is not current, or when migrated rows lack their
+keyboard_type / name_key.
+
+Usage: python check_migrate.py
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+sys.path.append(str(BACKEND_DIR))
+
+# keyboards as created before the migrations existed (baseline models)
+LEGACY_SCHEMA = """
+CREATE TABLE keyboards (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(255) NOT NULL,
+    price INTEGER,
+    link VARCHAR(500) NOT NULL,
+    image_path VARCHAR(500) NOT NULL,
+    key_count_range VARCHAR(50) NOT NULL,
+    is_wireless BOOLEAN DEFAULT 0,
+    has_cursor_control BOOLEAN DEFAULT 0,
+    has_ortholinear BOOLEAN DEFAULT 0,
+    has_tenting BOOLEAN DEFAULT 0,
+    has_display BOOLEAN DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+LEGACY_ROWS = [
+    ("Corne V4", 150000, "https://example.com/1", "a.jpg", "40", 0),
+    ("Planck EZ", 250000, "https://example.com/2", "b.jpg", "40", 1),
+    ("Kyria", None, "https://example.com/3", "c.jpg", "40", 0),
+]
+
+
+def run_migrate(database: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}"}
+    return subprocess.run([sys.executable, "migrate.py"], cwd=str(BACKEND_DIR), env=env,
+                          capture_output=True, text=True)
+
+
+def prepare(kind: str, database: str) -> None:
+    if kind == "new":
+        return
+    with sqlite3.connect(database) as conn:
+        conn.execute(LEGACY_SCHEMA)
+        if kind == "legacy":
+            conn.executemany(
+                "INSERT INTO keyboards (name, price, link, image_path, key_count_range, has_ortholinear) "
+                "VALUES (?, ?, ?, ?, ?, ?)", LEGACY_ROWS
+            )
+
+
+def problems_of(database: str) -> list:
+    from app.migrations import MIGRATIONS
+    from app.startup import SCHEMA_VERSION
+
+    problems = []
+    with sqlite3.connect(database) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            problems.append(f"schema version {version}, expected {SCHEMA_VERSION}")
+        finished = {name for name, in conn.execute(
+            "SELECT name FROM schema_migrations WHERE finished_at IS NOT NULL")}
+        missing = [m.name for m in MIGRATIONS if m.name not in finished]
+        if missing:
+            problems.append(f"migrations not applied: {missing}")
+        for name, name_key, keyboard_type in conn.execute("SELECT name, name_key, keyboard_type FROM keyboards"):
+            if name_key != name.lower():
+                problems.append(f"{name}: name_key {name_key!r}")
+            expected_type = "ortholinear" if name == "Planck EZ" else "none"
+            if keyboard_type != expected_type:
+                problems.append(f"{name}: keyboard_type {keyboard_type!r}, expected {expected_type!r}")
+    return problems
+
+
+def main() -> int:
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind in ("new", "empty", "legacy"):
+            database = os.path.join(workdir, f"{kind}.db")
+            prepare(kind, database)
+            problems = []
+            for attempt in ("first run", "second run"):
+                result = run_migrate(database)
+                if result.returncode != 0:
+                    problems.append(f"{attempt} exited with {result.returncode}:\n{result.stdout}{result.stderr}")
+                    break
+                last_line = result.stdout.strip().splitlines()[-1]
+                if attempt == "second run" and not last_line.startswith("[OK]"):
+                    problems.append(f"second run changed something: {last_line}")
+            else:
+                problems += problems_of(database)
+
+            failed = failed or bool(problems)
+            print(f"{'[FAIL]' if problems else '[OK]  '} {kind}")
+            for problem in problems:
+                print(f"    {problem}")
+
+    print("[OK] Migration check passed." if not failed else "[FAIL] Migration check failed.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Query plan regression check for GET /api/keyboards.
+
+Runs EXPLAIN QUERY PLAN for every SortOption x filter combination (listing,
+COUNT and cursor queries) against a scratch SQLite database built from the
+current models, seeded with SEED_ROWS synthetic keyboards (generate_catalog.py)
+and ANALYZEd so the planner sees real statistics, not an empty table.
+
+A query fails if its plan SCANs the keyboards table, whether through the
+table or through a (covering) index. Accepted scans:
+  - a page or cursor query walking the index of its sort order (it stops
+    after LIMIT rows);
+  - a COUNT whose filters give SQLite nothing to search an index with (none,
+    tags only, NOT NULL price, short LIKE search): it has to visit every row.
+    These are counted and listed with -v; count=estimated/none and
+    CATALOG_INDEX exist for them.
+
+Usage: python check_query_plans.py [-v]
+"""
+import itertools
+import os
+import re
+import sys
+import tempfile
+
+# Use a scratch database; must be set before the app is imported
+_tmpdir = tempfile.TemporaryDirectory()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmpdir.name, 'plans.db')}"
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime  # noqa: E402
+import random  # noqa: E402
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.filters import KeyboardFilters, apply_filters, apply_sort, apply_keyset  # noqa: E402
+from app.models import Keyboard  # noqa: E402
+from app.schemas import KeyboardType, SortOption  # noqa: E402
+from app.search import uses_fts  # noqa: E402
+from app.startup import ensure_schema  # noqa: E402
+from generate_catalog import make_keyboard  # noqa: E402
+
+# Synthetic keyboards in the scratch database (enough for ANALYZE statistics)
+SEED_ROWS = 5000
+
+# One representative value per filter; None means "filter not applied"
+FILTER_VALUES = {
+    "price": [
+        None,
+        {"min_price": 10000, "max_price": 50000},
+        {"min_price": 10000, "max_price": 50000, "include_null_price": False},
+        {"min_price": 10000},
+        {"include_null_price": False},
+        {"only_null_price": True},
+    ],
+    "key_ranges": [None, {"key_ranges": ("40", "tkl")}],
+    "keyboard_type": [None, {"keyboard_type": KeyboardType.dactyl}],
+    "tags": [
+        None,
+        {"is_wireless": True},
+        {"has_cursor_control": True},
+        {"is_wireless": True, "has_cursor_control": False},
+    ],
+    "search": [None, {"search": "corne"}, {"search": "corne", "fuzzy": True}, {"search": "co"}],
+}
+
+SAMPLE_CURSORS = {
+    SortOption.name_asc: ("m", 10),
+    SortOption.name_desc: ("m", 10),
+    SortOption.price_asc: (30000, 10),
+    SortOption.price_desc: (30000, 10),
+}
+
+
+def explain(db, query) -> list:
+    """Return the EXPLAIN QUERY PLAN detail lines for an ORM query."""
+    compiled = query.statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+    rows = db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + str(compiled)).fetchall()
+    return [row[-1] for row in rows]
+
+
+_KEYBOARDS_SCAN = re.compile(r"^SCAN keyboards( |$)")
+
+
+def is_full_scan(plan: list, limited: bool) -> bool:
+    """A SCAN of the keyboards table (table or whole index), unless it is an
+    index walk in the requested order that a LIMIT cuts short."""
+    scans = [line for line in plan if _KEYBOARDS_SCAN.match(line)]
+    if not scans:
+        return False
+    ordered_walk = (
+        limited
+        and not any("TEMP B-TREE FOR ORDER BY" in line for line in plan)
+        and all(" USING INDEX " in line for line in scans)
+    )
+    return not ordered_walk
+
+
+def has_index_predicate(filters: KeyboardFilters) -> bool:
+    """Whether a filter narrows the rows through an index (price range / NULL
+    price, key range, type, or an FTS search)."""
+    return bool(
+        filters.min_price is not None
+        or filters.max_price is not None
+        or filters.only_null_price
+        or filters.key_ranges
+        or filters.keyboard_type
+        or uses_fts(filters.search)
+    )
+
+
+def seed_catalog(rows: int = SEED_ROWS):
+    """Fill the scratch database with synthetic keyboards and ANALYZE it."""
+    rng = random.Random(1)
+    now = datetime(2026, 1, 1)
+    batch = [make_keyboard(rng, i, ["seed.jpg"], now) for i in range(rows)]
+    with engine.begin() as conn:
+        conn.execute(Keyboard.__table__.insert(), batch)
+        conn.exec_driver_sql("ANALYZE")
+
+
+def combinations():
+    for values in itertools.product(*FILTER_VALUES.values()):
+        kwargs = {}
+        for value in values:
+            if value:
+                kwargs.update(value)
+        yield KeyboardFilters(**kwargs)
+
+
+def main() -> int:
+    verbose = "-v" in sys.argv
+    ensure_schema()
+    seed_catalog()
+    db = SessionLocal()
+
+    checked = 0
+    failures = []
+    expected_scans = 0
+    try:
+        for filters in combinations():
+            base = apply_filters(db.query(Keyboard), filters)
+            for sort_by in SortOption:
+                queries = {
+                    "count": base.with_entities(Keyboard.id),
+                    "page": apply_sort(base, sort_by, filters).limit(20).offset(40),
+                }
+                # Relevance has no cursor mode
+                if sort_by in SAMPLE_CURSORS:
+                    after = apply_keyset(base, sort_by, *SAMPLE_CURSORS[sort_by])
+                    queries["cursor"] = apply_sort(after, sort_by, filters).limit(21)
+                for kind, query in queries.items():
+                    plan = explain(db, query)
+                    checked += 1
+                    if verbose:
+                        print(f"{sort_by.value:10} {kind:6} {filters}")
+                        for line in plan:
+                            print(f"    {line}")
+                    if is_full_scan(plan, limited=kind != "count"):
+                        if kind == "count" and not has_index_predicate(filters):
+                            expected_scans += 1
+                            if verbose:
+                                print("    (expected: COUNT without an indexable filter)")
+                        else:
+                            failures.append((filters, sort_by, kind, plan))
+    finally:
+        db.close()
+
+    for filters, sort_by, kind, plan in failures:
+        print(f"[FAIL] {sort_by.value} {kind}: {filters}")
+        for line in plan:
+            print(f"    {line}")
+
+    print(f"{checked} query plans checked, {len(failures)} full scans "
+          f"({expected_scans} expected COUNT scans not counted)")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Check worker boot time (cold start budget)
+
+Boots the app in fresh Python processes against a scratch database and
+upload directory, the way a server worker starts: interpreter start,
+`import app.main`, then the lifespan startup (schema check). The first boot
+creates the schema; the following ones find it current. Exits non-zero when
+the median boot of a worker on a current schema exceeds the budget, when
+importing the app has side effects (creates the database or UPLOAD_DIR), or
+when a lazily imported dependency (python-jose, passlib, Pillow, brotli,
+zstandard) is loaded at import time again.
+
+Usage: python check_startup.py [--runs 7] [--budget-ms 1000]
+       python check_startup.py --import-time [--top 25]
+           `python -X importtime` report: slowest modules and packages
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+
+# Only imported when first used (login, token checks, image decoding,
+# the first compressed response)
+LAZY_MODULES = ("jose", "passlib", "PIL", "brotli", "zstandard")
+
+# Runs in the worker process; prints its timings as JSON
+_BOOT = r"""
+import asyncio, json, os, sys, time
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+side_effects = [path for path in (os.environ["SCRATCH_DB"], os.environ["UPLOAD_DIR"]) if os.path.exists(path)]
+lazy_loaded = [name for name in json.loads(os.environ["LAZY_MODULES"]) if name in sys.modules]
+
+async def boot():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter(), time.time()
+
+ready, ready_at = asyncio.run(boot())
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "ready_at": ready_at,
+    "side_effects": side_effects,
+    "lazy_loaded": lazy_loaded,
+}))
+"""
+
+
+def scratch_env(workdir: str) -> dict:
+    database = os.path.join(workdir, "startup.db")
+    return {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{database}",
+        "SCRATCH_DB": database,
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "LAZY_MODULES": json.dumps(LAZY_MODULES),
+    }
+
+
+def boot_once(env: dict) -> dict:
+    """Boot one worker process; adds boot_ms (process spawn to startup complete)."""
+    spawned_at = time.time()
+    result = subprocess.run(
+        [sys.executable, "-c", _BOOT], cwd=str(BACKEND_DIR), env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"[ERROR] Worker failed to boot:\n{result.stderr}")
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["boot_ms"] = (timings["ready_at"] - spawned_at) * 1000
+    return timings
+
+
+def import_time_report(top: int) -> None:
+    """Print the slowest modules of `import app.main` (python -X importtime)."""
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            cwd=str(BACKEND_DIR), env=scratch_env(workdir), capture_output=True, text=True
+        )
+    if result.returncode != 0:
+        raise SystemExit(f"[ERROR] Import failed:\n{result.stderr}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((int(self_us), int(cumulative_us), name.strip()))
+
+    packages = defaultdict(int)
+    for self_us, _, name in modules:
+        packages[name.split(".")[0]] += self_us
+    total_ms = sum(packages.values()) / 1000
+
+    print(f"=== import app.main: {total_ms:.0f} ms, {len(modules)} modules ===")
+    print("\nSlowest modules (self time):")
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for self_us, cumulative_us, name in sorted(modules, reverse=True)[:top]:
+        print(f"{self_us / 1000:9.1f} {cumulative_us / 1000:9.1f}  {name}")
+    print("\nSlowest packages (sum of self time):")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:9.1f} ms  {name}  ({self_us / 1000 / total_ms:.0%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check worker boot time against a budget")
+    parser.add_argument("--runs", type=int, default=7, help="boots on a current schema (median is checked)")
+    parser.add_argument("--budget-ms", type=float, default=1000, help="median boot budget in milliseconds")
+    parser.add_argument("--import-time", action="store_true", help="report the slowest imports instead")
+    parser.add_argument("--top", type=int, default=25, help="modules shown by --import-time")
+    args = parser.parse_args()
+
+    if args.import_time:
+        import_time_report(args.top)
+        return
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = scratch_env(workdir)
+        first = boot_once(env)
+        boots = [boot_once(env) for _ in range(args.runs)]
+
+    def median(key):
+        return statistics.median(boot[key] for boot in boots)
+
+    print(f"First boot (creates the schema): {first['boot_ms']:.0f} ms "
+          f"(import {first['import_ms']:.0f} ms, startup {first['startup_ms']:.0f} ms)")
+    print(f"Boot on a current schema, median of {args.runs}: {median('boot_ms'):.0f} ms "
+          f"(import {median('import_ms'):.0f} ms, startup {median('startup_ms'):.1f} ms; "
+          f"min {min(boot['boot_ms'] for boot in boots):.0f} ms, budget {args.budget_ms:.0f} ms)")
+
+    ok = True
+    if median("boot_ms") > args.budget_ms:
+        print("[ERROR] Worker boot is over the budget (see --import-time)")
+        ok = False
+    if first["side_effects"]:
+        print(f"[ERROR] Importing the app created {first['side_effects']}")
+        ok = False
+    lazy_loaded = sorted({name for boot in [first] + boots for name in boot["lazy_loaded"]})
+    if lazy_loaded:
+        print(f"[ERROR] Imported at boot instead of on first use: {', '.join(lazy_loaded)}")
+        ok = False
+
+    print("[OK] Startup check passed." if ok else "[FAIL] Startup check failed.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Check that image uploads are handled in constant memory
+
+Starts the API in a subprocess against a scratch database and upload
+directory, sends rounds of concurrent near-limit (~5MB) image uploads and
+reads the server's peak RSS (VmHWM) from /proc. Exits non-zero when the peak
+grows by more than the budget over the idle server, when an oversize upload
+is not rejected with 413, or when temporary files are left behind.
+
+Linux only (/proc). Usage: python check_upload_memory.py [--concurrency 10]
+                                                         [--rounds 3] [--budget-mb 32]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the parent directory (and the benchmark helpers) to the path
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent / "benchmarks"))
+
+from http_load import http_request, multipart_body
+
+ADMIN_USERNAME = "memcheck"
+ADMIN_PASSWORD = "memcheck-password"
+
+
+def make_image(target_size: int) -> bytes:
+    """Random-noise JPEG just under `target_size` bytes (noise does not compress)."""
+    from PIL import Image
+
+    side = 2000
+    while True:
+        image = Image.frombytes("RGB", (side, side), os.urandom(side * side * 3))
+        buf = io.BytesIO()
+        image.save(buf, format="JPEG", quality=95)
+        if buf.tell() <= target_size:
+            return buf.getvalue()
+        side -= 50
+
+
+def create_admin(database_url: str) -> None:
+    os.environ["DATABASE_URL"] = database_url
+    from app.database import Base, SessionLocal, engine
+    from app.models import Admin
+    from app.utils.security import get_password_hash
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(Admin(username=ADMIN_USERNAME, password_hash=get_password_hash(ADMIN_PASSWORD)))
+    db.commit()
+    db.close()
+
+
+def memory_kb(pid: int) -> dict:
+    """VmRSS / VmHWM of a process in kB."""
+    values = {}
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "VmHWM"):
+                values[name] = int(value.split()[0])
+    return values
+
+
+def reset_peak(pid: int) -> bool:
+    """Reset VmHWM to the current RSS (Linux >= 4.0); False when not permitted."""
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def upload(port: int, token: str, image: bytes) -> int:
+    body, content_type = multipart_body(
+        {"name": "Memory check", "link": "https://example.com", "key_count_range": "40"}, image
+    )
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+    try:
+        status, _ = await http_request("127.0.0.1", port, "POST", "/api/admin/keyboards", headers, body)
+    except ConnectionError:
+        # The server may close the connection while an oversize body is still being sent
+        return 413
+    return status
+
+
+async def run_check(port: int, pid: int, image: bytes, oversize: bytes, concurrency: int, rounds: int) -> dict:
+    status, payload = await http_request(
+        "127.0.0.1", port, "POST", "/api/admin/login", {"Content-Type": "application/json"},
+        json.dumps({"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}).encode()
+    )
+    if status != 200:
+        raise SystemExit(f"[ERROR] Login failed: {status} {payload[:200]!r}")
+    token = json.loads(payload)["access_token"]
+
+    # Warm up (imports, pools, first image worker) before taking the baseline
+    await upload(port, token, image)
+    baseline = memory_kb(pid)["VmRSS"]
+    peak_reset = reset_peak(pid)
+
+    statuses = []
+    for _ in range(rounds):
+        statuses += await asyncio.gather(*(upload(port, token, image) for _ in range(concurrency)))
+    peak = memory_kb(pid)["VmHWM"]
+
+    return {
+        "baseline_kb": baseline,
+        "peak_kb": peak,
+        "peak_reset": peak_reset,
+        "statuses": statuses,
+        "oversize_status": await upload(port, token, oversize),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check peak server memory under concurrent uploads")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--budget-mb", type=float, default=32)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        upload_dir = os.path.join(workdir, "uploads")
+        database_url = f"sqlite:///{os.path.join(workdir, 'memcheck.db')}"
+        # Before anything imports app.database with the default DATABASE_URL
+        create_admin(database_url)
+
+        from app.utils.file_upload import MAX_FILE_SIZE
+
+        image = make_image(MAX_FILE_SIZE - 64 * 1024)
+        oversize = image + os.urandom(MAX_FILE_SIZE)
+        port = free_port()
+        env = {**os.environ, "DATABASE_URL": database_url, "UPLOAD_DIR": upload_dir}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+            cwd=str(Path(__file__).parent), env=env
+        )
+        try:
+            deadline = time.time() + 30
+            while True:
+                try:
+                    socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise SystemExit("[ERROR] Server did not start")
+                    time.sleep(0.2)
+
+            result = asyncio.run(run_check(port, server.pid, image, oversize, args.concurrency, args.rounds))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+        leftovers = [name for name in os.listdir(upload_dir) if name.endswith(".part")]
+
+    growth_mb = (result["peak_kb"] - result["baseline_kb"]) / 1024
+    failed_uploads = sum(1 for status in result["statuses"] if status != 200)
+    print(f"Uploads: {len(result['statuses'])} x {len(image) / (1024 * 1024):.1f}MB, "
+          f"{args.concurrency} concurrent, {failed_uploads} failed")
+    print(f"Server RSS: baseline {result['baseline_kb'] / 1024:.1f}MB, peak {result['peak_kb'] / 1024:.1f}MB "
+          f"(+{growth_mb:.1f}MB, budget {args.budget_mb}MB)"
+          + ("" if result["peak_reset"] else " [peak not reset; includes startup]"))
+    print(f"Oversize upload: {result['oversize_status']}")
+
+    ok = True
+    if failed_uploads:
+        print("[ERROR] Some uploads failed")
+        ok = False
+    if growth_mb > args.budget_mb:
+        print("[ERROR] Peak RSS grew beyond the budget")
+        ok = False
+    if result["oversize_status"] != 413:
+        print("[ERROR] Oversize upload was not rejected with 413")
+        ok = False
+    if leftovers:
+        print(f"[ERROR] Temporary files left behind: {leftovers}")
+        ok = False
+
+    print("[OK] Upload memory check passed." if ok else "[FAIL] Upload memory check failed.")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
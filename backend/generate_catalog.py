@@ -0,0 +1,188 @@
+"""
+Fill a fresh database with a synthetic keyboard catalog
+
+Creates the schema and inserts N keyboards with realistic names, prices
+(some without a price, like DIY kits), key ranges, types and tags, in
+batched transactions; scales to 1M rows. A small pool of placeholder
+images (with their resized variants) is written to UPLOAD_DIR and shared
+by all rows. The full-text index is built once after the insert.
+
+Point DATABASE_URL / UPLOAD_DIR at scratch locations; the script refuses
+to add to a database that already has keyboards.
+
+Usage: python generate_catalog.py [--rows 10000] [--images 24] [--seed 1] [--batch-size 10000]
+"""
+
+import argparse
+import hashlib
+import io
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from sqlalchemy import func, select
+
+from app.database import engine
+from app.models import Keyboard
+from app.search import ensure_search_index
+from app.startup import ensure_schema
+from app.utils.file_upload import UPLOAD_DIR, content_filename
+from app.utils.image_variants import render_variants
+from app.utils.text import ascii_lower
+
+# (model, keyboard type, key ranges it comes in, wireless share)
+MODELS = [
+    ("Corne", "column_stagger", ["40", "30"], 0.5),
+    ("Lily58", "column_stagger", ["40"], 0.3),
+    ("Sofle", "column_stagger", ["40"], 0.4),
+    ("Kyria", "splay", ["40"], 0.3),
+    ("Iris", "column_stagger", ["40"], 0.2),
+    ("Ferris Sweep", "splay", ["30"], 0.5),
+    ("Totem", "splay", ["30"], 0.6),
+    ("Piantor", "column_stagger", ["40", "30"], 0.1),
+    ("Chocofi", "column_stagger", ["40"], 0.5),
+    ("Aurora Sweep", "splay", ["30"], 0.7),
+    ("Elora", "column_stagger", ["compact"], 0.2),
+    ("Redox", "column_stagger", ["compact"], 0.3),
+    ("ErgoDox EZ", "column_stagger", ["compact"], 0.0),
+    ("Moonlander", "column_stagger", ["compact"], 0.0),
+    ("Voyager", "column_stagger", ["40"], 0.0),
+    ("Glove80", "dactyl", ["compact", "tkl"], 1.0),
+    ("Dactyl Manuform", "dactyl", ["40", "compact"], 0.2),
+    ("Skeletyl", "dactyl", ["40"], 0.2),
+    ("Charybdis", "dactyl", ["40", "compact"], 0.3),
+    ("Kinesis Advantage360", "dactyl", ["tkl", "full"], 0.5),
+    ("Keychron Q11", "typewriter", ["tkl"], 0.6),
+    ("Dygma Defy", "column_stagger", ["compact"], 0.8),
+    ("Split Planck", "ortholinear", ["40"], 0.3),
+    ("Let's Split", "ortholinear", ["40"], 0.1),
+    ("Quefrency", "typewriter", ["compact", "tkl"], 0.2),
+    ("Sinc", "typewriter", ["full"], 0.1),
+    ("Alice Split", "alice", ["compact"], 0.3),
+    ("Arisu", "alice", ["compact"], 0.2),
+    ("Microsoft Sculpt", "none", ["full"], 1.0),
+    ("Logitech Ergo K860", "none", ["full"], 1.0),
+]
+
+VARIANTS = [
+    "", "", "", "V2", "V3", "V4", "Mini", "Pro", "Wireless", "Low Profile",
+    "Choc", "MX Hotswap", "LP", "Max", "Lite", "한글 각인", "키트", "Kit",
+]
+SELLERS = ["", "", "Splitkb", "Boardsource", "Typeractive", "Mechboards", "키보드샵", "Ergomech"]
+
+# Placeholder images: solid colours, stored like uploads (content-addressed)
+IMAGE_SIZE = (800, 600)
+
+
+def make_placeholder_images(count: int, seed: int) -> list:
+    """Write `count` placeholder JPEGs (and variants) to UPLOAD_DIR; returns their names."""
+    from PIL import Image, ImageDraw
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        image = Image.new("RGB", IMAGE_SIZE, tuple(rng.randrange(40, 220) for _ in range(3)))
+        draw = ImageDraw.Draw(image)
+        for row in range(4):
+            for col in range(6):
+                x, y = 120 + col * 90, 140 + row * 90
+                draw.rectangle((x, y, x + 70, y + 70), fill=(240, 240, 240), outline=(30, 30, 30))
+        buffer = io.BytesIO()
+        image.save(buffer, "JPEG", quality=80)
+        data = buffer.getvalue()
+
+        filename = content_filename(hashlib.sha256(data).hexdigest(), ".jpg")
+        path = os.path.join(UPLOAD_DIR, filename)
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(data)
+        render_variants(filename, UPLOAD_DIR)
+        names.append(filename)
+    return names
+
+
+def make_keyboard(rng: random.Random, i: int, images: list, now: datetime) -> dict:
+    model, keyboard_type, key_ranges, wireless_share = rng.choice(MODELS)
+    variant = rng.choice(VARIANTS)
+    seller = rng.choice(SELLERS)
+    name = " ".join(part for part in (model, variant, f"({seller})" if seller else "") if part)
+    if rng.random() < 0.3:
+        name += f" #{i}"
+
+    # ~10% DIY / unpriced; otherwise log-normal around 200,000 KRW, rounded to 1,000
+    price = None if rng.random() < 0.1 else int(round(rng.lognormvariate(12.2, 0.5), -3))
+    created_at = now - timedelta(seconds=rng.randrange(3 * 365 * 24 * 3600))
+
+    return {
+        "name": name,
+        "name_key": ascii_lower(name),
+        "price": price,
+        "link": f"https://example.com/keyboards/{i}",
+        "image_path": images[i % len(images)],
+        "key_count_range": rng.choice(key_ranges),
+        "keyboard_type": keyboard_type,
+        "is_wireless": rng.random() < wireless_share,
+        "has_cursor_control": rng.random() < 0.2,
+        "created_at": created_at,
+        "updated_at": created_at + timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+    }
+
+
+def generate_catalog(rows: int, image_count: int = 24, seed: int = 1, batch_size: int = 10000):
+    """Insert `rows` synthetic keyboards in batches."""
+    # Current schema (and version) for a new database, as the app would create it
+    ensure_schema(engine)
+    with engine.connect() as conn:
+        existing = conn.execute(select(func.count()).select_from(Keyboard)).scalar()
+    if existing:
+        print(f"[ERROR] Database already has {existing} keyboards; use a fresh DATABASE_URL")
+        return
+
+    start = time.perf_counter()
+    images = make_placeholder_images(max(image_count, 1), seed)
+    print(f"[OK] {len(images)} placeholder images in {UPLOAD_DIR}")
+
+    # The FTS triggers would index row by row; build the index once at the end instead
+    with engine.begin() as conn:
+        for trigger in ("keyboards_fts_ai", "keyboards_fts_ad", "keyboards_fts_au"):
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.exec_driver_sql("DROP TABLE IF EXISTS keyboards_fts")
+
+    rng = random.Random(seed)
+    now = datetime(2026, 1, 1)
+    inserted = 0
+    while inserted < rows:
+        batch = [make_keyboard(rng, inserted + n, images, now) for n in range(min(batch_size, rows - inserted))]
+        with engine.begin() as conn:
+            conn.execute(Keyboard.__table__.insert(), batch)
+        inserted += len(batch)
+        elapsed = time.perf_counter() - start
+        print(f"[INFO] {inserted}/{rows} rows ({inserted / elapsed:.0f} rows/s)")
+
+    ensure_search_index(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    print(f"[OK] {rows} keyboards in {time.perf_counter() - start:.1f}s (search index built, ANALYZE done)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill a fresh database with a synthetic keyboard catalog")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of keyboards (default: 10000)")
+    parser.add_argument("--images", type=int, default=24, help="Placeholder images shared by the rows")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (same seed, same catalog)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Rows per transaction")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Synthetic Catalog Generator")
+    print("=" * 60)
+    print()
+
+    generate_catalog(args.rows, args.images, args.seed, args.batch_size)
@@ -0,0 +1,76 @@
+"""
+Backfill resized image variants for uploads already in UPLOAD_DIR
+
+New uploads get their WebP/JPEG variants when they are saved; this script
+creates them for images uploaded before that (or after changing
+IMAGE_VARIANT_WIDTHS). Images whose variants all exist are skipped unless
+--force is given.
+
+Usage: python generate_image_variants.py [--force] [--workers N]
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables (UPLOAD_DIR, DATABASE_URL) before the app reads them
+load_dotenv()
+
+from app.utils.file_upload import ALLOWED_EXTENSIONS, UPLOAD_DIR
+from app.utils.image_variants import IMAGE_WORKERS, is_variant_filename, render_variants, variants_exist
+
+
+def find_originals(force: bool):
+    """Uploaded originals that still need variants."""
+    for filename in sorted(os.listdir(UPLOAD_DIR)):
+        if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS or is_variant_filename(filename):
+            continue
+        if not force and variants_exist(filename, UPLOAD_DIR):
+            continue
+        yield filename
+
+
+def generate_image_variants(force: bool = False, workers=IMAGE_WORKERS):
+    """Render missing variants in a process pool."""
+    if not os.path.isdir(UPLOAD_DIR):
+        print(f"[ERROR] Upload directory not found: {UPLOAD_DIR}")
+        return
+
+    originals = list(find_originals(force))
+    print(f"[INFO] {len(originals)} images need variants.")
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(render_variants, filename, UPLOAD_DIR): filename for filename in originals}
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                written = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[ERROR] {filename}: {e}")
+                continue
+            print(f"[OK] {filename}: {len(written)} variants")
+
+    print(f"[OK] Done. {len(originals) - failed} processed, {failed} failed.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill resized image variants")
+    parser.add_argument("--force", action="store_true", help="Regenerate variants that already exist")
+    parser.add_argument("--workers", type=int, default=IMAGE_WORKERS, help="Worker processes (default: IMAGE_WORKERS)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Image Variant Backfill")
+    print("=" * 60)
+    print()
+
+    generate_image_variants(args.force, args.workers or None)
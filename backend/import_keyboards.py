@@ -0,0 +1,105 @@
+"""
+Bulk import keyboards from a CSV/JSONL manifest and a zip of images
+
+The same import as POST /api/admin/keyboards/import, run directly against
+the database. Manifest columns: name, price, link, key_count_range,
+keyboard_type, is_wireless, has_cursor_control and image (a file name
+inside the archive). Running servers pick up the new rows on their next
+request only when CATALOG_VERSION_FILE is set in .env to the file their
+workers map; serve.py's default temp file is not visible to this script.
+Without it the workers keep serving their cached pre-import catalog until
+they are restarted (a warning is printed after the import).
+
+Usage: python import_keyboards.py <manifest.csv|manifest.jsonl> <images.zip> [--dry-run] [--batch-size N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables (UPLOAD_DIR, DATABASE_URL) before the app reads them
+load_dotenv()
+
+from fastapi import HTTPException
+
+from app.bulk_import import IMPORT_BATCH_SIZE, import_keyboards
+from app.catalog_version import CATALOG_VERSION_FILE
+from app.database import AsyncSessionLocal
+from app.migrations import PendingMigrationsError
+from app.startup import ensure_schema
+from app.utils.image_variants import shutdown_image_workers
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+    sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
+
+
+async def run_import(manifest_path: str, archive_path: str, dry_run: bool, batch_size: int):
+    with open(manifest_path, "rb") as f:
+        manifest = f.read()
+
+    start = time.perf_counter()
+    with open(archive_path, "rb") as archive_file:
+        async with AsyncSessionLocal() as db:
+            result = await import_keyboards(
+                db, manifest, os.path.basename(manifest_path), archive_file, dry_run, batch_size
+            )
+    elapsed = time.perf_counter() - start
+
+    for error in result.errors:
+        label = f" ({error.name})" if error.name else ""
+        print(f"[ERROR] Row {error.row}{label}: {error.error}")
+
+    verb = "would be imported" if dry_run else "imported"
+    print(
+        f"[OK] {result.total_rows} rows: {result.imported} {verb}, {result.failed} failed, "
+        f"{result.images} images ({elapsed:.2f}s, {result.total_rows / elapsed if elapsed else 0:.0f} rows/s)"
+    )
+    if result.imported and not dry_run and not CATALOG_VERSION_FILE:
+        # The generation bump only reached this process
+        print("[WARNING] CATALOG_VERSION_FILE is not set: running servers keep serving the old catalog.")
+        print("          Set it in .env to the file the workers map, or restart the server.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import keyboards")
+    parser.add_argument("manifest", help="CSV (with header) or JSONL manifest")
+    parser.add_argument("images", help="Zip archive with the images named in the manifest")
+    parser.add_argument("--dry-run", action="store_true", help="Only validate rows and images")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE,
+                        help="Rows per transaction (default: IMPORT_BATCH_SIZE)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Keyboard Bulk Import" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 60)
+    print()
+
+    # Create tables and the search index if they don't exist
+    try:
+        ensure_schema()
+    except PendingMigrationsError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+    try:
+        asyncio.run(run_import(args.manifest, args.images, args.dry_run, max(args.batch_size, 1)))
+    except HTTPException as e:
+        print(f"[ERROR] {e.detail}")
+        sys.exit(1)
+    finally:
+        shutdown_image_workers()
+
+
+if __name__ == "__main__":
+    main()
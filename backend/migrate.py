@@ -0,0 +1,88 @@
+"""
+데이터베이스 마이그레이션 실행 (app/migrations.py)
+
+  python migrate.py [--batch-size 5000]
+      schema_migrations 에 기록되지 않은 마이그레이션을 순서대로 적용.
+      데이터 변경은 id 범위별 UPDATE 로 나눠 커밋하고 범위마다 진행 상황을 출력.
+      중단되면 다시 실행하면 마지막 체크포인트 다음부터 이어서 진행
+  python migrate.py --status
+      마이그레이션 목록과 상태 (applied / in progress / pending)
+
+Replaces migrate_add_tags.py, migrate_keyboard_type.py and
+migrate_add_indexes.py. SQLite only. Safe to run while the server is up
+(each batch holds the write lock briefly); start or restart the server
+afterwards so it sees the new schema version.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables (DATABASE_URL) before the app reads them
+load_dotenv()
+
+from sqlalchemy import inspect, text
+
+from app.database import IS_SQLITE, SQLALCHEMY_DATABASE_URL, engine
+from app.migrations import MIGRATION_BATCH_SIZE, MIGRATIONS, applied_migrations, run_migrations
+from app.startup import SCHEMA_VERSION, ensure_schema
+
+
+def show_status():
+    with engine.connect() as conn:
+        version = conn.execute(text("PRAGMA user_version")).scalar()
+        applied = applied_migrations(conn) if inspect(conn).has_table("schema_migrations") else {}
+
+    print(f"Schema version: {version} (current: {SCHEMA_VERSION})")
+    for migration in MIGRATIONS:
+        state = applied.get(migration.name)
+        if state is None:
+            status = "pending"
+        elif state["finished_at"] is None:
+            status = f"in progress (checkpoint id {state['checkpoint'] or 0}, {state['rows_updated']} rows updated)"
+        else:
+            status = f"applied {state['finished_at']:%Y-%m-%d %H:%M} ({state['rows_updated']} rows updated)"
+        print(f"  {migration.name:<24} {status}")
+        print(f"  {'':<24} {migration.description}")
+
+
+def migrate(batch_size: int):
+    start = time.perf_counter()
+    done = run_migrations(engine, batch_size=batch_size)
+    # Tables added since, the search index and the schema version
+    # (a new database gets its whole schema here)
+    schema_changed = ensure_schema(engine)
+    print()
+    if done:
+        print(f"[SUCCESS] {len(done)} migrations applied in {time.perf_counter() - start:.1f}s.")
+    elif schema_changed:
+        print(f"[SUCCESS] Schema created / updated to version {SCHEMA_VERSION}.")
+    else:
+        print("[OK] Database is up to date.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply pending database migrations")
+    parser.add_argument("--status", action="store_true", help="List migrations and their state")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE,
+                        help=f"Rows per UPDATE transaction (default: {MIGRATION_BATCH_SIZE})")
+    args = parser.parse_args()
+
+    if not IS_SQLITE:
+        sys.exit(f"[ERROR] Migrations support SQLite only ({SQLALCHEMY_DATABASE_URL})")
+
+    print("=" * 60)
+    print("Database Migrations")
+    print("=" * 60)
+    print()
+
+    if args.status:
+        show_status()
+    else:
+        migrate(args.batch_size)
@@ -0,0 +1,125 @@
+"""
+Migration script: store uploaded images under their content hash
+
+- every keyboard's image is renamed to `<sha256><ext>` (identical images
+  collapse into one file) and keyboards.image_path is updated
+- resized variants are generated for the new names, old variants removed
+- uploads no keyboard references are listed (and removed with --delete-orphans)
+
+New files are put in place and the database is committed before any old
+file is removed, so an interrupted run can simply be started again.
+Stop the server while this runs.
+
+Usage: python migrate_content_addressed_images.py [--delete-orphans]
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path
+sys.path.append(str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+
+# Load environment variables (UPLOAD_DIR, DATABASE_URL) before the app reads them
+load_dotenv()
+
+from app.database import SessionLocal
+from app.models import Keyboard
+from app.utils.file_upload import (
+    ALLOWED_EXTENSIONS, UPLOAD_DIR, content_filename, detect_image_extension, is_content_addressed
+)
+from app.utils.image_variants import delete_variant_files, is_variant_filename
+from generate_image_variants import generate_image_variants
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_content_addressed_images(delete_orphans: bool = False):
+    """Rename uploads to their content hash and dedupe them."""
+    if not os.path.isdir(UPLOAD_DIR):
+        print(f"[ERROR] Upload directory not found: {UPLOAD_DIR}")
+        return
+
+    db = SessionLocal()
+    try:
+        # 1. Put every image in place under its content name (old files stay for now)
+        renamed = {}
+        for keyboard in db.query(Keyboard).order_by(Keyboard.id):
+            old_name = keyboard.image_path
+            if is_content_addressed(old_name):
+                continue
+            if old_name not in renamed:
+                old_path = os.path.join(UPLOAD_DIR, old_name)
+                if not os.path.exists(old_path):
+                    print(f"[WARN] Keyboard {keyboard.id}: image file missing ({old_name})")
+                    continue
+                file_ext = detect_image_extension(old_path)
+                if file_ext is None:
+                    print(f"[WARN] Keyboard {keyboard.id}: not a JPEG/PNG/WebP image ({old_name})")
+                    continue
+                new_name = content_filename(file_sha256(old_path), file_ext)
+                new_path = os.path.join(UPLOAD_DIR, new_name)
+                if not os.path.exists(new_path):
+                    shutil.copy2(old_path, new_path)
+                renamed[old_name] = new_name
+            keyboard.image_path = renamed[old_name]
+
+        # 2. Switch the rows over
+        db.commit()
+        print(f"[OK] {len(renamed)} images renamed into {len(set(renamed.values()))} content-addressed files.")
+
+        referenced = {path for (path,) in db.query(Keyboard.image_path).distinct()}
+    finally:
+        db.close()
+
+    # 3. Remove the old copies and their variants
+    for old_name in renamed:
+        os.remove(os.path.join(UPLOAD_DIR, old_name))
+        delete_variant_files(old_name, UPLOAD_DIR)
+    print(f"[OK] {len(renamed)} old files removed.")
+
+    # 4. Variants for the new names
+    generate_image_variants()
+
+    # 5. Orphans (uploads no keyboard references)
+    orphans = [
+        name for name in sorted(os.listdir(UPLOAD_DIR))
+        if os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS
+        and not is_variant_filename(name)
+        and name not in referenced
+    ]
+    if not orphans:
+        print("[OK] No unreferenced uploads.")
+    elif delete_orphans:
+        for name in orphans:
+            os.remove(os.path.join(UPLOAD_DIR, name))
+            delete_variant_files(name, UPLOAD_DIR)
+        print(f"[OK] {len(orphans)} unreferenced uploads removed.")
+    else:
+        print(f"[INFO] {len(orphans)} unreferenced uploads (remove with --delete-orphans):")
+        for name in orphans:
+            print(f"  {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store uploaded images under their content hash")
+    parser.add_argument("--delete-orphans", action="store_true", help="Remove uploads no keyboard references")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Content-Addressed Image Migration")
+    print("=" * 60)
+    print()
+
+    migrate_content_addressed_images(args.delete_orphans)
@@ -0,0 +1,99 @@
+"""
+Production server for the Split Keyboard API.
+
+  python serve.py [--workers N] [--host 127.0.0.1] [--port 8000]
+                  [--keep-alive 75] [--graceful-timeout 30] [--max-requests 0]
+
+Runs WORKERS uvicorn worker processes (default: one per CPU available to
+this process, at least 2) that share one listening socket; the parent
+restarts a worker that dies. Signals to the parent process:
+
+  SIGHUP          restart the workers one at a time: each one stops (finishing
+                  its open requests within GRACEFUL_TIMEOUT) before its
+                  replacement starts, while the others keep serving
+  SIGTERM/SIGINT  graceful shutdown
+  SIGTTIN/SIGTTOU one worker more / less
+
+Each worker has its own in-process caches. Admin writes bump the catalog
+generation in CATALOG_VERSION_FILE, which every worker maps into memory, so
+all workers drop their cached listings on their next request (see
+app/catalog_version.py). When the variable is not set, a file in the temp
+directory is used for this server.
+
+A SIGHUP restart only avoids a gap if another worker is up while one is being
+replaced. With a single worker, requests that arrive while it stops and the
+new one starts wait in the socket's listen backlog (up to GRACEFUL_TIMEOUT
+plus startup) or time out at nginx; hence the minimum of 2 by default.
+
+Settings come from .env (HOST, PORT, WORKERS, KEEP_ALIVE_TIMEOUT,
+GRACEFUL_TIMEOUT, MAX_REQUESTS, ACCESS_LOG, CATALOG_VERSION_FILE); options
+override them. For development use run.py (one process, auto-reload).
+"""
+
+import argparse
+import os
+import tempfile
+
+import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables (the workers inherit them)
+load_dotenv()
+
+
+# Fewest workers by default: a restart replaces one while the other serves
+MIN_DEFAULT_WORKERS = 2
+
+
+def default_workers() -> int:
+    """One worker per CPU this process may run on (respects cpusets / taskset), at least 2."""
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    return max(cpus, MIN_DEFAULT_WORKERS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with several worker processes")
+    parser.add_argument("--host", default=os.getenv("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", 0)) or default_workers(),
+                        help="Worker processes (default: number of CPUs, at least 2)")
+    parser.add_argument("--keep-alive", type=int, default=int(os.getenv("KEEP_ALIVE_TIMEOUT", 75)),
+                        help="Seconds an idle keep-alive connection stays open; keep it above "
+                             "nginx's upstream keepalive_timeout (60s)")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_TIMEOUT", 30)),
+                        help="Seconds a stopping worker may spend on open requests")
+    parser.add_argument("--max-requests", type=int, default=int(os.getenv("MAX_REQUESTS", 0)),
+                        help="Replace a worker after this many requests (0 = never)")
+    parser.add_argument("--access-log", action="store_true", default=os.getenv("ACCESS_LOG", "0") == "1",
+                        help="Log every request (nginx already keeps an access log)")
+    args = parser.parse_args()
+
+    # Workers are started after this and inherit the environment
+    if not os.getenv("CATALOG_VERSION_FILE"):
+        os.environ["CATALOG_VERSION_FILE"] = os.path.join(
+            tempfile.gettempdir(), f"split-keyboard-{args.port}.catalog-version"
+        )
+
+    print(f"Starting {args.workers} workers on {args.host}:{args.port} "
+          f"(catalog version: {os.environ['CATALOG_VERSION_FILE']})")
+    if args.workers < 2:
+        print("[WARN] With one worker a SIGHUP restart (systemctl reload) leaves no worker "
+              "accepting requests until the new one is up; use WORKERS=2 or more")
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=args.max_requests or None,
+        access_log=args.access_log,
+        log_level="info"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -43,8 +43,11 @@ sudo mkdir -p $DB_DIR
 sudo chown -R ubuntu:ubuntu $DB_DIR
 sudo chmod -R 755 $DB_DIR
 
-echo "[7/8] 백엔드 서비스 재시작..."
-sudo systemctl restart split-keyboard-backend
+echo "[7/8] 데이터베이스 마이그레이션 및 백엔드 서비스 재시작..."
+cd $BACKEND_DIR
+python migrate.py
+# 워커를 하나씩 교체 (ExecReload 가 없는 예전 서비스 파일이면 재시작)
+sudo systemctl reload-or-restart split-keyboard-backend
 
 echo "[8/8] Nginx 재시작..."
 sudo systemctl reload nginx
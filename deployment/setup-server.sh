@@ -51,7 +51,11 @@ Type=simple
 User=ubuntu
 WorkingDirectory=$PROJECT_DIR/backend
 Environment="PATH=$PROJECT_DIR/backend/venv/bin"
-ExecStart=$PROJECT_DIR/backend/venv/bin/python run.py
+# 워커 수 = CPU 수, 최소 2 (WORKERS 로 변경). reload = 워커를 하나씩 교체 (워커 2개 이상이면 끊김 없음)
+ExecStart=$PROJECT_DIR/backend/venv/bin/python serve.py
+ExecReload=/bin/kill -HUP \$MAINPID
+KillSignal=SIGTERM
+TimeoutStopSec=40
 Restart=always
 RestartSec=10
 